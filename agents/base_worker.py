@@ -1,31 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Iterable, List
+import asyncio
 from llm.gemini_client import GeminiClient
+from llm.citation_verifier import CitationVerifier
 from database.queries import QuranQueries
+from config.settings import Settings
+from utils.lexicon import LEXICON
+from utils.fragment_cache import FragmentCache
+from utils.query_pipeline import PreparedQuery, QueryInput, prepare_query
 import logging
 
 class BaseWorker(ABC):
     """Base class for all worker agents with enhanced English support"""
     
+    # Query keywords that route a request to this worker
+    KEYWORDS: tuple = ()
+    
     def __init__(self):
         self.llm_client = GeminiClient()
         self.db_queries = QuranQueries()
+        self.fragments = FragmentCache.get_instance()
         self.logger = logging.getLogger(self.__class__.__name__)
     
+    @property
+    def citation_verifier(self) -> CitationVerifier:
+        return CitationVerifier.get_instance(self.db_queries)
+    
+    @classmethod
+    def keyword_groups(cls) -> List[Iterable[str]]:
+        """Every keyword list this worker matches, registered with the query pipeline"""
+        return [cls.KEYWORDS]
+    
+    @staticmethod
+    def prepare(query: QueryInput) -> PreparedQuery:
+        """The prepared query, preparing plain strings from direct callers"""
+        return prepare_query(query)
+    
     @abstractmethod
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Process the user request and return response"""
         pass
     
     @abstractmethod
-    def can_handle(self, query: str, intent: str) -> bool:
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
         """Check if this worker can handle the given query"""
         pass
     
+    def prerender_fragments(self):
+        """Render this worker's fixed fragments (names, duas) into the fragment cache ahead of requests"""
+        pass
+    
     def format_response(self, content: str, sources: list = None, language: str = "en", 
                        has_database_results: bool = True) -> Dict[str, Any]:
-        """Format the response in a standard structure"""
-        return {
+        """Format the response in a standard structure, with the verses it cites verified"""
+        response = {
             "content": content,
             "sources": sources or [],
             "language": language,
@@ -33,6 +61,18 @@ class BaseWorker(ABC):
             "has_database_results": has_database_results,
             "disclaimer": self._get_disclaimer(language, has_database_results)
         }
+        return self.verify_citations(response)
+    
+    def verify_citations(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach verified Arabic text for cited verses to the sources and flag bad citations"""
+        try:
+            response["sources"], issues = self.citation_verifier.verify(response["content"], response["sources"])
+            if issues:
+                response["citation_issues"] = issues
+                self.logger.warning(f"Citation issues: {issues}")
+        except Exception as e:
+            self.logger.error(f"Citation verification failed: {e}")
+        return response
     
     def _get_disclaimer(self, language: str, has_database_results: bool) -> str:
         """Get appropriate disclaimer based on whether database results were found"""
@@ -49,10 +89,37 @@ class BaseWorker(ABC):
         
         return disclaimers.get(language, disclaimers["en"])
     
-    async def search_with_fallback(self, query: str, language: str) -> tuple[list, bool]:
+    async def gather_sources(self, sources: Dict[str, Callable[[], Any]],
+                             timeouts: Dict[str, float] = None) -> Dict[str, Any]:
+        """Fetch independent data sources concurrently.
+        
+        Each source is a blocking callable run on the default executor under its
+        own timeout. A source that fails or times out yields None so the others
+        still contribute; total latency is that of the slowest source.
+        """
+        loop = asyncio.get_running_loop()
+        timeouts = timeouts or {}
+        
+        async def fetch(name: str, source: Callable[[], Any]) -> Any:
+            timeout = timeouts.get(name, Settings.WORKER_SOURCE_TIMEOUT)
+            try:
+                return await asyncio.wait_for(loop.run_in_executor(None, source), timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Data source {name} timed out after {timeout}s")
+            except Exception as e:
+                self.logger.error(f"Data source {name} failed: {e}")
+            return None
+        
+        names = list(sources)
+        results = await asyncio.gather(*(fetch(name, sources[name]) for name in names))
+        return dict(zip(names, results))
+    
+    async def search_with_fallback(self, query: QueryInput, language: str) -> tuple[list, bool]:
         """Search database with fallback strategies for English queries"""
         results = []
         has_results = False
+        prepared = self.prepare(query)
+        query = prepared.sanitized
         
         try:
             # Try direct search first
@@ -61,34 +128,12 @@ class BaseWorker(ABC):
             if results:
                 has_results = True
             elif language == "en":
-                # For English queries, try searching with common Islamic terms
-                english_to_arabic_terms = {
-                    'patience': 'صبر',
-                    'forgiveness': 'غفر',
-                    'mercy': 'رحم',
-                    'guidance': 'هدى',
-                    'peace': 'سلام',
-                    'knowledge': 'علم',
-                    'prayer': 'صلاة',
-                    'charity': 'زكاة',
-                    'faith': 'ايمان',
-                    'hope': 'رجاء',
-                    'love': 'حب',
-                    'trust': 'توكل',
-                    'worship': 'عبادة',
-                    'gratitude': 'شكر',
-                    'repentance': 'توبة'
-                }
-                
-                query_words = query.lower().split()
-                for word in query_words:
-                    if word in english_to_arabic_terms:
-                        arabic_results = self.db_queries.search_verses(
-                            english_to_arabic_terms[word], "ar"
-                        )
-                        results.extend(arabic_results)
-                        if arabic_results:
-                            has_results = True
+                # For English queries, search the root Arabic term of each concept mentioned
+                for arabic_term in LEXICON.primary_terms(prepared.normalized):
+                    arabic_results = self.db_queries.search_verses(arabic_term, "ar")
+                    results.extend(arabic_results)
+                    if arabic_results:
+                        has_results = True
                 
                 # Also try topic-based search
                 if not has_results:
@@ -1,3 +1,4 @@
+import time
 import asyncio
 from typing import Dict, Any, List
 from agents.workers.verse_worker import VerseWorker
@@ -5,65 +6,159 @@ from agents.workers.dua_worker import DuaWorker
 from agents.workers.names_worker import NamesWorker
 from agents.workers.guidance_worker import GuidanceWorker
 from agents.workers.learning_worker import LearningWorker  # Add this import
-from utils.language_detector import LanguageDetector
+from utils.query_pipeline import PreparedQuery, QueryPipeline
+from utils.session_memory import SessionStore
+from utils.cache_manager import CacheManager
+from utils.query_log import QueryLog
+from config.settings import Settings
 from utils.validators import InputValidator
-from llm.gemini_client import GeminiClient
+from llm.gemini_client import GeminiClient, degraded_response
+from llm.citation_verifier import CitationVerifier
 import logging
 
 class QuranChatbotOrchestrator:
     """Main orchestrator that routes requests to appropriate workers"""
     
+    # Enhanced intent patterns
+    INTENT_PATTERNS = {
+        'verse_search': [
+            'verse', 'ayah', 'surah', 'chapter', 'quran', 'quranic',
+            'آیت', 'سورہ', 'قرآن',  # Urdu
+            'آية', 'سورة', 'قرآن'   # Arabic
+        ],
+        'dua_request': [
+            'dua', 'prayer', 'pray', 'supplication', 'supplicate',
+            'دعا', 'نماز', 'التماس',  # Urdu
+            'دعاء', 'صلاة', 'ابتهال'   # Arabic
+        ],
+        'names_request': [
+            'allah', 'names', 'asma', 'husna', 'attributes',
+            'اللہ', 'نام', 'اسماء', 'حسنیٰ',  # Urdu
+            'الله', 'أسماء', 'الحسنى'    # Arabic
+        ],
+        'guidance_request': [
+            'advice', 'guidance', 'help', 'problem', 'difficulty',
+            'struggling', 'confused', 'worried', 'what should i do',
+            'مشکل', 'مدد', 'رہنمائی', 'مسئلہ',  # Urdu
+            'مشكلة', 'مساعدة', 'إرشاد', 'نصيحة'   # Arabic
+        ],
+        'learning_request': [
+            'learn', 'teach', 'explain', 'what is', 'how to', 'meaning',
+            'tell me about', 'education', 'study', 'understand',
+            'سیکھنا', 'پڑھانا', 'سمجھانا', 'کیا ہے',  # Urdu
+            'تعلم', 'علم', 'شرح', 'ما هو'    # Arabic
+        ]
+    }
+    
     def __init__(self):
+        self.verse_worker = VerseWorker()
+        self.learning_worker = LearningWorker()
         self.workers = [
-            VerseWorker(),
+            self.verse_worker,
             DuaWorker(),
             NamesWorker(),
             GuidanceWorker(),
-            LearningWorker()  # Add learning worker
+            self.learning_worker  # Add learning worker
         ]
+        # One keyword pass per query covers intents, worker routing and restricted topics
+        self.pipeline = QueryPipeline([
+            *self.INTENT_PATTERNS.values(),
+            *(group for worker in self.workers for group in worker.keyword_groups()),
+            InputValidator.RESTRICTED_WORDS
+        ])
         self.fallback_llm = GeminiClient()
+        self.sessions = SessionStore()
+        self.response_cache = CacheManager(Settings.RESPONSE_CACHE_DIR, Settings.RESPONSE_CACHE_TTL_HOURS) \
+            if Settings.RESPONSE_CACHE_ENABLED else None
+        self.query_log = QueryLog.get_instance() if Settings.QUERY_LOG_ENABLED else None
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def citation_verifier(self) -> CitationVerifier:
+        return CitationVerifier.get_instance(self.verse_worker.db_queries)
+    
     async def process_query(self, user_query: str, user_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Main entry point for processing user queries with enhanced English support"""
+        started = time.perf_counter()
         try:
-            # Validate input
-            is_valid, validation_message = InputValidator.validate_query(user_query)
-            if not is_valid:
-                return self._create_error_response(validation_message)
+            # Validate, sanitize, tokenize, match keywords and detect language in one pass
+            prepared = self.pipeline.prepare(user_query)
+            if not prepared.is_valid:
+                return self._create_error_response(prepared.validation_message)
+            clean_query, language = prepared.sanitized, prepared.language
             
-            # Sanitize input
-            clean_query = InputValidator.sanitize_input(user_query)
+            # Bounded memory of earlier turns in this session, for follow-up questions
+            user_context = dict(user_context or {})
+            session_id = user_context.get('session_id')
+            user_context['conversation'] = self.sessions.context(session_id)
             
-            # Detect language
-            language = LanguageDetector.detect_language(clean_query)
+            # Related verses, explicit verse references, juz/position and word-count questions
+            # are answered straight from the database, unless LLM commentary was asked for
+            response, intent = None, None
+            if not user_context.get('commentary'):
+                response, intent = await self.verse_worker.answer_related(clean_query, language), 'related_verses'
+                if not response:
+                    response, intent = await self.verse_worker.answer_reference(clean_query, language), 'verse_reference'
+                if not response:
+                    response, intent = await self.learning_worker.answer_position(clean_query, language), 'position_lookup'
+                if not response:
+                    response, intent = await self.learning_worker.answer_count(clean_query, language), 'word_count'
             
-            # Determine intent and route to appropriate worker
-            intent = await self._determine_intent(clean_query, language)
+            # Routed answers to questions without earlier context do not depend on the
+            # session, so they are kept in the response cache
+            cacheable = not response and self.response_cache is not None and not user_context['conversation']
+            cached = self.response_cache.get(clean_query, language) if cacheable else None
             
-            # Find appropriate worker
-            selected_worker = self._select_worker(clean_query, intent)
-            
-            if selected_worker:
-                self.logger.info(f"Routing to {selected_worker.__class__.__name__}")
-                response = await selected_worker.process_request(
-                    clean_query, 
-                    language, 
-                    user_context or {}
-                )
+            if response:
+                path = "direct"
+                self.logger.info(f"Answered {intent} without LLM")
+            elif cached:
+                path = "cache"
+                response, intent = cached, cached.get('intent')
+                response['cached'] = True
+                self.logger.info(f"Answered {intent} from the response cache")
             else:
-                # Enhanced fallback response
-                self.logger.info("Using enhanced fallback response")
-                response = await self._generate_enhanced_fallback_response(clean_query, language)
+                path = "routed"
+                degraded_response.set(False)
+                
+                # Determine intent and route to appropriate worker
+                intent = await self._determine_intent(prepared, language)
+                
+                # Find appropriate worker
+                selected_worker = self._select_worker(prepared, intent)
+                
+                if selected_worker:
+                    self.logger.info(f"Routing to {selected_worker.__class__.__name__}")
+                    response = await selected_worker.process_request(
+                        prepared, 
+                        language, 
+                        user_context
+                    )
+                else:
+                    # Enhanced fallback response
+                    self.logger.info("Using enhanced fallback response")
+                    response = await self._generate_enhanced_fallback_response(
+                        clean_query, language, user_context['conversation']
+                    )
+            
+            self.sessions.record(session_id, clean_query, response)
             
             # Add metadata
             response.update({
                 "query": clean_query,
                 "intent": intent,
                 "timestamp": asyncio.get_event_loop().time(),
-                "language_detected": language
+                "language_detected": language,
+                "timings": dict(prepared.timings)
             })
             
+            # Answers built without the LLM because it failed are not worth keeping
+            if cacheable and not cached and not response.get('error') and not degraded_response.get():
+                self.response_cache.set(clean_query, language, response)
+            
+            # Warm-up pre-answers are not traffic: they would feed themselves back into the prefill
+            if self.query_log and user_context.get('source') != 'warmup':
+                self._log_query(prepared, response, path, started)
             return response
             
         except Exception as e:
@@ -72,72 +167,67 @@ class QuranChatbotOrchestrator:
                 self._get_error_message(user_context.get('language', 'en') if user_context else 'en')
             )
     
-    async def _determine_intent(self, query: str, language: str) -> str:
+    def _log_query(self, prepared: PreparedQuery, response: Dict[str, Any], path: str, started: float):
+        """Queue one query log entry; the log's own thread writes it"""
+        timings = {stage: round(ms, 2) for stage, ms in prepared.timings.items()}
+        total = 1000 * (time.perf_counter() - started)
+        timings["answer"] = round(total - sum(prepared.timings.values()), 2)
+        timings["total"] = round(total, 2)
+        self.query_log.record({
+            "ts": round(time.time(), 3),
+            "query": " ".join(prepared.sanitized.lower().split()),
+            "language": prepared.language,
+            "intent": response.get('intent'),
+            "worker": response.get('worker'),
+            "path": path,
+            "error": bool(response.get('error')),
+            "results": len(response.get('sources', [])),
+            "database": bool(response.get('has_database_results')),
+            "ms": timings
+        })
+    
+    async def _determine_intent(self, query: PreparedQuery, language: str) -> str:
         """Enhanced intent determination"""
-        query_lower = query.lower()
-        
-        # Enhanced intent patterns
-        intent_patterns = {
-            'verse_search': [
-                'verse', 'ayah', 'surah', 'chapter', 'quran', 'quranic',
-                'آیت', 'سورہ', 'قرآن',  # Urdu
-                'آية', 'سورة', 'قرآن'   # Arabic
-            ],
-            'dua_request': [
-                'dua', 'prayer', 'pray', 'supplication', 'supplicate',
-                'دعا', 'نماز', 'التماس',  # Urdu
-                'دعاء', 'صلاة', 'ابتهال'   # Arabic
-            ],
-            'names_request': [
-                'allah', 'names', 'asma', 'husna', 'attributes',
-                'اللہ', 'نام', 'اسماء', 'حسنیٰ',  # Urdu
-                'الله', 'أسماء', 'الحسنى'    # Arabic
-            ],
-            'guidance_request': [
-                'advice', 'guidance', 'help', 'problem', 'difficulty',
-                'struggling', 'confused', 'worried', 'what should i do',
-                'مشکل', 'مدد', 'رہنمائی', 'مسئلہ',  # Urdu
-                'مشكلة', 'مساعدة', 'إرشاد', 'نصيحة'   # Arabic
-            ],
-            'learning_request': [
-                'learn', 'teach', 'explain', 'what is', 'how to', 'meaning',
-                'tell me about', 'education', 'study', 'understand',
-                'سیکھنا', 'پڑھانا', 'سمجھانا', 'کیا ہے',  # Urdu
-                'تعلم', 'علم', 'شرح', 'ما هو'    # Arabic
-            ]
-        }
-        
         # Check each intent pattern
-        for intent, patterns in intent_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
+        for intent, patterns in self.INTENT_PATTERNS.items():
+            if query.has_any(patterns):
                 return intent
         
         return 'general_query'
     
-    def _select_worker(self, query: str, intent: str):
+    def _select_worker(self, query: PreparedQuery, intent: str):
         """Enhanced worker selection"""
+        # Word-count questions mention the Quran but are answered from the concordance
+        if self.learning_worker.is_count_question(query):
+            return self.learning_worker
         for worker in self.workers:
             if worker.can_handle(query, intent):
                 return worker
         return None
     
-    async def _generate_enhanced_fallback_response(self, query: str, language: str) -> Dict[str, Any]:
+    async def _generate_enhanced_fallback_response(self, query: str, language: str,
+                                                   conversation: str = "") -> Dict[str, Any]:
         """Enhanced fallback response with better context"""
         try:
             context = self._create_fallback_context(language)
             
             response = await self.fallback_llm.generate_response(
-                query, context, language, "fallback"
+                query, context, language, "fallback", conversation=conversation
             )
             
-            return {
+            # Verses cited from general knowledge are checked against the corpus too
+            sources, issues = self.citation_verifier.verify(response)
+            fallback_response = {
                 "content": response,
-                "sources": [],
+                "sources": sources,
                 "language": language,
                 "worker": "EnhancedFallbackResponse",
                 "has_database_results": False,
                 "disclaimer": self._get_fallback_disclaimer(language)
             }
+            if issues:
+                fallback_response["citation_issues"] = issues
+            return fallback_response
         except Exception as e:
             self.logger.error(f"Enhanced fallback response error: {e}")
             return self._create_error_response(self._get_error_message(language))
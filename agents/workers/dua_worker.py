@@ -1,22 +1,64 @@
 from agents.base_worker import BaseWorker
+from utils.query_pipeline import QueryInput
+from utils.dua_index import DuaCategoryIndex
+from utils.fragment_cache import verse_key, dua_key
+from functools import partial
 from typing import Dict, Any
 
 class DuaWorker(BaseWorker):
     """Worker for handling dua requests with enhanced language support"""
     
-    def can_handle(self, query: str, intent: str) -> bool:
-        dua_keywords = [
-            "dua", "prayer", "pray", "supplication", "supplicate",
-            "دعا", "نماز", "التماس", "منت",  # Urdu
-            "دعاء", "صلاة", "ابتهال", "تضرع"   # Arabic
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in dua_keywords) or intent == "dua_request"
+    KEYWORDS = (
+        "dua", "prayer", "pray", "supplication", "supplicate",
+        "دعا", "نماز", "التماس", "منت",  # Urdu
+        "دعاء", "صلاة", "ابتهال", "تضرع"   # Arabic
+    )
     
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    # Query keywords that identify each dua category
+    DUA_CATEGORIES = {
+        'success': ['success', 'achievement', 'victory', 'کامیابی', 'نجاح'],
+        'protection': ['protection', 'safety', 'security', 'حفاظت', 'امان', 'حماية'],
+        'health': ['health', 'healing', 'cure', 'صحت', 'شفا', 'صحة'],
+        'forgiveness': ['forgiveness', 'repentance', 'sins', 'معافی', 'توبہ', 'مغفرة'],
+        'guidance': ['guidance', 'direction', 'help', 'رہنمائی', 'مدد', 'هداية'],
+        'gratitude': ['thanks', 'gratitude', 'blessing', 'شکر', 'نعمت', 'شكر'],
+        'travel': ['travel', 'journey', 'trip', 'سفر', 'سفر'],
+        'knowledge': ['knowledge', 'wisdom', 'learning', 'علم', 'حکمت', 'علم'],
+        'family': ['family', 'parents', 'children', 'خاندان', 'والدین', 'أسرة'],
+        'general': ['general', 'daily', 'routine', 'عام', 'روزانہ']
+    }
+    
+    # Arabic terms found in duas and verses commonly used as duas for each category
+    DUA_CONTENT_TERMS = {
+        'success': ['نجح', 'فلح', 'وفق'],
+        'protection': ['احفظ', 'احم', 'اعوذ'],
+        'health': ['شفا', 'عافية', 'صحة'],
+        'forgiveness': ['اغفر', 'تب علي'],
+        'guidance': ['اهد', 'أرشد'],
+        'knowledge': ['علم', 'زد علما'],
+        'general': ['رب', 'اللهم']
+    }
+    
+    @property
+    def dua_index(self) -> DuaCategoryIndex:
+        return DuaCategoryIndex.get_instance(
+            self.db_queries, categories=self.DUA_CATEGORIES, content_terms=self.DUA_CONTENT_TERMS
+        )
+    
+    @classmethod
+    def keyword_groups(cls):
+        return [cls.KEYWORDS, *cls.DUA_CATEGORIES.values()]
+    
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
+        return self.prepare(query).has_any(self.KEYWORDS) or intent == "dua_request"
+    
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            prepared = self.prepare(query)
+            query = prepared.sanitized
+            
             # Identify what type of dua is needed
-            dua_category = self._identify_dua_category(query)
+            dua_category = self._identify_dua_category(prepared)
             
             # Search for relevant duas
             dua_content = await self._get_dua_content(dua_category, language)
@@ -29,7 +71,8 @@ class DuaWorker(BaseWorker):
             
             # Generate response
             response = await self.llm_client.generate_response(
-                query, context_text, language, "dua_request"
+                query, context_text, language, "dua_request",
+                conversation=context.get('conversation', "")
             )
             
             return self.format_response(
@@ -47,41 +90,26 @@ class DuaWorker(BaseWorker):
                 has_database_results=False
             )
     
-    def _identify_dua_category(self, query: str) -> str:
+    def _identify_dua_category(self, query: QueryInput) -> str:
         """Identify what type of dua is being requested"""
-        query_lower = query.lower()
-        
-        categories = {
-            'success': ['success', 'achievement', 'victory', 'کامیابی', 'نجاح'],
-            'protection': ['protection', 'safety', 'security', 'حفاظت', 'امان', 'حماية'],
-            'health': ['health', 'healing', 'cure', 'صحت', 'شفا', 'صحة'],
-            'forgiveness': ['forgiveness', 'repentance', 'sins', 'معافی', 'توبہ', 'مغفرة'],
-            'guidance': ['guidance', 'direction', 'help', 'رہنمائی', 'مدد', 'هداية'],
-            'gratitude': ['thanks', 'gratitude', 'blessing', 'شکر', 'نعمت', 'شكر'],
-            'travel': ['travel', 'journey', 'trip', 'سفر', 'سفر'],
-            'knowledge': ['knowledge', 'wisdom', 'learning', 'علم', 'حکمت', 'علم'],
-            'family': ['family', 'parents', 'children', 'خاندان', 'والدین', 'أسرة'],
-            'general': ['general', 'daily', 'routine', 'عام', 'روزانہ']
-        }
+        prepared = self.prepare(query)
         
-        for category, keywords in categories.items():
-            if any(keyword in query_lower for keyword in keywords):
+        for category, keywords in self.DUA_CATEGORIES.items():
+            if prepared.has_any(keywords):
                 return category
         
         return 'general'
     
     async def _get_dua_content(self, category: str, language: str) -> Dict[str, Any]:
-        """Get duas from database and create fallback content"""
+        """Get ranked duas and their linked verses from the dua category index"""
         sources = []
         has_database_content = False
+        duas, dua_verses = [], []
         
         try:
-            # Search in dua table
-            duas = self.db_queries.search_duas(category)
-            
-            if not duas:
-                # Try searching in general duas
-                duas = self.db_queries.search_duas()
+            # One keyed lookup; categories without duas fall back to general duas
+            entries = self.dua_index.lookup(category)
+            duas = [entry['dua'] for entry in entries]
             
             if duas:
                 has_database_content = True
@@ -92,13 +120,12 @@ class DuaWorker(BaseWorker):
                         "verse": dua.get('aya_number', 'Unknown'),
                         "text": dua.get('aya', '')
                     }
-                    for dua in duas[:3]  # Limit to 3 duas
+                    for dua in duas  # Limited to 3 duas by the lookup
                 ])
             
-            # Also get some relevant Quranic verses that are commonly used as duas
-            dua_verses = await self._search_dua_verses(category, language)
+            # Quranic verses the duas are taken from
+            dua_verses = [entry['verse'] for entry in entries if entry['verse']][:2]
             if dua_verses:
-                has_database_content = True
                 sources.extend([
                     {
                         "type": "verse_dua",
@@ -106,7 +133,7 @@ class DuaWorker(BaseWorker):
                         "verse_number": verse['ayatNumber'],
                         "surah_id": verse['surahId']
                     }
-                    for verse in dua_verses[:2]
+                    for verse in dua_verses
                 ])
         
         except Exception as e:
@@ -116,33 +143,13 @@ class DuaWorker(BaseWorker):
             'has_database_content': has_database_content,
             'sources': sources,
             'category': category,
-            'duas': duas if 'duas' in locals() else [],
-            'verses': dua_verses if 'dua_verses' in locals() else []
+            'duas': duas,
+            'verses': dua_verses
         }
     
-    async def _search_dua_verses(self, category: str, language: str) -> list:
-        """Search for Quranic verses commonly used as duas"""
-        # Map categories to Arabic search terms for verses commonly used as duas
-        dua_terms = {
-            'success': ['نجح', 'فلح', 'وفق'],
-            'protection': ['احفظ', 'احم', 'اعوذ'],
-            'health': ['شفا', 'عافية', 'صحة'],
-            'forgiveness': ['اغفر', 'تب علي'],
-            'guidance': ['اهد', 'أرشد'],
-            'knowledge': ['علم', 'زد علما'],
-            'general': ['رب', 'اللهم']
-        }
-        
-        search_terms = dua_terms.get(category, dua_terms['general'])
-        all_verses = []
-        
-        for term in search_terms:
-            verses = self.db_queries.search_verses(term, 'ar')  # Search in Arabic
-            all_verses.extend(verses)
-        
-        # Remove duplicates
-        unique_verses = {v['ayatId']: v for v in all_verses}.values()
-        return list(unique_verses)[:2]
+    def prerender_fragments(self):
+        duas = [entry['dua'] for entry in self.dua_index.lookup(DuaCategoryIndex.GENERAL_CATEGORY, limit=None)]
+        self._format_duas_context({'category': DuaCategoryIndex.GENERAL_CATEGORY, 'duas': duas}, "en")
     
     def _create_general_dua_context(self, category: str, language: str) -> str:
         """Create general dua context when database results are limited"""
@@ -170,18 +177,29 @@ class DuaWorker(BaseWorker):
         
         # Add duas from database
         if 'duas' in dua_content and dua_content['duas']:
-            context += "Duas from the database:\n"
-            for i, dua in enumerate(dua_content['duas'], 1):
-                context += f"{i}. From Surah {dua.get('surah', 'Unknown')}, Verse {dua.get('aya_number', 'Unknown')}:\n"
-                context += f"   {dua.get('aya', '')}\n\n"
+            context += "Duas from the database:\n" + "".join(
+                f"{i}. " + self.fragments.render("dua", dua_key(dua), "", partial(self._render_dua, dua))
+                for i, dua in enumerate(dua_content['duas'], 1)
+            )
         
         # Add Quranic verses used as duas
         if 'verses' in dua_content and dua_content['verses']:
-            context += "Quranic verses commonly used as duas:\n"
-            for verse in dua_content['verses']:
-                context += f"- Surah {verse['name_en']}, Verse {verse['ayatNumber']}: {verse['arabicText']}\n"
-                if language == 'ur' and verse.get('urduTranslation'):
-                    context += f"  {verse['urduTranslation']}\n"
-                context += "\n"
+            context += "Quranic verses commonly used as duas:\n" + "".join(
+                self.fragments.render("dua_verse", verse_key(verse), language,
+                                      partial(self._render_verse, verse, language))
+                for verse in dua_content['verses']
+            )
         
-        return context
\ No newline at end of file
+        return context
+    
+    @staticmethod
+    def _render_dua(dua) -> str:
+        return f"From Surah {dua.get('surah', 'Unknown')}, Verse {dua.get('aya_number', 'Unknown')}:\n" \
+               f"   {dua.get('aya', '')}\n\n"
+    
+    @staticmethod
+    def _render_verse(verse, language: str) -> str:
+        fragment = f"- Surah {verse['name_en']}, Verse {verse['ayatNumber']}: {verse['arabicText']}\n"
+        if language == 'ur' and verse.get('urduTranslation'):
+            fragment += f"  {verse['urduTranslation']}\n"
+        return fragment + "\n"
\ No newline at end of file
@@ -1,24 +1,50 @@
 from agents.base_worker import BaseWorker
+from utils.query_pipeline import QueryInput
+from utils.names_index import AllahNamesIndex
+from utils.fragment_cache import verse_key, name_key
+from functools import partial
 from typing import Dict, Any
 
 class GuidanceWorker(BaseWorker):
     """Worker for providing spiritual guidance with enhanced English support"""
     
-    def can_handle(self, query: str, intent: str) -> bool:
-        guidance_keywords = [
-            "advice", "guidance", "help", "problem", "difficulty", "life", "issue",
-            "struggling", "confused", "worried", "anxious", "sad", "depressed",
-            "need help", "what should i do", "how to deal",
-            "مشکل", "مدد", "رہنمائی", "مسئلہ", "پریشان",  # Urdu
-            "مشكلة", "مساعدة", "إرشاد", "نصيحة", "قلق"   # Arabic
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in guidance_keywords) or intent == "guidance_request"
+    KEYWORDS = (
+        "advice", "guidance", "help", "problem", "difficulty", "life", "issue",
+        "struggling", "confused", "worried", "anxious", "sad", "depressed",
+        "need help", "what should i do", "how to deal",
+        "مشکل", "مدد", "رہنمائی", "مسئلہ", "پریشان",  # Urdu
+        "مشكلة", "مساعدة", "إرشاد", "نصيحة", "قلق"   # Arabic
+    )
     
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    GUIDANCE_TYPES = {
+        'anxiety': ['anxious', 'anxiety', 'worried', 'worry', 'stress', 'fear', 'پریشان', 'خوف', 'قلق'],
+        'sadness': ['sad', 'sadness', 'depressed', 'depression', 'grief', 'غم', 'اداس', 'حزن'],
+        'relationship': ['relationship', 'marriage', 'family', 'friend', 'spouse', 'رشتہ', 'شادی', 'خاندان'],
+        'work': ['work', 'job', 'career', 'business', 'money', 'کام', 'نوکری', 'کاروبار'],
+        'spiritual': ['spiritual', 'faith', 'prayer', 'islam', 'allah', 'روحانی', 'ایمان', 'نماز'],
+        'decision': ['decision', 'choose', 'choice', 'confused', 'فیصلہ', 'انتخاب', 'الاختيار'],
+        'health': ['health', 'sick', 'illness', 'disease', 'صحت', 'بیمار', 'مرض'],
+        'forgiveness': ['forgive', 'forgiveness', 'guilt', 'sin', 'معاف', 'گناہ', 'توبہ']
+    }
+    
+    @property
+    def names_index(self) -> AllahNamesIndex:
+        return AllahNamesIndex.get_instance(self.db_queries)
+    
+    @classmethod
+    def keyword_groups(cls):
+        return [cls.KEYWORDS, *cls.GUIDANCE_TYPES.values()]
+    
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
+        return self.prepare(query).has_any(self.KEYWORDS) or intent == "guidance_request"
+    
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            prepared = self.prepare(query)
+            query = prepared.sanitized
+            
             # Identify the type of guidance needed
-            guidance_type = self._identify_guidance_type(query)
+            guidance_type = self._identify_guidance_type(prepared)
             
             # Search for relevant content
             guidance_content = await self._get_guidance_content(query, guidance_type, language)
@@ -31,7 +57,8 @@ class GuidanceWorker(BaseWorker):
             
             # Generate guidance response
             response = await self.llm_client.generate_response(
-                query, context_text, language, "guidance_request"
+                query, context_text, language, "guidance_request",
+                conversation=context.get('conversation', "")
             )
             
             return self.format_response(
@@ -49,23 +76,12 @@ class GuidanceWorker(BaseWorker):
                 has_database_results=False
             )
     
-    def _identify_guidance_type(self, query: str) -> str:
+    def _identify_guidance_type(self, query: QueryInput) -> str:
         """Identify the type of guidance needed"""
-        query_lower = query.lower()
-        
-        guidance_types = {
-            'anxiety': ['anxious', 'anxiety', 'worried', 'worry', 'stress', 'fear', 'پریشان', 'خوف', 'قلق'],
-            'sadness': ['sad', 'sadness', 'depressed', 'depression', 'grief', 'غم', 'اداس', 'حزن'],
-            'relationship': ['relationship', 'marriage', 'family', 'friend', 'spouse', 'رشتہ', 'شادی', 'خاندان'],
-            'work': ['work', 'job', 'career', 'business', 'money', 'کام', 'نوکری', 'کاروبار'],
-            'spiritual': ['spiritual', 'faith', 'prayer', 'islam', 'allah', 'روحانی', 'ایمان', 'نماز'],
-            'decision': ['decision', 'choose', 'choice', 'confused', 'فیصلہ', 'انتخاب', 'الاختيار'],
-            'health': ['health', 'sick', 'illness', 'disease', 'صحت', 'بیمار', 'مرض'],
-            'forgiveness': ['forgive', 'forgiveness', 'guilt', 'sin', 'معاف', 'گناہ', 'توبہ']
-        }
+        prepared = self.prepare(query)
         
-        for gtype, keywords in guidance_types.items():
-            if any(keyword in query_lower for keyword in keywords):
+        for gtype, keywords in self.GUIDANCE_TYPES.items():
+            if prepared.has_any(keywords):
                 return gtype
         
         return 'general'
@@ -87,11 +103,16 @@ class GuidanceWorker(BaseWorker):
             
             search_terms = search_terms_map.get(guidance_type, search_terms_map['general'])
             
-            # Search for relevant verses
+            # Verse searches are independent, fetch them together
+            sources_to_fetch = {
+                f"verses:{term}": partial(self.db_queries.search_verses, term, language)
+                for term in search_terms
+            }
+            fetched = await self.gather_sources(sources_to_fetch)
+            
             all_verses = []
             for term in search_terms:
-                verses = self.db_queries.search_verses(term, language)
-                all_verses.extend(verses)
+                all_verses.extend(fetched[f"verses:{term}"] or [])
             
             # Remove duplicates and limit results
             unique_verses = {v['ayatId']: v for v in all_verses}.values()
@@ -109,15 +130,13 @@ class GuidanceWorker(BaseWorker):
                     for verse in relevant_verses
                 ])
             
-            # Also get some Allah's names for comfort
-            relevant_names = self._get_relevant_allah_names(guidance_type)
-            names_from_db = self.db_queries.get_allah_names()
-            
-            matching_names = [
-                name for name in names_from_db 
-                if any(rel_name.lower() in name['english'].lower() 
-                      for rel_name in relevant_names)
-            ][:2]
+            # Also get some Allah's names for comfort from the in-memory index
+            matching_names = []
+            for rel_name in self._get_relevant_allah_names(guidance_type):
+                for name in self.names_index.by_attribute(rel_name):
+                    if name not in matching_names:
+                        matching_names.append(name)
+            matching_names = matching_names[:2]
             
             if matching_names:
                 has_database_content = True
@@ -173,25 +192,34 @@ class GuidanceWorker(BaseWorker):
         lang_context = context_map.get(language, context_map['en'])
         return lang_context.get(guidance_type, lang_context['general'])
     
-    def _format_guidance_context(self, guidance_content: Dict, language: str) -> str:
-        """Format guidance content for LLM context"""
     def _format_guidance_context(self, guidance_content: Dict, language: str) -> str:
         """Format guidance content for LLM context"""
         context = f"Islamic guidance for {guidance_content['guidance_type']} concerns:\n\n"
         
         # Add verses if found
         if 'verses' in guidance_content and guidance_content['verses']:
-            context += "Relevant Quranic verses:\n"
-            for verse in guidance_content['verses']:
-                context += f"- Surah {verse['name_en']}, Verse {verse['ayatNumber']}: {verse['arabicText']}\n"
-                if language == 'ur' and verse.get('urduTranslation'):
-                    context += f"  Translation: {verse['urduTranslation']}\n"
-                context += "\n"
+            context += "Relevant Quranic verses:\n" + "".join(
+                self.fragments.render("guidance_verse", verse_key(verse), language,
+                                      partial(self._render_verse, verse, language))
+                for verse in guidance_content['verses']
+            )
         
         # Add Allah's names if found
         if 'names' in guidance_content and guidance_content['names']:
-            context += "Relevant names of Allah for comfort:\n"
-            for name in guidance_content['names']:
-                context += f"- {name['arabic']} ({name['english']}): {name['englishMeaning']}\n"
+            context += "Relevant names of Allah for comfort:\n" + "".join(
+                self.fragments.render("guidance_name", name_key(name), "", partial(self._render_name, name))
+                for name in guidance_content['names']
+            )
         
         return context
+    
+    @staticmethod
+    def _render_verse(verse, language: str) -> str:
+        fragment = f"- Surah {verse['name_en']}, Verse {verse['ayatNumber']}: {verse['arabicText']}\n"
+        if language == 'ur' and verse.get('urduTranslation'):
+            fragment += f"  Translation: {verse['urduTranslation']}\n"
+        return fragment + "\n"
+    
+    @staticmethod
+    def _render_name(name) -> str:
+        return f"- {name['arabic']} ({name['english']}): {name['englishMeaning']}\n"
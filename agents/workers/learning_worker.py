@@ -1,23 +1,107 @@
+import re
 from agents.base_worker import BaseWorker
-from typing import Dict, Any
+from utils.query_pipeline import QueryInput
+from database.concordance import Concordance
+from database.search_index import tokenize_text
+from utils.lexicon import LEXICON
+from utils.names_index import AllahNamesIndex
+from utils.reference_parser import ReferenceParser
+from utils.surah_resolver import SurahResolver
+from utils.text_normalizer import normalize_arabic
+from functools import partial
+from typing import Dict, Any, Optional
 
 class LearningWorker(BaseWorker):
     """Worker for educational content about Quran and Islamic teachings"""
     
-    def can_handle(self, query: str, intent: str) -> bool:
-        learning_keywords = [
-            "learn", "teach", "explain", "what is", "how to", "meaning", "definition",
-            "tell me about", "education", "study", "understand", "knowledge",
-            "سیکھنا", "پڑھانا", "سمجھانا", "کیا ہے", "معنی",  # Urdu
-            "تعلم", "علم", "شرح", "ما هو", "معنى"  # Arabic
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in learning_keywords) or intent == "learning_request"
-    
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    KEYWORDS = (
+        "learn", "teach", "explain", "what is", "how to", "meaning", "definition",
+        "tell me about", "education", "study", "understand", "knowledge",
+        "سیکھنا", "پڑھانا", "سمجھانا", "کیا ہے", "معنی",  # Urdu
+        "تعلم", "علم", "شرح", "ما هو", "معنى"  # Arabic
+    )
+    
+    # Map common learning topics
+    LEARNING_TOPICS = {
+        'prayer': ['prayer', 'salah', 'namaz', 'نماز', 'صلاة'],
+        'hajj': ['hajj', 'pilgrimage', 'حج'],
+        'fasting': ['fast', 'fasting', 'ramadan', 'روزہ', 'صوم'],
+        'zakat': ['zakat', 'charity', 'زکات'],
+        'quran': ['quran', 'quranic', 'قرآن'],
+        'prophet': ['prophet', 'muhammad', 'نبی', 'رسول', 'النبي'],
+        'islamic_law': ['law', 'sharia', 'halal', 'haram', 'حلال', 'حرام', 'شریعہ'],
+        'faith': ['faith', 'belief', 'iman', 'ایمان', 'إيمان'],
+        'history': ['history', 'islamic history', 'تاریخ', 'تاريخ']
+    }
+    
+    # Quran divisions as users write them
+    DIVISION_WORDS = {
+        'juz': r"juz'?|juzz|para|parah|sipara|جزء|الجزء|پارہ|پارے|پارا|سپارہ|سپارے",
+        'hizb': r"hizb|حزب|الحزب",
+        'ruku': r"ruku'?|rukuh|رکوع|ركوع|الركوع",
+        'page': r"page|صفحہ|صفحة|الصفحة",
+    }
+    DIVISION_PATTERN = re.compile(
+        r"(?<!\w)(?P<word>" + "|".join(DIVISION_WORDS.values()) + r")(?!\w)"
+        r"(?:\s*(?:number|no\.?|#|نمبر|رقم)?\s*(?P<number>\d{1,3})(?![\d:]))?",
+        re.IGNORECASE
+    )
+    
+    # Counting and listing questions answered from the concordance
+    COUNT_PATTERN = re.compile(
+        r"how many times|how often|number of times|frequency of|occurrences? of|"
+        r"which verses|what verses|list (?:the |all )?verses|verses (?:that )?(?:mention|contain)|"
+        r"كم مر[ةه]|عدد مرات|الآيات التي|"
+        r"کتنی (?:بار|مرتبہ|دفعہ)|کتنے (?:بار|مرتبہ)|کون سی آیات|کن آیات",
+        re.IGNORECASE
+    )
+    LIST_PATTERN = re.compile(
+        r"which verses|what verses|list|verses (?:that )?(?:mention|contain)|الآيات التي|کون سی آیات|کن آیات",
+        re.IGNORECASE
+    )
+    # Question words never taken as the counted word
+    COUNT_STOP_WORDS = frozenset(normalize_arabic(word) for word in (
+        "كم", "مرة", "مرات", "عدد", "ذكر", "ذكرت", "ورد", "وردت", "كلمة", "لفظ", "في", "من", "هل", "ما", "أي",
+        "القرآن", "قرآن", "الآيات", "آية", "التي", "الذي",
+        "قرآن", "میں", "کتنی", "کتنے", "بار", "مرتبہ", "دفعہ", "آیا", "آئی", "لفظ", "کون", "سی", "آیات", "کا", "کی", "ہے"
+    ))
+    MAX_LISTED_VERSES = 20
+    # Verse references kept in the structured concordance payload of a count answer
+    MAX_RESPONSE_VERSES = 5
+    
+    def __init__(self):
+        super().__init__()
+        self.reference_parser = ReferenceParser(lambda name: self.surah_resolver.resolve_id(name))
+    
+    @property
+    def names_index(self) -> AllahNamesIndex:
+        return AllahNamesIndex.get_instance(self.db_queries)
+    
+    @property
+    def concordance(self) -> Concordance:
+        return Concordance.get_instance(self.db_queries)
+    
+    @property
+    def surah_resolver(self) -> SurahResolver:
+        return SurahResolver.get_instance(self.db_queries)
+    
+    @classmethod
+    def keyword_groups(cls):
+        return [cls.KEYWORDS, *cls.LEARNING_TOPICS.values()]
+    
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
+        prepared = self.prepare(query)
+        return prepared.has_any(self.KEYWORDS) or intent == "learning_request" \
+            or self.DIVISION_PATTERN.search(prepared.sanitized) is not None \
+            or self.is_count_question(prepared)
+    
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         try:
+            prepared = self.prepare(query)
+            query = prepared.sanitized
+            
             # Determine what the user wants to learn about
-            learning_topic = self._identify_learning_topic(query)
+            learning_topic = self._identify_learning_topic(prepared)
             
             # Get relevant educational content from database
             educational_content = await self._get_educational_content(learning_topic, language)
@@ -28,8 +112,20 @@ class LearningWorker(BaseWorker):
             else:
                 context_text = self._format_educational_context(educational_content, language)
             
+            # Juz/verse positions are exact, so give them to the LLM as facts
+            position = self._answer_position(query, language)
+            if position:
+                context_text = f"Quran position facts:\n{position[0]}\n\n{context_text}"
+            
+            # Word counts and the verses they come from are exact too
+            counts = self._answer_count(query, language)
+            if counts:
+                context_text = f"Quran word counts (exact, from the text):\n{counts[0]}\n\n{context_text}"
+            
             # Generate educational response
-            response = await self.llm_client.generate_response(query, context_text, language)
+            response = await self.llm_client.generate_response(
+                query, context_text, language, conversation=context.get('conversation', "")
+            )
             
             return self.format_response(
                 content=response,
@@ -41,25 +137,197 @@ class LearningWorker(BaseWorker):
             self.logger.error(f"Error in LearningWorker: {e}")
             return self.format_response("Error processing learning request", language=language)
     
-    def _identify_learning_topic(self, query: str) -> str:
-        """Identify what the user wants to learn about"""
-        query_lower = query.lower()
+    async def answer_position(self, query: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        LLM-free answer to questions such as "which juz is 18:10 in", "juz 30" or
+        "which para is Surah Al-Kahf in". Returns None for any other query.
+        """
+        answer = self._answer_position(query, language)
+        if not answer:
+            return None
+        
+        content, position = answer
+        response = self.format_response(content=content, language=language)
+        response["position"] = position
+        return response
+    
+    def is_count_question(self, query: QueryInput) -> bool:
+        return self.COUNT_PATTERN.search(self.prepare(query).sanitized) is not None
+    
+    async def answer_count(self, query: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        LLM-free answer to "how many times is X mentioned" and "which verses mention X"
+        questions, from the concordance. Returns None for any other query or unknown words.
+        """
+        answer = self._answer_count(query, language)
+        if not answer:
+            return None
         
-        # Map common learning topics
-        topic_keywords = {
-            'prayer': ['prayer', 'salah', 'namaz', 'نماز', 'صلاة'],
-            'hajj': ['hajj', 'pilgrimage', 'حج'],
-            'fasting': ['fast', 'fasting', 'ramadan', 'روزہ', 'صوم'],
-            'zakat': ['zakat', 'charity', 'زکات'],
-            'quran': ['quran', 'quranic', 'قرآن'],
-            'prophet': ['prophet', 'muhammad', 'نبی', 'رسول', 'النبي'],
-            'islamic_law': ['law', 'sharia', 'halal', 'haram', 'حلال', 'حرام', 'شریعہ'],
-            'faith': ['faith', 'belief', 'iman', 'ایمان', 'إيمان'],
-            'history': ['history', 'islamic history', 'تاریخ', 'تاريخ']
+        content, counts = answer
+        response = self.format_response(content=content, language=language)
+        # The answer text already lists the verses; the payload keeps the counts and a sample
+        response["concordance"] = {
+            **counts,
+            "verses": counts["verses"][:self.MAX_RESPONSE_VERSES],
+            "root_verses": counts["root_verses"][:self.MAX_RESPONSE_VERSES],
         }
+        return response
+    
+    def _answer_count(self, query: str, language: str) -> Optional[tuple]:
+        """(answer text, concordance entry) for a counting or listing question"""
+        if not self.is_count_question(query):
+            return None
+        target = self._count_target(query)
+        if not target:
+            return None
+        label, counts = target
+        return self._format_count(label, counts, bool(self.LIST_PATTERN.search(query)), language), counts
+    
+    def _count_target(self, query: str) -> Optional[tuple]:
+        """(label, concordance entry) of the word a question counts: the first known Arabic word, else an English concept"""
+        for word in tokenize_text(query):
+            if word in self.COUNT_STOP_WORDS:
+                continue
+            counts = self.concordance.lookup(word)
+            if counts:
+                return word, counts
+        for concept, term in zip(LEXICON.concepts(query), LEXICON.primary_terms(query)):
+            counts = self.concordance.lookup(term)
+            if counts:
+                return f"{concept} ({term})", counts
+        return None
+    
+    def _format_count(self, label: str, counts: Dict, listing: bool, language: str) -> str:
+        templates = {
+            'en': ("The word {word} occurs {occurrences} times in {verse_count} verses of the Quran.",
+                   " Counting related forms (approximate root {root}), it occurs {root_occurrences} times in {root_verse_count} verses.",
+                   "The word {word} is not found in the Quran in this exact form. Its related forms (approximate root {root}) "
+                   "occur {root_occurrences} times in {root_verse_count} verses.",
+                   "Verses", "and {more} more"),
+            'ur': ("لفظ {word} قرآن میں {occurrences} مرتبہ، {verse_count} آیات میں آیا ہے۔",
+                   " اس کے مادے ({root}) کی تمام صورتوں سمیت یہ {root_occurrences} مرتبہ، {root_verse_count} آیات میں آیا ہے۔",
+                   "لفظ {word} اس صورت میں قرآن میں نہیں آیا۔ اس کے مادے ({root}) کی صورتیں {root_occurrences} مرتبہ، "
+                   "{root_verse_count} آیات میں آئی ہیں۔",
+                   "آیات", "اور مزید {more}"),
+            'ar': ("وردت كلمة {word} في القرآن {occurrences} مرة في {verse_count} آية.",
+                   " وبجميع صيغ الجذر ({root}) وردت {root_occurrences} مرة في {root_verse_count} آية.",
+                   "لم ترد كلمة {word} بهذه الصيغة في القرآن، ووردت صيغ الجذر ({root}) {root_occurrences} مرة في {root_verse_count} آية.",
+                   "الآيات", "و{more} أخرى")
+        }
+        sentence, root_sentence, root_only_sentence, verses_label, more_label = templates.get(language, templates['en'])
+        if not counts["occurrences"]:
+            # Only other forms of the root occur: lead with the root count, not "0 times"
+            content = root_only_sentence.format(**{**counts, "word": label})
+        else:
+            content = sentence.format(**{**counts, "word": label})
+            if counts["root_occurrences"] != counts["occurrences"]:
+                content += root_sentence.format(**counts)
+        
+        verses = counts["verses"] or counts["root_verses"]
+        if listing or len(verses) <= self.MAX_LISTED_VERSES:
+            shown = ", ".join(f"{surah_id}:{ayat_number}" for surah_id, ayat_number in verses[:self.MAX_LISTED_VERSES])
+            if len(verses) > self.MAX_LISTED_VERSES:
+                shown += f" {more_label.format(more=len(verses) - self.MAX_LISTED_VERSES)}"
+            content += f"\n\n{verses_label}: {shown}"
+        return content
+    
+    def _answer_position(self, query: str, language: str) -> Optional[tuple]:
+        """(answer text, position data) for a positional question, from the in-memory positional index"""
+        query = ReferenceParser.normalize_digits(query)
+        match = self.DIVISION_PATTERN.search(query)
+        if not match:
+            return None
+        division = self._division_name(match.group('word'))
+        
+        reference = self.reference_parser.parse(query)
+        if reference and not reference.whole_surah:
+            position = self.db_queries.get_verse_position(reference.surah_id, reference.start)
+            if position and position.get(division):
+                return self._format_verse_position(position, division, language), position
+        elif reference:
+            span = self.db_queries.get_surah_span(reference.surah_id)
+            if span and span["first"].get(division):
+                return self._format_surah_position(reference.surah_id, span, division, language), span
+        elif match.group('number'):
+            number = int(match.group('number'))
+            span = self.db_queries.get_division_span(division, number)
+            if span:
+                return self._format_division_span(division, number, span, language), span
+        return None
+    
+    def _division_name(self, word: str) -> str:
+        for division, pattern in self.DIVISION_WORDS.items():
+            if re.fullmatch(pattern, word, re.IGNORECASE):
+                return division
+        return 'juz'
+    
+    def _division_label(self, division: str, language: str) -> str:
+        labels = {
+            'en': {'juz': "Juz", 'hizb': "Hizb", 'ruku': "Ruku", 'page': "Page"},
+            'ur': {'juz': "پارہ", 'hizb': "حزب", 'ruku': "رکوع", 'page': "صفحہ"},
+            'ar': {'juz': "الجزء", 'hizb': "الحزب", 'ruku': "الركوع", 'page': "الصفحة"}
+        }
+        return labels.get(language, labels['en'])[division]
+    
+    def _surah_label(self, surah_id: int, language: str) -> str:
+        surah = self.surah_resolver.surahs.get(surah_id)
+        if not surah:
+            return str(surah_id)
+        return surah['name_en'] if language == 'en' else surah['name_ar']
+    
+    def _format_verse_position(self, position: Dict, division: str, language: str) -> str:
+        templates = {
+            'en': "Verse {ref} (Surah {surah}) is in {divisions}. It is verse {index} of {total} in the Quran.",
+            'ur': "آیت {ref} (سورہ {surah}) {divisions} میں ہے۔ یہ قرآن کی {total} آیات میں سے {index} ویں آیت ہے۔",
+            'ar': "الآية {ref} (سورة {surah}) في {divisions}. وهي الآية رقم {index} من {total} في القرآن."
+        }
+        # The asked-for division first, then any other known divisions
+        names = [division] + [name for name in self.DIVISION_WORDS if name != division and position.get(name)]
+        divisions = "، ".join if language != 'en' else ", ".join
+        return templates.get(language, templates['en']).format(
+            ref=f"{position['surah']}:{position['ayah']}",
+            surah=self._surah_label(position['surah'], language),
+            divisions=divisions(f"{self._division_label(name, language)} {position[name]}" for name in names),
+            index=position['index'],
+            total=self.db_queries.positions.total
+        )
+    
+    def _format_surah_position(self, surah_id: int, span: Dict, division: str, language: str) -> str:
+        templates = {
+            'en': ("Surah {surah} ({id}) is entirely in {label} {first}.",
+                   "Surah {surah} ({id}) runs from {label} {first} to {label} {last}."),
+            'ur': ("سورہ {surah} ({id}) مکمل طور پر {label} {first} میں ہے۔",
+                   "سورہ {surah} ({id}) {label} {first} سے {label} {last} تک ہے۔"),
+            'ar': ("سورة {surah} ({id}) تقع كاملة في {label} {first}.",
+                   "سورة {surah} ({id}) تمتد من {label} {first} إلى {label} {last}.")
+        }
+        single, ranged = templates.get(language, templates['en'])
+        first, last = span["first"][division], span["last"][division]
+        return (single if first == last else ranged).format(
+            surah=self._surah_label(surah_id, language), id=surah_id,
+            label=self._division_label(division, language), first=first, last=last
+        )
+    
+    def _format_division_span(self, division: str, number: int, span: Dict, language: str) -> str:
+        templates = {
+            'en': "{label} {number} runs from verse {first} (Surah {first_surah}) to verse {last} (Surah {last_surah}), {count} verses.",
+            'ur': "{label} {number} آیت {first} (سورہ {first_surah}) سے آیت {last} (سورہ {last_surah}) تک ہے، کل {count} آیات۔",
+            'ar': "{label} {number} يبدأ من الآية {first} (سورة {first_surah}) إلى الآية {last} (سورة {last_surah})، وعدد آياته {count}."
+        }
+        (first_surah, first_ayah), (last_surah, last_ayah) = span["first"], span["last"]
+        return templates.get(language, templates['en']).format(
+            label=self._division_label(division, language), number=number,
+            first=f"{first_surah}:{first_ayah}", first_surah=self._surah_label(first_surah, language),
+            last=f"{last_surah}:{last_ayah}", last_surah=self._surah_label(last_surah, language),
+            count=span["verses"]
+        )
+    
+    def _identify_learning_topic(self, query: QueryInput) -> str:
+        """Identify what the user wants to learn about"""
+        prepared = self.prepare(query)
         
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
+        for topic, keywords in self.LEARNING_TOPICS.items():
+            if prepared.has_any(keywords):
                 return topic
         
         return 'general'
@@ -70,39 +338,45 @@ class LearningWorker(BaseWorker):
         database_sources = False
         
         try:
+            # Declare the data sources for this topic and fetch them together
+            sources_to_fetch = {}
             if topic == 'prayer':
                 # Get prayer-related duas
-                duas = self.db_queries.search_duas('prayer')
-                if duas:
-                    database_sources = True
-                    sources.extend([{
-                        "type": "dua",
-                        "surah": dua['surah'],
-                        "verse": dua['aya_number']
-                    } for dua in duas[:3]])
-            
+                sources_to_fetch["duas"] = partial(self.db_queries.search_duas, 'prayer')
             elif topic in ['quran', 'general']:
                 # Get some verses for general learning
-                sample_verses = self.db_queries.get_sample_verses(3)  # Will implement this
-                if sample_verses:
-                    database_sources = True
-                    sources.extend([{
-                        "type": "verse",
-                        "surah": verse['name_en'],
-                        "verse_number": verse['ayatNumber'],
-                        "surah_id": verse['surahId']
-                    } for verse in sample_verses])
+                sources_to_fetch["verses"] = partial(self.db_queries.get_sample_verses, 3)
+            
+            fetched = await self.gather_sources(sources_to_fetch)
+            
+            duas = fetched.get("duas") or []
+            if duas:
+                database_sources = True
+                sources.extend([{
+                    "type": "dua",
+                    "surah": dua['surah'],
+                    "verse": dua['aya_number']
+                } for dua in duas[:3]])
+            
+            sample_verses = fetched.get("verses") or []
+            if sample_verses:
+                database_sources = True
+                sources.extend([{
+                    "type": "verse",
+                    "surah": verse['name_en'],
+                    "verse_number": verse['ayatNumber'],
+                    "surah_id": verse['surahId']
+                } for verse in sample_verses])
             
-            elif topic == 'faith':
-                # Get Allah's names for faith-related learning
-                names = self.db_queries.get_allah_names()[:5]
-                if names:
-                    database_sources = True
-                    sources.extend([{
-                        "type": "allah_name",
-                        "arabic": name['arabic'],
-                        "english": name['english']
-                    } for name in names])
+            # Allah's names for faith-related learning come from the in-memory index
+            names = self.names_index.all(5) if topic == 'faith' else []
+            if names:
+                database_sources = True
+                sources.extend([{
+                    "type": "allah_name",
+                    "arabic": name['arabic'],
+                    "english": name['english']
+                } for name in names])
             
         except Exception as e:
             self.logger.error(f"Error getting educational content: {e}")
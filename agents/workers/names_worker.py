@@ -1,31 +1,41 @@
 from agents.base_worker import BaseWorker
+from utils.query_pipeline import QueryInput
+from utils.names_index import AllahNamesIndex
+from utils.fragment_cache import name_key
+from config.settings import Settings
+from functools import partial
 from typing import Dict, Any
 
 class NamesWorker(BaseWorker):
     """Worker for Allah's names (Asma ul Husna)"""
     
-    def can_handle(self, query: str, intent: str) -> bool:
-        names_keywords = [
-            "allah", "names", "asma", "husna", "attributes",
-            "اللہ", "نام", "اسماء", "حسنیٰ",  # Urdu
-            "الله", "أسماء", "الحسنى"    # Arabic
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in names_keywords) or intent == "names_request"
+    KEYWORDS = (
+        "allah", "names", "asma", "husna", "attributes",
+        "اللہ", "نام", "اسماء", "حسنیٰ",  # Urdu
+        "الله", "أسماء", "الحسنى"    # Arabic
+    )
     
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def names_index(self) -> AllahNamesIndex:
+        return AllahNamesIndex.get_instance(self.db_queries)
+    
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
+        return self.prepare(query).has_any(self.KEYWORDS) or intent == "names_request"
+    
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            # Extract search term if any
-            search_term = self._extract_name_search_term(query)
+            query = self.prepare(query).sanitized
             
-            # Get Allah's names
-            names = self.db_queries.get_allah_names(search_term)
+            # Get Allah's names from the in-memory index
+            names = self._find_names(query)
             
             # Format context for LLM
             context_text = self._format_names_context(names, language)
             
             # Generate response
-            response = await self.llm_client.generate_response(query, context_text, language)
+            response = await self.llm_client.generate_response(
+                query, context_text, language, conversation=context.get('conversation', "")
+            )
             
             return self.format_response(
                 content=response,
@@ -37,27 +47,30 @@ class NamesWorker(BaseWorker):
             self.logger.error(f"Error in NamesWorker: {e}")
             return self.format_response("Error processing names request", language=language)
     
-    def _extract_name_search_term(self, query: str) -> str:
-        """Extract specific name being searched"""
-        # Simple extraction - enhance as needed
-        words = query.split()
-        for word in words:
-            if len(word) > 3 and word.lower() not in ['allah', 'name', 'names', 'asma']:
-                return word
-        return None
+    def _find_names(self, query: str) -> list:
+        """Find the names a query asks about, or list them when it names none"""
+        return self.names_index.search(query) or self.names_index.all(20)
+    
+    def prerender_fragments(self):
+        for language in Settings.SUPPORTED_LANGUAGES:
+            self._format_names_context(self.names_index.all(), language)
     
     def _format_names_context(self, names: list, language: str) -> str:
         """Format names for LLM context"""
-        context = "Allah's Beautiful Names (Asma ul Husna):\n\n"
-        for name in names:
-            context += f"Arabic: {name['arabic']}\n"
-            context += f"English: {name['english']}\n"
-            if language == 'ur':
-                context += f"Urdu Meaning: {name['urduMeaning']}\n"
-            else:
-                context += f"English Meaning: {name['englishMeaning']}\n"
-            context += f"Explanation: {name['englishExplanation']}\n\n"
-        return context
+        return "Allah's Beautiful Names (Asma ul Husna):\n\n" + "".join(
+            self.fragments.render("name_context", name_key(name), language, partial(self._render_name, name, language))
+            for name in names
+        )
+    
+    @staticmethod
+    def _render_name(name, language: str) -> str:
+        fragment = f"Arabic: {name['arabic']}\n"
+        fragment += f"English: {name['english']}\n"
+        if language == 'ur':
+            fragment += f"Urdu Meaning: {name['urduMeaning']}\n"
+        else:
+            fragment += f"English Meaning: {name['englishMeaning']}\n"
+        return fragment + f"Explanation: {name['englishExplanation']}\n\n"
     
     def _format_names_sources(self, names: list) -> list:
         """Format names sources"""
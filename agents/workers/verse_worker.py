@@ -1,22 +1,70 @@
+import re
 from agents.base_worker import BaseWorker
-from typing import Dict, Any
+from utils.query_pipeline import QueryInput
+from config.settings import Settings
+from database.related_verses import RelatedVerses
+from utils.reference_parser import ReferenceParser, VerseReference
+from utils.surah_resolver import SurahResolver
+from utils.fragment_cache import verse_key
+from functools import partial
+from typing import Dict, Any, Optional
 
 class VerseWorker(BaseWorker):
     """Worker for handling Quranic verse searches with English support"""
     
-    def can_handle(self, query: str, intent: str) -> bool:
-        verse_keywords = [
-            "verse", "ayah", "surah", "chapter", "quran", "quranic",
-            "آیت", "سورہ", "قرآن",  # Urdu
-            "آية", "سورة", "قرآن"   # Arabic
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in verse_keywords) or intent == "verse_search"
+    # Upper bound on verses returned for one explicit reference
+    MAX_REFERENCE_VERSES = 10
+    
+    KEYWORDS = (
+        "verse", "ayah", "surah", "chapter", "quran", "quranic",
+        "آیت", "سورہ", "قرآن",  # Urdu
+        "آية", "سورة"   # Arabic
+    )
+    
+    JUZ_PATTERN = re.compile(r"(?:juz'?|para|parah|sipara|جزء|الجزء|پارہ|پارا)\s*(?P<juz>\d{1,2})(?!\d)", re.IGNORECASE)
+    
+    # "verses related to 2:153", answered from the precomputed neighbour table
+    RELATED_PATTERN = re.compile(
+        r"(?:related|similar)\s+(?:verses|ayahs?|ayat)|verses\s+(?:like|similar to|related to)|"
+        r"آيات مشابهة|آيات متشابهة|الآيات المتعلقة|ملتی جلتی آیات|متعلقہ آیات",
+        re.IGNORECASE
+    )
+    RELATED_LIMIT = 5
+    
+    def __init__(self):
+        super().__init__()
+        self.reference_parser = ReferenceParser(lambda name: self.surah_resolver.resolve_id(name))
+    
+    @property
+    def surah_resolver(self) -> SurahResolver:
+        return SurahResolver.get_instance(self.db_queries)
+    
+    @property
+    def related_verses(self) -> RelatedVerses:
+        return RelatedVerses.get_instance(self.db_queries)
     
-    async def process_request(self, query: str, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    def can_handle(self, query: QueryInput, intent: str) -> bool:
+        prepared = self.prepare(query)
+        return prepared.has_any(self.KEYWORDS) or intent == "verse_search" \
+            or self.reference_parser.NUMERIC_PATTERN.search(prepared.normalized) is not None
+    
+    async def process_request(self, query: QueryInput, language: str, context: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            # Use enhanced search with fallback
-            verses, has_database_results = await self.search_with_fallback(query, language)
+            prepared = self.prepare(query)
+            query = prepared.sanitized
+            
+            # Explicit references are looked up exactly, everything else is searched
+            references = self.reference_parser.parse_reference_list(query)
+            if len(references) > 1:
+                verses = self.get_verses(references)
+            else:
+                reference = self.reference_parser.parse(query)
+                verses = self._get_reference_verses(reference) if reference else []
+            if verses:
+                has_database_results = True
+            else:
+                # Use enhanced search with fallback
+                verses, has_database_results = await self.search_with_fallback(prepared, language)
             
             # Format context for LLM
             if has_database_results:
@@ -26,7 +74,8 @@ class VerseWorker(BaseWorker):
             
             # Generate response using LLM with appropriate template
             response = await self.llm_client.generate_response(
-                query, context_text, language, "verse_search"
+                query, context_text, language, "verse_search",
+                conversation=context.get('conversation', "")
             )
             
             return self.format_response(
@@ -44,38 +93,274 @@ class VerseWorker(BaseWorker):
                 has_database_results=False
             )
     
+    async def answer_reference(self, query: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        LLM-free fast path for queries that only ask for referenced verses.
+        Returns None when the query is not a pure reference or nothing was found.
+        """
+        references, list_only = self.reference_parser.parse_references(query)
+        if len(references) > 1:
+            return self._answer_reference_list(references, language) if list_only else None
+        
+        reference, reference_only = self.reference_parser.parse_query(query)
+        if not reference or not reference_only:
+            return None
+        
+        verses = self._get_reference_verses(reference)
+        if not verses:
+            return None
+        
+        requested = None if reference.whole_surah else reference.end - reference.start + 1
+        truncated = len(verses) == self.MAX_REFERENCE_VERSES and (requested or 0) != len(verses)
+        
+        response = self.format_response(
+            content=self._format_reference_answer(verses, language, truncated),
+            sources=self._format_verse_sources(verses),
+            language=language
+        )
+        response["reference"] = str(reference)
+        if reference.start is not None and reference.start == reference.end:
+            response["related"] = [f"{surah}:{ayah}" for surah, ayah in
+                                   self.related_verses.related(reference.surah_id, reference.start, self.RELATED_LIMIT)]
+        if truncated and reference.whole_surah:
+            # Let the reader continue the surah in reading mode
+            last = verses[-1]
+            response["reading"] = {
+                "label": str(reference),
+                "next": self._reading_scope(str(reference), (last['surahId'], last['ayatNumber']),
+                                            (reference.surah_id + 1, 0))
+            }
+        return response
+    
+    async def answer_related(self, query: str, language: str) -> Optional[Dict[str, Any]]:
+        """
+        LLM-free fast path for "verses related to 2:153".
+        Returns None when the query does not ask for related verses of one verse or none are known.
+        """
+        if not self.related_verses or not self.RELATED_PATTERN.search(query):
+            return None
+        reference = self.reference_parser.parse(query)
+        if not reference or reference.whole_surah:
+            return None
+        
+        verses = self.get_related_verses(reference.surah_id, reference.start)
+        origin = self.db_queries.get_verses_by_references([(reference.surah_id, reference.start)])
+        if not verses or not origin:
+            return None
+        
+        headers = {
+            "en": "Verses related to {reference}",
+            "ur": "{reference} سے متعلقہ آیات",
+            "ar": "آيات متعلقة بـ {reference}"
+        }
+        header = headers.get(language, headers["en"]).format(reference=f"{reference.surah_id}:{reference.start}")
+        # The verse asked about comes first, so every reference in the answer is among the sources
+        response = self.format_response(
+            content=self._format_reference_answer(origin, language) + f"\n### {header}\n\n"
+                    + self._format_reference_answer(verses, language),
+            sources=self._format_verse_sources(origin + verses, limit=len(verses) + 1),
+            language=language
+        )
+        response["reference"] = f"{reference.surah_id}:{reference.start}"
+        response["related"] = [f"{verse['surahId']}:{verse['ayatNumber']}" for verse in verses]
+        return response
+    
+    def get_related_verses(self, surah_id: int, ayat_number: int, limit: int = None) -> list:
+        """Verses most related to one verse, most similar first, from the precomputed table"""
+        neighbors = self.related_verses.related(surah_id, ayat_number, limit or self.RELATED_LIMIT)
+        return self.db_queries.get_verses_by_references(neighbors) if neighbors else []
+    
+    def reading_scope(self, target: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a reading target such as "juz 30", "Surah Yasin", "36" or "2:100-150"
+        to keyset bounds. Returns None when the target names nothing readable.
+        """
+        target = ReferenceParser.normalize_digits(target.strip())
+        
+        juz_match = self.JUZ_PATTERN.search(target)
+        if juz_match:
+            juz_number = int(juz_match.group('juz'))
+            bounds = self.db_queries.get_juz_range(juz_number)
+            return self._reading_scope(f"Juz {juz_number}", *bounds) if bounds else None
+        
+        reference = self.reference_parser.parse(target)
+        if not reference:
+            surah_id = int(target) if target.isdigit() else self.surah_resolver.resolve_id(target)
+            if not surah_id or surah_id > ReferenceParser.MAX_SURAH:
+                return None
+            reference = VerseReference(surah_id)
+        
+        if reference.whole_surah:
+            return self._reading_scope(str(reference), (reference.surah_id, 0), (reference.surah_id + 1, 0))
+        return self._reading_scope(str(reference), (reference.surah_id, reference.start - 1),
+                                   (reference.surah_id, reference.end + 1))
+    
+    def read_page(self, scope: Dict[str, Any], language: str = "en", page_size: int = None) -> Dict[str, Any]:
+        """
+        One page of a reading scope, straight from the database without the LLM.
+        response["reading"]["next"] is the scope of the following page, or None at the end;
+        only one page of verses is ever held, whatever the size of the range.
+        """
+        page_size = page_size or Settings.READING_PAGE_SIZE
+        # One extra row tells whether another page follows
+        verses = self.db_queries.get_verse_page(tuple(scope["after"]), scope["before"] and tuple(scope["before"]),
+                                                page_size + 1)
+        has_more = len(verses) > page_size
+        verses = verses[:page_size]
+        
+        if not verses:
+            response = self.format_response(
+                content=self._get_reading_end_message(language),
+                language=language
+            )
+            response["reading"] = {"label": scope["label"], "next": None}
+            return response
+        
+        last = verses[-1]
+        response = self.format_response(
+            content=self._format_reading_page(scope["label"], verses, language),
+            sources=self._format_verse_sources(verses),
+            language=language
+        )
+        response["reading"] = {
+            "label": scope["label"],
+            "next": self._reading_scope(scope["label"], (last['surahId'], last['ayatNumber']), scope["before"])
+            if has_more else None
+        }
+        return response
+    
+    def _reading_scope(self, label: str, after, before) -> Dict[str, Any]:
+        return {"label": label, "after": list(after), "before": list(before) if before else None}
+    
+    def _format_reading_page(self, label: str, verses: list, language: str) -> str:
+        """Page header followed by the verses in the same layout as reference answers"""
+        headers = {
+            "en": "📖 Reading {label}: {first} to {last}",
+            "ur": "📖 {label} کی تلاوت: {first} سے {last} تک",
+            "ar": "📖 قراءة {label}: من {first} إلى {last}"
+        }
+        first, last = verses[0], verses[-1]
+        header = headers.get(language, headers["en"]).format(
+            label=label,
+            first=f"{first['surahId']}:{first['ayatNumber']}",
+            last=f"{last['surahId']}:{last['ayatNumber']}"
+        )
+        return f"### {header}\n\n" + self._format_reference_answer(verses, language)
+    
+    def _get_reading_end_message(self, language: str) -> str:
+        messages = {
+            "en": "No more verses in this range.",
+            "ur": "اس حصے میں مزید آیات نہیں ہیں۔",
+            "ar": "لا توجد آيات أخرى في هذا النطاق."
+        }
+        return messages.get(language, messages["en"])
+    
+    def _answer_reference_list(self, references: list, language: str) -> Optional[Dict[str, Any]]:
+        """Deterministic answer for several references such as "2:153, 2:155-157, 39:10" """
+        verses = self.get_verses(references)
+        if not verses:
+            return None
+        
+        requested = sum(reference.end - reference.start + 1 for reference in references)
+        response = self.format_response(
+            content=self._format_reference_answer(verses, language, truncated=requested > len(verses) == self.MAX_REFERENCE_VERSES),
+            sources=self._format_verse_sources(verses),
+            language=language
+        )
+        response["reference"] = ", ".join(str(reference) for reference in references)
+        return response
+    
+    def get_verses(self, references) -> list:
+        """
+        Verses for a reference list, either parsed references or text such as
+        "2:155-157, 39:10", fetched in one query and in the order given
+        """
+        if isinstance(references, str):
+            references = self.reference_parser.parse_reference_list(references)
+        return self.db_queries.get_verses_by_references(references, self.MAX_REFERENCE_VERSES) if references else []
+    
+    def _get_reference_verses(self, reference: VerseReference) -> list:
+        """Fetch the verses a reference points to"""
+        if reference.whole_surah:
+            return self.db_queries.get_surah_verses(reference.surah_id, self.MAX_REFERENCE_VERSES)
+        
+        end = min(reference.end, reference.start + self.MAX_REFERENCE_VERSES - 1)
+        return self.db_queries.get_verses_by_references([(reference.surah_id, reference.start, end)])
+    
+    def _format_reference_answer(self, verses: list, language: str, truncated: bool = False) -> str:
+        """Deterministic answer for referenced verses: Arabic text, translation and reference"""
+        labels = {
+            "en": ("Surah {name_en} ({surah}), Verse {verse}", "Translation (Urdu)",
+                   "Showing the first {count} verses."),
+            "ur": ("سورہ {name_ar} ({surah})، آیت {verse}", "اردو ترجمہ",
+                   "پہلی {count} آیات دکھائی جا رہی ہیں۔"),
+            "ar": ("سورة {name_ar} ({surah})، الآية {verse}", "الترجمة الأردية",
+                   "عرض أول {count} آيات.")
+        }
+        heading, translation_label, truncated_note = labels.get(language, labels["en"])
+        
+        answer = "\n".join(
+            self.fragments.render("verse_reference", verse_key(verse), language,
+                                  partial(self._render_reference_verse, verse, heading, translation_label))
+            for verse in verses
+        )
+        if truncated:
+            answer += "\n_" + truncated_note.format(count=self.MAX_REFERENCE_VERSES) + "_"
+        return answer
+    
+    @staticmethod
+    def _render_reference_verse(verse, heading: str, translation_label: str) -> str:
+        part = "**" + heading.format(
+            name_en=verse['name_en'], name_ar=verse['name_ar'],
+            surah=verse['surahId'], verse=verse['ayatNumber']
+        ) + "**\n\n"
+        part += f"{verse['arabicText']}\n"
+        if verse.get('urduTranslation'):
+            part += f"\n{translation_label}: {verse['urduTranslation']}\n"
+        return part
+    
     def _format_verses_context(self, verses: list, language: str) -> str:
         """Format verses for LLM context with language consideration"""
         if not verses:
             return ""
         
-        context = "Relevant Quranic verses found:\n\n"
-        for i, verse in enumerate(verses[:5], 1):  # Limit to 5 verses
-            context += f"{i}. Surah {verse['name_en']} ({verse['surahId']}), Verse {verse['ayatNumber']}:\n"
-            context += f"Arabic: {verse['arabicText']}\n"
-            
-            # Add translation based on language preference
-            if language == 'ur' and verse.get('urduTranslation'):
-                context += f"Urdu Translation: {verse['urduTranslation']}\n"
-            elif language == 'en':
-                if verse.get('urduTranslation'):
-                    context += f"Translation (via Urdu): {verse['urduTranslation']}\n"
-                context += "Note: Please provide English interpretation based on the Arabic text.\n"
-            
-            context += "\n"
+        return "Relevant Quranic verses found:\n\n" + "".join(
+            f"{i}. " + self.fragments.render("verse_context", verse_key(verse), language,
+                                             partial(self._render_verse_context, verse, language))
+            for i, verse in enumerate(verses[:5], 1)  # Limit to 5 verses
+        )
+    
+    @staticmethod
+    def _render_verse_context(verse, language: str) -> str:
+        context = f"Surah {verse['name_en']} ({verse['surahId']}), Verse {verse['ayatNumber']}:\n"
+        context += f"Arabic: {verse['arabicText']}\n"
+        
+        # Add translation based on language preference
+        if verse.get('translation'):
+            context += f"Translation: {verse['translation']}\n"
+        elif language == 'ur' and verse.get('urduTranslation'):
+            context += f"Urdu Translation: {verse['urduTranslation']}\n"
+        elif language == 'en':
+            if verse.get('urduTranslation'):
+                context += f"Translation (via Urdu): {verse['urduTranslation']}\n"
+            context += "Note: Please provide English interpretation based on the Arabic text.\n"
         
-        return context
+        return context + "\n"
     
-    def _format_verse_sources(self, verses: list) -> list:
+    def _format_verse_sources(self, verses: list, limit: int = 5) -> list:
         """Format verse sources for response"""
         return [
-            {
-                "type": "verse",
-                "surah": verse['name_en'],
-                "verse_number": verse['ayatNumber'],
-                "surah_id": verse['surahId'],
-                "arabic_text": verse.get('arabicText', ''),
-                "translation": verse.get('urduTranslation', '')
-            }
-            for verse in verses[:5]
-        ]
\ No newline at end of file
+            self.fragments.render("verse_source", verse_key(verse), "", partial(self._render_verse_source, verse))
+            for verse in verses[:limit]
+        ]
+    
+    @staticmethod
+    def _render_verse_source(verse) -> Dict[str, Any]:
+        return {
+            "type": "verse",
+            "surah": verse['name_en'],
+            "verse_number": verse['ayatNumber'],
+            "surah_id": verse['surahId'],
+            "arabic_text": verse.get('arabicText', ''),
+            "translation": verse.get('translation') or verse.get('urduTranslation', '')
+        }
\ No newline at end of file
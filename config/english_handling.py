@@ -64,6 +64,51 @@ class EnglishHandlingConfig:
         'past': ['ماضي', 'سابق', 'قديم']
     }
     
+    # Other English words for each concept; inflections are handled by the lexicon's stemmer.
+    # Everyday words such as "know", "live" or "kind" are left out: they rarely name the concept.
+    ENGLISH_SYNONYMS = {
+        'patience': ['patient', 'persevere', 'perseverance', 'steadfast', 'endure'],
+        'mercy': ['merciful', 'compassion', 'compassionate'],
+        'forgiveness': ['forgive', 'forgiven', 'pardon'],
+        'guidance': ['guide', 'guided', 'direction'],
+        'peace': ['peaceful', 'tranquility', 'calm', 'serenity'],
+        'hope': ['hopeful', 'despair'],
+        'fear': ['afraid', 'scared', 'frightened'],
+        'love': ['loving', 'beloved'],
+        'gratitude': ['grateful', 'thankful', 'thanks', 'thank'],
+        'trust': ['reliance', 'rely', 'tawakkul'],
+        'prayer': ['pray', 'salah', 'salat', 'namaz'],
+        'charity': ['zakat', 'sadaqah', 'donation', 'spending'],
+        'fasting': ['ramadan', 'sawm'],
+        'pilgrimage': ['hajj', 'umrah', 'pilgrim'],
+        'worship': ['worshipper', 'ibadah'],
+        'repentance': ['repent', 'tawbah'],
+        'remembrance': ['remember', 'dhikr', 'zikr'],
+        'justice': ['fair', 'fairness', 'equity'],
+        'knowledge': ['learn', 'learning'],
+        'wisdom': ['wise'],
+        'faith': ['belief', 'believe', 'believer', 'iman'],
+        'righteousness': ['righteous', 'piety', 'pious', 'taqwa'],
+        'honesty': ['honest', 'truthful', 'truthfulness'],
+        'kindness': ['goodness'],
+        'humility': ['humble', 'modesty', 'modest'],
+        'difficulty': ['difficult', 'hardship', 'trial', 'calamity', 'suffering', 'distress'],
+        'success': ['succeed', 'prosperity'],
+        'wealth': ['wealthy', 'rich', 'riches', 'money'],
+        'poverty': ['poor', 'needy'],
+        'health': ['healthy', 'heal', 'cure'],
+        'sickness': ['sick', 'ill', 'illness', 'disease'],
+        'death': ['die', 'dying', 'dead'],
+        'life': ['alive'],
+        'family': ['relatives', 'kin'],
+        'parents': ['mother', 'father'],
+        'children': ['child', 'son', 'daughter', 'offspring'],
+        'marriage': ['marry', 'married', 'spouse', 'wife', 'husband'],
+        'friendship': ['friend'],
+        'morning': ['dawn'],
+        'evening': ['dusk'],
+    }
+    
     # Common Islamic phrases and their meanings
     ISLAMIC_PHRASES = {
         'bismillah': 'بسم الله الرحمن الرحيم',
@@ -87,18 +132,8 @@ class EnglishHandlingConfig:
     @classmethod
     def get_arabic_terms(cls, english_concept: str) -> list:
         """Get Arabic search terms for English concept"""
-        english_concept = english_concept.lower().strip()
-        
-        # Direct lookup
-        if english_concept in cls.ENGLISH_TO_ARABIC_MAPPING:
-            return cls.ENGLISH_TO_ARABIC_MAPPING[english_concept]
-        
-        # Partial matching
-        for key, terms in cls.ENGLISH_TO_ARABIC_MAPPING.items():
-            if english_concept in key or key in english_concept:
-                return terms
-        
-        return []
+        from utils.lexicon import LEXICON  # compiled from this class
+        return LEXICON.arabic_terms(english_concept)
     
     @classmethod
     def is_general_guidance_topic(cls, query: str) -> bool:
@@ -7,13 +7,88 @@ class Settings:
     # API Keys
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     
+    # LLM resilience
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))          # seconds per attempt
+    LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "30"))        # seconds per call, retries included
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "4"))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))    # 0 = use observed p95 latency
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+    LLM_EXECUTOR_WORKERS = int(os.getenv("LLM_EXECUTOR_WORKERS", "8"))     # threads for backend calls
+    
     # Database
     DATABASE_PATH = "quran.db"
     
+    # Directory of offline-built indexes (concordance, related verses)
+    INDEX_DIR = os.getenv("INDEX_DIR", "indexes")
+    # Seconds an in-memory index that failed to build is served empty before it is built again
+    INDEX_RETRY_SECONDS = float(os.getenv("INDEX_RETRY_SECONDS", "60"))
+    
     # Languages supported
     SUPPORTED_LANGUAGES = ["en", "ur", "ar"]
     DEFAULT_LANGUAGE = "en"
     
+    # Search
+    CONCURRENT_SEARCH = os.getenv("CONCURRENT_SEARCH", "false").lower() == "true"
+    SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "5"))    # seconds for a concurrent search
+    
+    # Verses per page in reading mode
+    READING_PAGE_SIZE = int(os.getenv("READING_PAGE_SIZE", "20"))
+    
+    # Conversation memory: sessions kept, full turns per session, and the size of what is kept
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+    SESSION_WINDOW_TURNS = int(os.getenv("SESSION_WINDOW_TURNS", "4"))
+    SESSION_SUMMARY_CHARS = int(os.getenv("SESSION_SUMMARY_CHARS", "800"))
+    SESSION_TURN_CHARS = int(os.getenv("SESSION_TURN_CHARS", "400"))
+    # Where the prefork server keeps sessions, so every worker process sees them
+    SESSION_DIR = os.getenv("SESSION_DIR", "cache/sessions")
+    
+    # JSON API server (python server.py); 0 workers = one process per CPU
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))
+    
+    # Response cache for routed (LLM) answers to questions asked without earlier context
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "cache")
+    RESPONSE_CACHE_TTL_HOURS = int(os.getenv("RESPONSE_CACHE_TTL_HOURS", "24"))
+    
+    # Rendered verse, name and dua fragments reused across context building
+    FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "4096"))
+    FRAGMENT_PRERENDER = os.getenv("FRAGMENT_PRERENDER", "false").lower() == "true"
+    
+    # Warm-up before reporting ready; pre-answering EXAMPLE_QUESTIONS calls the LLM once each
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_PREANSWER = os.getenv("WARMUP_PREANSWER", "false").lower() == "true"
+    
+    # Append-only JSON-lines log of answered queries, analyzed with python -m utils.query_log
+    QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "true").lower() == "true"
+    QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", "logs/queries.jsonl")
+    QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    QUERY_LOG_BACKUPS = int(os.getenv("QUERY_LOG_BACKUPS", "5"))
+    
+    # Questions exported by `python -m utils.query_log prefill`, pre-answered with EXAMPLE_QUESTIONS
+    WARMUP_QUESTIONS_FILE = os.getenv("WARMUP_QUESTIONS_FILE", "")
+    
+    # Example questions shown in the UI and pre-answered by the warm-up
+    EXAMPLE_QUESTIONS = [
+        "Tell me about Surah Al-Fatiha",
+        "What are the 99 names of Allah?",
+        "Share a dua for protection",
+        "Explain the meaning of Bismillah",
+        "Tell me about prayer times",
+        "What does the Quran say about patience?"
+    ]
+    
+    # Cold-start budget checked by python -m utils.startup_profile coldstart
+    COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "2000"))
+    
+    # Seconds each worker data source may take before it is dropped
+    WORKER_SOURCE_TIMEOUT = float(os.getenv("WORKER_SOURCE_TIMEOUT", "5"))
+    
     # Ethical boundaries
     MAX_QUERY_LENGTH = 500
     RESTRICTED_TOPICS = [
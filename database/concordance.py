@@ -0,0 +1,217 @@
+"""Word-frequency concordance of the Quran text.
+
+Usage:
+    python -m database.concordance [--db quran.db] [--out indexes/concordance.bin]
+
+Counts every word of `withoutAerab` under its normalized, article-free form
+and under an approximate root, with the list of verses it occurs in. The
+result is one file: a length-prefixed JSON header (verse counts per surah and
+word -> [offset, verses, occurrences]) followed by all verse lists as one
+uint16 array of global verse numbers. The array is memory-mapped, so
+processes serving from the same file share one copy of it, and a lookup is
+a dict access and an array slice.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+import threading
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from config.settings import Settings
+from database.positional_index import PositionalIndex
+from database.search_index import bare_form, tokenize_text
+from utils.shared_instance import SharedInstance
+
+FORMAT_VERSION = 1
+HEADER_SIZE = struct.Struct("<I")
+
+# Suffixes removed when approximating a root, longest first
+ROOT_SUFFIXES = ("هما", "كما", "تين", "تان", "ات", "ون", "ين", "ان", "وا", "ها", "هم", "هن", "كم", "كن", "نا", "يه", "ه", "ي")
+ALLAH_FORMS = {"الله", "لله", "بالله", "والله", "فالله", "تالله"}
+
+
+def approximate_root(word: str) -> str:
+    """Light-stemmed key that groups most inflections of a word (صبر, الصبر, صابرين, اصبر).
+
+    Affix stripping, not morphological analysis: good enough to count the
+    forms of a common word together, not a replacement for a root lexicon.
+    """
+    if word in ALLAH_FORMS:
+        return "الله"
+    stem = bare_form(word)
+    if stem == word and stem[:1] in ("و", "ف") and len(stem) > 3:
+        stem = stem[1:]
+    for _ in range(2):
+        suffix = next((s for s in ROOT_SUFFIXES if stem.endswith(s) and len(stem) - len(s) >= 3), None)
+        if not suffix:
+            break
+        stem = stem[:-len(suffix)]
+    if len(stem) > 3 and stem[0] == "ا":
+        stem = stem[1:]
+    if len(stem) > 3:
+        # Long vowels of derived patterns: صابر -> صبر
+        stem = stem[0] + "".join(ch for ch in stem[1:-1] if ch not in "اوي") + stem[-1]
+    return stem
+
+
+class Concordance(SharedInstance):
+    """Word and root -> occurrences and verse list, loaded from the offline-built file"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, verse_counts: Sequence[int], words: Dict[str, list], roots: Dict[str, list], verse_numbers: array):
+        self.positions = PositionalIndex(verse_counts, {})
+        self.words = words
+        self.roots = roots
+        self._verse_numbers = verse_numbers
+
+    @classmethod
+    def _build(cls, db_queries) -> "Concordance":
+        """Shared concordance from Settings.INDEX_DIR, built in memory when the file has not been built"""
+        path = os.path.join(Settings.INDEX_DIR, "concordance.bin")
+        if os.path.exists(path):
+            return cls.load(path)
+        logging.getLogger(__name__).info(f"{path} not found, building the concordance in memory "
+                                         f"(run python -m database.concordance to build it offline)")
+        return cls.from_database(db_queries)
+
+    @classmethod
+    def _empty(cls) -> "Concordance":
+        return cls([], {}, {}, array("H"))
+
+    @classmethod
+    def build(cls, verse_counts: Sequence[int], verses: Iterable[Dict]) -> "Concordance":
+        """Count words over verses in mushaf order"""
+        positions = PositionalIndex(verse_counts, {})
+        word_verses: Dict[str, Dict[int, int]] = {}
+        root_verses: Dict[str, Dict[int, int]] = {}
+        for verse in verses:
+            number = positions.global_index(verse['surahId'], verse['ayatNumber'])
+            if number is None:
+                continue
+            for word in tokenize_text(verse.get('withoutAerab') or verse.get('arabicText') or ""):
+                for table, key in ((word_verses, bare_form(word)), (root_verses, approximate_root(word))):
+                    counts = table.setdefault(key, {})
+                    counts[number] = counts.get(number, 0) + 1
+
+        verse_numbers = array("H")
+        tables = []
+        for table in (word_verses, root_verses):
+            entries = {}
+            for key in sorted(table):
+                counts = table[key]
+                entries[key] = [len(verse_numbers), len(counts), sum(counts.values())]
+                verse_numbers.extend(sorted(counts))
+            tables.append(entries)
+        return cls(verse_counts, tables[0], tables[1], verse_numbers)
+
+    @classmethod
+    def from_database(cls, db_queries=None) -> "Concordance":
+        if db_queries is None:
+            from database.queries import QuranQueries
+            db_queries = QuranQueries()
+        counts = {row['surahId']: row['verses'] for row in db_queries.get_verse_counts()}
+        verse_counts = [counts.get(surah_id, 0) for surah_id in range(1, max(counts, default=0) + 1)]
+        return cls.build(verse_counts, db_queries.iter_verses(page_size=1000))
+
+    def save(self, path: str):
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "verse_counts": self.positions.verse_counts,
+            "words": self.words,
+            "roots": self.roots,
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # Pad so the array starts 2-byte aligned and can be mapped in place
+        header += b" " * ((HEADER_SIZE.size + len(header)) % 2)
+        verse_numbers = array("H", self._verse_numbers)
+        if sys.byteorder != "little":
+            verse_numbers.byteswap()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER_SIZE.pack(len(header)))
+            f.write(header)
+            f.write(verse_numbers.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Concordance":
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (header_size,) = HEADER_SIZE.unpack_from(data)
+        header = json.loads(data[HEADER_SIZE.size:HEADER_SIZE.size + header_size].decode("utf-8"))
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {header.get('version')}, expected {FORMAT_VERSION}")
+        offset = HEADER_SIZE.size + header_size
+        if sys.byteorder == "little" and offset % 2 == 0:
+            verse_numbers = memoryview(data)[offset:].cast("H")
+        else:
+            # Files written before the header was padded, or big-endian hosts
+            verse_numbers = array("H", data[offset:])
+            if sys.byteorder != "little":
+                verse_numbers.byteswap()
+        return cls(header["verse_counts"], header["words"], header["roots"], verse_numbers)
+
+    def preload(self) -> int:
+        """Read one value per page of the mapped array so first lookups do not wait on disk"""
+        return sum(self._verse_numbers[::2048])
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def lookup(self, word: str) -> Optional[Dict]:
+        """
+        Counts for a word as written (ignoring articles and diacritics) and for all forms sharing its root.
+        Returns: {'word', 'occurrences', 'verse_count', 'verses', 'root', 'root_occurrences',
+                  'root_verse_count', 'root_verses'} with verses as (surah, ayah), or None when unknown.
+        """
+        words = tokenize_text(word)
+        if not words:
+            return None
+        key, root = bare_form(words[0]), approximate_root(words[0])
+        word_entry, root_entry = self.words.get(key), self.roots.get(root)
+        if not word_entry and not root_entry:
+            return None
+        word_entry, root_entry = word_entry or [0, 0, 0], root_entry or [0, 0, 0]
+        return {
+            "word": key,
+            "occurrences": word_entry[2],
+            "verse_count": word_entry[1],
+            "verses": self._verses(word_entry),
+            "root": root,
+            "root_occurrences": root_entry[2],
+            "root_verse_count": root_entry[1],
+            "root_verses": self._verses(root_entry),
+        }
+
+    def _verses(self, entry: List[int]) -> List[Tuple[int, int]]:
+        offset, count = entry[0], entry[1]
+        return [self.positions.verse_at(number) for number in self._verse_numbers[offset:offset + count]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the word-frequency concordance from quran.db")
+    parser.add_argument("--db", default=Settings.DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--out", default=os.path.join(Settings.INDEX_DIR, "concordance.bin"),
+                        help="output file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    from database.connection import DatabaseManager
+    from database.queries import QuranQueries
+    queries = QuranQueries()
+    queries.db = DatabaseManager(args.db)
+    concordance = Concordance.from_database(queries)
+    if not len(concordance):
+        print(f"No verses found in {args.db}")
+        return 1
+    concordance.save(args.out)
+    print(f"Wrote {len(concordance.words)} words and {len(concordance.roots)} roots "
+          f"({os.path.getsize(args.out) // 1024} KB) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
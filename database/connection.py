@@ -2,6 +2,7 @@ import sqlite3
 import logging
 from contextlib import contextmanager
 from config.settings import Settings
+from database.records import Record
 
 class DatabaseManager:
     def __init__(self, db_path: str = Settings.DATABASE_PATH):
@@ -32,6 +33,15 @@ class DatabaseManager:
             cursor.execute(query, params)
             return cursor.fetchall()
     
+    def execute_records(self, query: str, params: tuple = (), record_cls=Record) -> list:
+        """Execute a query and return compact tuple-backed records"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None  # Plain tuples, wrapped below
+            cursor.execute(query, params)
+            index = {column[0]: position for position, column in enumerate(cursor.description)}
+            return [record_cls(row, index) for row in cursor.fetchall()]
+    
     def execute_queries(self, queries: list):
         """Execute multiple queries in a transaction"""
         with self.get_connection() as conn:
@@ -0,0 +1,46 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+from utils.shared_instance import SharedInstance
+
+
+class QuranCorpus(SharedInstance):
+    """Every verse held in memory, keyed by (surah, ayah).
+
+    Loaded once by streaming the quran table page by page. Used where a
+    database round trip per lookup is too slow, such as checking the verses
+    an LLM answer cites.
+    """
+
+    LOAD_PAGE_SIZE = 1000
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, verses: Iterable[Dict]):
+        self._verses = {(verse['surahId'], verse['ayatNumber']): verse for verse in verses}
+
+    @classmethod
+    def _build(cls, db_queries) -> "QuranCorpus":
+        """Shared corpus, loaded from the quran table on first use"""
+        corpus = cls(db_queries.iter_verses(page_size=cls.LOAD_PAGE_SIZE))
+        if not len(corpus):
+            raise ValueError("quran table is empty")
+        return corpus
+
+    @classmethod
+    def _empty(cls) -> "QuranCorpus":
+        return cls([])
+
+    def __len__(self) -> int:
+        return len(self._verses)
+    
+    def __iter__(self) -> Iterator[Dict]:
+        """Verses in mushaf order"""
+        return (self._verses[key] for key in sorted(self._verses))
+
+    def verse(self, surah_id: int, ayat_number: int) -> Optional[Dict]:
+        return self._verses.get((surah_id, ayat_number))
+
+    def verses(self, surah_id: int, start: int, end: int) -> List[Optional[Dict]]:
+        """Verses of an inclusive range, None for numbers that do not exist"""
+        return [self._verses.get((surah_id, ayat_number)) for ayat_number in range(start, end + 1)]
@@ -0,0 +1,250 @@
+"""Index builder and query-plan check for quran.db.
+
+Usage:
+    python -m database.maintenance [--db quran.db] [--check-only] [--no-vacuum]
+
+Creates the indexes QuranQueries relies on (skipping tables or columns the
+database does not have), refreshes planner statistics, compacts the file and
+then runs EXPLAIN QUERY PLAN on every statement QuranQueries issues. Exits
+with status 1 when a hot-path query still scans a whole table.
+"""
+import re
+import sys
+import sqlite3
+import argparse
+import inspect
+from typing import Dict, List, Optional, Tuple
+from config.settings import Settings
+from database.connection import DatabaseManager
+from database.queries import QuranQueries
+from database.records import Record
+
+# name, table, indexed columns, partial-index predicate
+INDEXES = [
+    ("idx_quran_surah_ayat", "quran", ("surahId", "ayatNumber"), None),
+    ("idx_quran_favourite", "quran", ("surahId", "ayatNumber"), "favourite = 1"),
+    ("idx_juz_no", "juz", ("no",), None),
+    ("idx_allah_names_favourite", "allah_names", ("favourite",), "favourite = 1"),
+    ("idx_dua_favourite", "dua", ("favourite",), "favourite = 1"),
+    ("idx_surah_favourite", "surah", ("favourite",), "favourite = 1"),
+    ("idx_juz_favourite", "juz", ("favourite",), "favourite = 1"),
+    ("idx_tasbih_favourite", "tasbih", ("favourite",), "favourite = 1"),
+]
+
+# QuranQueries method, sample arguments, and whether it is a hot path that must not scan.
+# LIKE searches, RANDOM() picks and whole-table listings read every row by design.
+STATEMENT_SAMPLES = [
+    ("get_surah_info", (2,), True),
+    ("get_surah_verses", (2,), True),
+    ("get_verse_by_reference", (2, 255), True),
+    ("get_verse_page", ((2, 100), (3, 0), 20), True),
+    ("iter_verses", ((2, 100), None, 20), True),
+    ("iter_surah_verses", (2, 100), True),
+    ("get_juz_range", (30,), True),
+    ("iter_juz_verses", (30,), True),
+    ("get_juz_info", (30,), True),
+    ("get_verses_by_references", ([(2, 153), (2, 155, 157), (39, 10)],), True),
+    ("get_verse_position", (18, 10), True),
+    ("get_verse_at", (2150,), True),
+    ("get_division_span", ("juz", 30), True),
+    ("get_surah_span", (18,), True),
+    ("boolean_search", ("صبر AND صلاة surah:2-5",), True),
+    ("get_favorites", ("quran",), True),
+    ("search_verses", ("صبر", "en"), False),
+    ("search_verses", ("patience", "en"), False),
+    ("search_translations", ("patience", "en"), False),
+    ("get_translation_languages", (), False),
+    ("table_columns", ("allah_names",), False),
+    ("search_verses_by_topic", ("patience",), False),
+    ("get_all_surahs", (), False),
+    ("search_duas", ("protection",), False),
+    ("get_all_duas", (), False),
+    ("get_random_dua", (), False),
+    ("get_allah_names", ("merciful",), False),
+    ("get_all_allah_names", (), False),
+    ("get_random_allah_name", (), False),
+    ("get_kalmas", (), False),
+    ("get_sample_verses", (), False),
+    ("search_by_surah_name", ("Baqarah",), False),
+    ("get_favorites", ("allah_names",), False),
+    ("get_verse_counts", (), False),
+    ("warm_cache", (), False),
+    ("warm_indexes", (), False),
+    ("get_division_rows", ("hizb",), False),
+]
+
+# Plan rows that read a whole table without any index
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\S+)(?: AS \S+)?$")
+CTE_NAME = re.compile(r"(?:\bWITH|,)\s*(\w+)\s*(?:\([^)]*\))?\s+AS\s*\(", re.IGNORECASE)
+TABLE_ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!WHERE|JOIN|ON|ORDER|LIMIT|GROUP)(\w+))?", re.IGNORECASE)
+
+# Small fixed-size tables the planner may scan to drive an indexed join (114 surahs)
+JOIN_DRIVER_TABLES = {"surah"}
+
+
+class StatementRecorder(DatabaseManager):
+    """DatabaseManager stand-in that records statements instead of running them"""
+
+    def __init__(self):
+        super().__init__()
+        self.statements: List[Tuple[str, tuple]] = []
+
+    def execute_query(self, query: str, params: tuple = ()):
+        self.statements.append((query, tuple(params)))
+        return []
+
+    def execute_records(self, query: str, params: tuple = (), record_cls=Record) -> list:
+        self.statements.append((query, tuple(params)))
+        return []
+
+
+class SchemaMaintenance:
+    """Creates indexes, refreshes statistics and checks query plans for one database file"""
+
+    def __init__(self, db_path: str = Settings.DATABASE_PATH):
+        self.db_path = db_path
+        # Autocommit, so VACUUM is never inside a transaction
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+
+    def close(self):
+        self.conn.close()
+
+    def columns(self, table: str) -> List[str]:
+        return [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]
+
+    def create_indexes(self) -> List[str]:
+        """Create missing indexes whose table and columns exist; returns the names created"""
+        existing = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        created = []
+        for name, table, columns, where in INDEXES:
+            table_columns = self.columns(table)
+            needed = set(columns) | ({"favourite"} if where else set())
+            if name in existing or not needed <= set(table_columns):
+                continue
+            statement = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+            if where:
+                statement += f" WHERE {where}"
+            self.conn.execute(statement)
+            created.append(name)
+
+        # The surah join needs a lookup on surah.id; an INTEGER PRIMARY KEY already is one
+        surah_info = {row[1]: row for row in self.conn.execute("PRAGMA table_info(surah)")}
+        id_column = surah_info.get("id")
+        if id_column and not (id_column[5] and id_column[2].upper() == "INTEGER") \
+                and "idx_surah_id" not in existing:
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_surah_id ON surah (id)")
+            created.append("idx_surah_id")
+        return created
+
+    def optimize(self, vacuum: bool = True):
+        """Refresh planner statistics and compact the file"""
+        self.conn.execute("ANALYZE")
+        if vacuum:
+            self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA optimize")
+
+    def explain(self, query: str, params: tuple) -> List[str]:
+        return [row[3] for row in self.conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+    def check_query_plans(self) -> Tuple[List[Dict], List[str]]:
+        """
+        EXPLAIN every statement QuranQueries issues for the sample calls.
+        Returns one report row per statement and the names of public
+        QuranQueries methods that have no sample.
+        """
+        queries = QuranQueries()
+        # Build the in-memory indexes from the real file before statements are intercepted
+        queries.db = DatabaseManager(self.db_path)
+        queries.warm_indexes()
+        recorder = StatementRecorder()
+        queries.db = recorder
+
+        report = []
+        for method_name, args, hot in STATEMENT_SAMPLES:
+            recorder.statements.clear()
+            result = getattr(queries, method_name)(*args)
+            if inspect.isgenerator(result):
+                list(result)
+
+            for query, params in recorder.statements:
+                row = {"method": method_name, "hot": hot, "plan": [], "full_scans": [], "error": None}
+                try:
+                    row["plan"] = self.explain(query, params)
+                except sqlite3.Error as e:
+                    row["error"] = str(e)
+                row["full_scans"] = self._full_scans(query, row["plan"])
+                report.append(row)
+
+        sampled = {method_name for method_name, _, _ in STATEMENT_SAMPLES}
+        unsampled = [
+            name for name, member in inspect.getmembers(QuranQueries, inspect.isfunction)
+            if not name.startswith("_") and name not in sampled
+        ]
+        return report, unsampled
+
+    @staticmethod
+    def _full_scans(query: str, plan: List[str]) -> List[str]:
+        """Plan steps that scan a whole table, ignoring CTEs and join-driver scans of small tables"""
+        ctes = set(CTE_NAME.findall(query))
+        aliases = {}
+        for table, alias in TABLE_ALIAS.findall(query):
+            aliases[table] = table
+            if alias:
+                aliases[alias] = table
+        has_indexed_search = any(step.startswith("SEARCH") for step in plan)
+
+        scans = []
+        for step in plan:
+            match = FULL_SCAN.match(step)
+            if not match:
+                continue
+            table = aliases.get(match.group(1), match.group(1))
+            if table in ctes or (has_indexed_search and table in JOIN_DRIVER_TABLES):
+                continue
+            scans.append(step)
+        return scans
+
+
+def print_report(report: List[Dict], unsampled: List[str]) -> bool:
+    """Print the plan check; returns True when no hot query scans a table or fails to plan"""
+    ok = True
+    for row in report:
+        failed = row["hot"] and (row["full_scans"] or row["error"])
+        status = "FAIL" if failed else ("err" if row["error"] else "scan" if row["full_scans"] else "ok")
+        ok = ok and not failed
+        print(f"[{status:>4}] {row['method']}{' (hot)' if row['hot'] else ''}")
+        for step in row["plan"]:
+            print(f"         {step}")
+        if row["error"]:
+            print(f"         error: {row['error']}")
+    for name in unsampled:
+        print(f"[warn] {name} has no sample in STATEMENT_SAMPLES and was not checked")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create indexes and check query plans for quran.db")
+    parser.add_argument("--db", default=Settings.DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--check-only", action="store_true", help="only check query plans, change nothing")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM")
+    args = parser.parse_args(argv)
+
+    maintenance = SchemaMaintenance(args.db)
+    try:
+        if not args.check_only:
+            created = maintenance.create_indexes()
+            print(f"Created indexes: {', '.join(created) if created else 'none needed'}")
+            maintenance.optimize(vacuum=not args.no_vacuum)
+            print("Ran ANALYZE" + ("" if args.no_vacuum else ", VACUUM") + " and PRAGMA optimize")
+
+        report, unsampled = maintenance.check_query_plans()
+        ok = print_report(report, unsampled)
+    finally:
+        maintenance.close()
+
+    print("Query plans OK" if ok else "Hot queries still scan whole tables")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
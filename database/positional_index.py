@@ -0,0 +1,152 @@
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.shared_instance import SharedInstance
+
+# First verse (surah, ayah) of each of the 30 juz in the standard division
+JUZ_START_VERSES = [
+    (1, 1), (2, 142), (2, 253), (3, 93), (4, 24), (4, 148), (5, 82), (6, 111), (7, 88), (8, 41),
+    (9, 93), (11, 6), (12, 53), (15, 1), (17, 1), (18, 75), (21, 1), (23, 1), (25, 21), (27, 56),
+    (29, 46), (33, 31), (36, 28), (39, 32), (41, 47), (46, 1), (51, 31), (58, 1), (67, 1), (78, 1),
+]
+
+# Column names a division table may use for its starting verse
+SURAH_COLUMNS = ("surahId", "surah_id", "startSurah", "start_surah", "surah")
+AYAH_COLUMNS = ("ayatNumber", "ayat_number", "startAyat", "start_ayah", "ayah", "aya", "verse")
+
+
+class PositionalIndex(SharedInstance):
+    """Verse positions in mushaf order, built once from verse counts and division starts.
+
+    Global ayah numbers (1..6236) come from cumulative per-surah offsets, and
+    each division (juz, and hizb/ruku/page when the database has those tables)
+    is a sorted list of global start positions, so every lookup is a bisect
+    with no SQL.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, verse_counts: Sequence[int], divisions: Dict[str, List[Tuple[int, int]]]):
+        """
+        verse_counts: number of verses per surah, surah 1 first
+        divisions: division name -> (surah, ayah) start of each division, in order
+        """
+        self.verse_counts = list(verse_counts)
+        self._surah_offsets = []    # verses before each surah
+        total = 0
+        for count in self.verse_counts:
+            self._surah_offsets.append(total)
+            total += count
+        self.total = total
+
+        self.division_starts = {name: list(starts) for name, starts in divisions.items()}
+        self._division_offsets = {}    # division name -> global start positions
+        for name, starts in self.division_starts.items():
+            offsets = [self.global_index(*start) for start in starts] if total else [None]
+            if None not in offsets:
+                self._division_offsets[name] = offsets
+
+    @classmethod
+    def _build(cls, db_queries) -> "PositionalIndex":
+        """Shared index, built from verse counts and division tables on first use"""
+        return cls.from_database(db_queries)
+
+    @classmethod
+    def _empty(cls) -> "PositionalIndex":
+        return cls([], {"juz": JUZ_START_VERSES})
+
+    @classmethod
+    def from_database(cls, db_queries) -> "PositionalIndex":
+        counts = {row['surahId']: row['verses'] for row in db_queries.get_verse_counts()}
+        if not counts:
+            raise ValueError("quran table is empty")
+        verse_counts = [counts.get(surah_id, 0) for surah_id in range(1, max(counts) + 1)]
+
+        # Juz starts come from the juz table when it has them; hizb, ruku and page only exist as tables
+        divisions = {"juz": JUZ_START_VERSES}
+        loaders = {
+            "juz": db_queries.get_juz_info,
+            "hizb": lambda: db_queries.get_division_rows("hizb"),
+            "ruku": lambda: db_queries.get_division_rows("ruku"),
+            "page": lambda: db_queries.get_division_rows("page"),
+        }
+        for name, load in loaders.items():
+            try:
+                starts = cls._division_starts(load())
+            except Exception:
+                starts = None
+            if starts:
+                divisions[name] = starts
+        return cls(verse_counts, divisions)
+
+    @staticmethod
+    def _division_starts(rows) -> Optional[List[Tuple[int, int]]]:
+        """Start verses from division rows, or None when the rows carry no start columns"""
+        if not rows:
+            return None
+        columns = set(rows[0].keys())
+        surah_column = next((column for column in SURAH_COLUMNS if column in columns), None)
+        ayah_column = next((column for column in AYAH_COLUMNS if column in columns), None)
+        if not surah_column or not ayah_column:
+            return None
+        try:
+            starts = sorted((int(row[surah_column]), int(row[ayah_column])) for row in rows)
+        except (TypeError, ValueError):
+            return None
+        return starts
+
+    def global_index(self, surah_id: int, ayat_number: int) -> Optional[int]:
+        """1-based position of a verse in the whole Quran"""
+        if not 1 <= surah_id <= len(self.verse_counts) or not 1 <= ayat_number <= self.verse_counts[surah_id - 1]:
+            return None
+        return self._surah_offsets[surah_id - 1] + ayat_number
+
+    def verse_at(self, index: int) -> Optional[Tuple[int, int]]:
+        """(surah, ayah) at a 1-based global position"""
+        if not 1 <= index <= self.total:
+            return None
+        surah_id = bisect_right(self._surah_offsets, index - 1)
+        return surah_id, index - self._surah_offsets[surah_id - 1]
+
+    def division_of(self, name: str, surah_id: int, ayat_number: int) -> Optional[int]:
+        """Number of the juz/hizb/ruku/page a verse falls in"""
+        index = self.global_index(surah_id, ayat_number)
+        offsets = self._division_offsets.get(name)
+        if index is None or not offsets:
+            return None
+        return bisect_right(offsets, index) or None
+
+    def locate(self, surah_id: int, ayat_number: int) -> Optional[Dict]:
+        """Global position and every known division number of a verse"""
+        index = self.global_index(surah_id, ayat_number)
+        if index is None:
+            return None
+        position = {"surah": surah_id, "ayah": ayat_number, "index": index}
+        for name in self._division_offsets:
+            position[name] = self.division_of(name, surah_id, ayat_number)
+        return position
+
+    def surah_span(self, surah_id: int) -> Optional[Dict]:
+        """Positions of the first and last verse of a surah"""
+        if not 1 <= surah_id <= len(self.verse_counts) or not self.verse_counts[surah_id - 1]:
+            return None
+        return {"first": self.locate(surah_id, 1), "last": self.locate(surah_id, self.verse_counts[surah_id - 1])}
+
+    def division_bounds(self, name: str, number: int) -> Optional[Tuple[Tuple[int, int], Optional[Tuple[int, int]]]]:
+        """Keyset bounds (after, before) of a division, usable without verse counts"""
+        starts = self.division_starts.get(name) or []
+        if not 1 <= number <= len(starts):
+            return None
+        surah_id, ayat_number = starts[number - 1]
+        before = starts[number] if number < len(starts) else None
+        return (surah_id, ayat_number - 1), before
+
+    def division_span(self, name: str, number: int) -> Optional[Dict]:
+        """First verse, last verse and verse count of a division"""
+        offsets = self._division_offsets.get(name) or []
+        if not 1 <= number <= len(offsets):
+            return None
+        first = offsets[number - 1]
+        last = (offsets[number] - 1) if number < len(offsets) else self.total
+        return {"first": self.verse_at(first), "last": self.verse_at(last), "verses": last - first + 1}
@@ -1,14 +1,29 @@
-from typing import List, Dict, Optional, Tuple
+import re
+from typing import List, Dict, Optional, Tuple, Sequence, Iterator, FrozenSet
 from database.connection import DatabaseManager
+from database.records import Record, Verse, Surah, AllahName, Dua, Juz
+from database.positional_index import PositionalIndex
+from database.search_index import VerseSearchIndex
+from utils.lexicon import LEXICON
+from utils.text_normalizer import is_arabic_script
 
 
 class QuranQueries:
+    # Words of a keyword, quoted for an FTS5 MATCH expression
+    FTS_WORD = re.compile(r"\w+")
+    
     def __init__(self):
         self.db = DatabaseManager()
+        self._translation_languages = None
+        self._table_columns = {}
     
     def search_verses(self, keyword: str, language: str = "en") -> List[Dict]:
         """Search for verses containing keyword with English fallback"""
         try:
+            # A loaded translation is searched through its full-text index
+            if language in self.translation_languages and not is_arabic_script(keyword):
+                return self.search_translations(keyword, language)
+            
             if language == "en":
                 # For English queries, search in Arabic text and provide translation
                 query = """
@@ -49,29 +64,65 @@ class QuranQueries:
                 keyword_pattern = f"%{keyword}%"
                 params = (keyword_pattern,)
             
-            results = self.db.execute_query(query, params)
-            return [dict(row) for row in results]
+            return self.db.execute_records(query, params, Verse)
             
         except Exception as e:
             print(f"Error searching verses: {e}")
             return []
     
+    @property
+    def translation_languages(self) -> FrozenSet[str]:
+        """Languages with a loaded translation, read once per instance"""
+        if self._translation_languages is None:
+            try:
+                self._translation_languages = frozenset(self.get_translation_languages())
+            except Exception:
+                self._translation_languages = frozenset()
+        return self._translation_languages
+    
+    def get_translation_languages(self) -> List[str]:
+        """Languages loaded into the optional translations table"""
+        exists = self.db.execute_records(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'translations_fts'"
+        )
+        if not exists:
+            return []
+        return [row['lang'] for row in self.db.execute_records("SELECT DISTINCT lang FROM translations")]
+    
+    def table_columns(self, table: str) -> Tuple[str, ...]:
+        """Column names of a table as the database actually has them, read once per instance"""
+        if table not in self._table_columns:
+            rows = self.db.execute_records(f"PRAGMA table_info({table})")
+            self._table_columns[table] = tuple(row['name'] for row in rows)
+        return self._table_columns[table]
+    
+    def _select(self, record_cls, table: str) -> str:
+        """SELECT list of the record's COLUMNS that this build's table has"""
+        available = self.table_columns(table)
+        return record_cls.columns_sql(columns=[column for column in record_cls.COLUMNS if column in available])
+    
+    def search_translations(self, keyword: str, language: str, limit: int = 10) -> List[Dict]:
+        """Best-ranked verses whose translation matches any word of the keyword"""
+        words = self.FTS_WORD.findall(keyword)
+        if not words:
+            return []
+        query = """
+        SELECT q.ayatId, q.ayatNumber, q.arabicText, q.urduTranslation, 
+               s.name_en, s.name_ar, q.surahId, q.withoutAerab, t.text AS translation
+        FROM translations_fts f
+        JOIN translations t ON t.rowid = f.rowid
+        JOIN quran q ON q.ayatId = t.ayatId
+        JOIN surah s ON q.surahId = s.id
+        WHERE translations_fts MATCH ? AND t.lang = ?
+        ORDER BY f.rank
+        LIMIT ?
+        """
+        match = " OR ".join(f'"{word}"' for word in words)
+        return self.db.execute_records(query, (match, language, limit), Verse)
+    
     def search_verses_by_topic(self, topic: str, language: str = "en") -> List[Dict]:
         """Search verses by topic using semantic keywords"""
-        topic_keywords = {
-            'patience': ['صبر', 'صابر', 'اصبر'],
-            'forgiveness': ['غفر', 'غفور', 'تواب'],
-            'mercy': ['رحم', 'رحيم', 'رحمن'],
-            'guidance': ['هدى', 'هداية', 'مهتد'],
-            'peace': ['سلام', 'سكينة', 'أمن'],
-            'knowledge': ['علم', 'عالم', 'تعلم'],
-            'prayer': ['صبح', 'مساء', 'ذكر', 'سجود'],
-            'charity': ['صدقة', 'زكاة', 'انفق'],
-            'faith': ['ايمان', 'آمن', 'مؤمن'],
-            'hope': ['رجاء', 'أمل', 'طمع']
-        }
-        
-        keywords = topic_keywords.get(topic.lower(), [topic])
+        keywords = LEXICON.arabic_terms(topic) or [topic]
         all_verses = []
         
         for keyword in keywords:
@@ -84,14 +135,14 @@ class QuranQueries:
     
     def get_surah_info(self, surah_id: int) -> Optional[Dict]:
         """Get surah information"""
-        query = "SELECT * FROM surah WHERE id = ?"
-        result = self.db.execute_query(query, (surah_id,))
-        return dict(result[0]) if result else None
+        query = f"SELECT {self._select(Surah, 'surah')} FROM surah WHERE id = ?"
+        result = self.db.execute_records(query, (surah_id,), Surah)
+        return result[0] if result else None
     
     def get_all_surahs(self) -> List[Dict]:
         """Get all surah information"""
-        query = "SELECT * FROM surah ORDER BY id"
-        return [dict(row) for row in self.db.execute_query(query)]
+        query = f"SELECT {self._select(Surah, 'surah')} FROM surah ORDER BY id"
+        return self.db.execute_records(query, record_cls=Surah)
     
     def get_surah_verses(self, surah_id: int, limit: int = 10) -> List[Dict]:
         """Get verses from a specific surah"""
@@ -104,51 +155,180 @@ class QuranQueries:
         ORDER BY q.ayatNumber
         LIMIT ?
         """
-        return [dict(row) for row in self.db.execute_query(query, (surah_id, limit))]
+        return self.db.execute_records(query, (surah_id, limit), Verse)
+    
+    def get_verse_page(self, after: Tuple[int, int] = (0, 0), before: Tuple[int, int] = None,
+                       limit: int = 50) -> List[Dict]:
+        """
+        One keyset page of verses in mushaf order, strictly after the (surah, ayah)
+        position `after` and strictly before `before` when given. Seeks on the
+        position instead of using OFFSET, so every page costs the same.
+        """
+        query = """
+        SELECT q.ayatId, q.ayatNumber, q.arabicText, q.urduTranslation, 
+               s.name_en, s.name_ar, q.surahId
+        FROM quran q
+        JOIN surah s ON q.surahId = s.id
+        WHERE (q.surahId, q.ayatNumber) > (?, ?)
+        """
+        params = tuple(after)
+        if before:
+            query += "AND (q.surahId, q.ayatNumber) < (?, ?)\n"
+            params += tuple(before)
+        query += "ORDER BY q.surahId, q.ayatNumber\nLIMIT ?"
+        return self.db.execute_records(query, params + (limit,), Verse)
+    
+    def iter_verses(self, after: Tuple[int, int] = (0, 0), before: Tuple[int, int] = None,
+                    page_size: int = 50) -> Iterator[Dict]:
+        """Stream verses between two positions page by page, holding one page at a time"""
+        while True:
+            page = self.get_verse_page(after, before, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1]['surahId'], page[-1]['ayatNumber'])
+    
+    def iter_surah_verses(self, surah_id: int, after_ayat: int = 0, page_size: int = 50) -> Iterator[Dict]:
+        """Stream a surah's verses after `after_ayat`, page by page"""
+        return self.iter_verses((surah_id, after_ayat), (surah_id + 1, 0), page_size)
+    
+    def get_juz_range(self, juz_number: int) -> Optional[Tuple[Tuple[int, int], Optional[Tuple[int, int]]]]:
+        """Keyset bounds (after, before) covering a juz, for get_verse_page / iter_verses"""
+        return self.positions.division_bounds("juz", juz_number)
+    
+    def iter_juz_verses(self, juz_number: int, page_size: int = 50) -> Iterator[Dict]:
+        """Stream a juz's verses page by page"""
+        bounds = self.get_juz_range(juz_number)
+        if not bounds:
+            return iter(())
+        return self.iter_verses(bounds[0], bounds[1], page_size)
+    
+    @property
+    def positions(self) -> PositionalIndex:
+        """Shared in-memory verse position index"""
+        return PositionalIndex.get_instance(self)
+    
+    @property
+    def search_index(self) -> VerseSearchIndex:
+        """Shared in-memory positional word index over the verse corpus"""
+        return VerseSearchIndex.get_instance(self)
+    
+    def warm_indexes(self) -> Dict:
+        """Build the shared in-memory indexes and read the loaded translations ahead of the first query"""
+        PositionalIndex.get_instance(self)
+        return {
+            "indexed_verses": len(VerseSearchIndex.get_instance(self).verses),
+            "translation_languages": sorted(self.translation_languages),
+        }
+    
+    def boolean_search(self, query: str, page: int = 1, page_size: int = 20) -> Dict:
+        """
+        Ranked, paginated verse search with AND/OR/NOT, "phrases", NEAR/n,
+        wildcards and surah:n-m filters, answered from the in-memory index.
+        Raises SearchQueryError (a ValueError) for queries that do not parse.
+        """
+        return self.search_index.search(query, page, page_size)
+    
+    def get_verse_position(self, surah_id: int, ayat_number: int) -> Optional[Dict]:
+        """Global ayah number and juz (plus hizb/ruku/page when available) of a verse, without SQL"""
+        return self.positions.locate(surah_id, ayat_number)
+    
+    def get_verse_at(self, global_index: int) -> Optional[Tuple[int, int]]:
+        """(surah, ayah) at a 1-based position in the whole Quran, without SQL"""
+        return self.positions.verse_at(global_index)
+    
+    def get_division_span(self, division: str, number: int) -> Optional[Dict]:
+        """First verse, last verse and verse count of a juz (or hizb/ruku/page), without SQL"""
+        return self.positions.division_span(division, number)
+    
+    def get_surah_span(self, surah_id: int) -> Optional[Dict]:
+        """Positions of a surah's first and last verse, e.g. to tell which juz it spans, without SQL"""
+        return self.positions.surah_span(surah_id)
+    
+    def get_verse_counts(self) -> List[Dict]:
+        """Number of verses per surah, used to build the positional index"""
+        query = """
+        SELECT surahId, MAX(ayatNumber) AS verses
+        FROM quran
+        GROUP BY surahId
+        ORDER BY surahId
+        """
+        return self.db.execute_records(query)
+    
+    def warm_cache(self) -> int:
+        """Read every verse and surah row once so the first requests find the file in the OS page cache"""
+        query = """
+        SELECT COUNT(*) AS verses,
+               SUM(LENGTH(q.arabicText) + LENGTH(q.withoutAerab) + LENGTH(q.urduTranslation) + LENGTH(s.name_en)) AS size
+        FROM quran q
+        JOIN surah s ON q.surahId = s.id
+        """
+        rows = self.db.execute_records(query)
+        return rows[0]['verses'] if rows else 0
+    
+    def get_division_rows(self, division: str) -> List[Dict]:
+        """Rows of an optional hizb/ruku/page table giving where each division starts"""
+        if division not in ('hizb', 'ruku', 'page'):
+            return []
+        exists = self.db.execute_records(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (division,)
+        )
+        return self.db.execute_records(f"SELECT * FROM {division}") if exists else []
     
     def search_duas(self, category: str = None) -> List[Dict]:
         """Search duas by category or get all"""
         if category:
-            query = "SELECT * FROM dua WHERE surah LIKE ? OR aya LIKE ? LIMIT 5"
+            query = f"SELECT {self._select(Dua, 'dua')} FROM dua WHERE surah LIKE ? OR aya LIKE ? LIMIT 5"
             params = (f"%{category}%", f"%{category}%")
         else:
-            query = "SELECT * FROM dua LIMIT 10"
+            query = f"SELECT {self._select(Dua, 'dua')} FROM dua LIMIT 10"
             params = ()
             
-        return [dict(row) for row in self.db.execute_query(query, params)]
+        return self.db.execute_records(query, params, Dua)
+    
+    def get_all_duas(self) -> List[Dict]:
+        """Get all duas, used to build the in-memory dua category index"""
+        query = f"SELECT {self._select(Dua, 'dua')} FROM dua"
+        return self.db.execute_records(query, record_cls=Dua)
     
     def get_random_dua(self) -> Optional[Dict]:
         """Get a random dua"""
-        query = "SELECT * FROM dua ORDER BY RANDOM() LIMIT 1"
-        result = self.db.execute_query(query)
-        return dict(result[0]) if result else None
+        query = f"SELECT {self._select(Dua, 'dua')} FROM dua ORDER BY RANDOM() LIMIT 1"
+        result = self.db.execute_records(query, record_cls=Dua)
+        return result[0] if result else None
     
     def get_allah_names(self, search_term: str = None) -> List[Dict]:
         """Get Allah's names with optional search"""
+        select = self._select(AllahName, 'allah_names')
         if search_term:
-            query = """
-            SELECT * FROM allah_names 
+            query = f"""
+            SELECT {select} FROM allah_names 
             WHERE english LIKE ? OR englishMeaning LIKE ? OR urduMeaning LIKE ? OR arabic LIKE ?
             LIMIT 10
             """
             pattern = f"%{search_term}%"
             params = (pattern, pattern, pattern, pattern)
         else:
-            query = "SELECT * FROM allah_names LIMIT 20"
+            query = f"SELECT {select} FROM allah_names LIMIT 20"
             params = ()
             
-        return [dict(row) for row in self.db.execute_query(query, params)]
+        return self.db.execute_records(query, params, AllahName)
+    
+    def get_all_allah_names(self) -> List[Dict]:
+        """Get all of Allah's names, used to build the in-memory names index"""
+        query = f"SELECT {self._select(AllahName, 'allah_names')} FROM allah_names"
+        return self.db.execute_records(query, record_cls=AllahName)
     
     def get_random_allah_name(self) -> Optional[Dict]:
         """Get a random Allah's name"""
-        query = "SELECT * FROM allah_names ORDER BY RANDOM() LIMIT 1"
-        result = self.db.execute_query(query)
-        return dict(result[0]) if result else None
+        query = f"SELECT {self._select(AllahName, 'allah_names')} FROM allah_names ORDER BY RANDOM() LIMIT 1"
+        result = self.db.execute_records(query, record_cls=AllahName)
+        return result[0] if result else None
     
     def get_kalmas(self) -> List[Dict]:
         """Get all Kalmas"""
         query = "SELECT * FROM kalmas ORDER BY id"
-        return [dict(row) for row in self.db.execute_query(query)]
+        return self.db.execute_records(query)
     
     def get_juz_info(self, juz_number: int = None) -> List[Dict]:
         """Get Juz (Para) information"""
@@ -159,7 +339,7 @@ class QuranQueries:
             query = "SELECT * FROM juz ORDER BY no"
             params = ()
         
-        return [dict(row) for row in self.db.execute_query(query, params)]
+        return self.db.execute_records(query, params, Juz)
     
     def get_sample_verses(self, count: int = 5) -> List[Dict]:
         """Get random sample verses for educational purposes"""
@@ -171,7 +351,7 @@ class QuranQueries:
         ORDER BY RANDOM()
         LIMIT ?
         """
-        return [dict(row) for row in self.db.execute_query(query, (count,))]
+        return self.db.execute_records(query, (count,), Verse)
     
     def get_verse_by_reference(self, surah_id: int, verse_number: int) -> Optional[Dict]:
         """Get specific verse by surah and verse number"""
@@ -182,19 +362,56 @@ class QuranQueries:
         JOIN surah s ON q.surahId = s.id
         WHERE q.surahId = ? AND q.ayatNumber = ?
         """
-        result = self.db.execute_query(query, (surah_id, verse_number))
-        return dict(result[0]) if result else None
+        result = self.db.execute_records(query, (surah_id, verse_number), Verse)
+        return result[0] if result else None
+    
+    def get_verses_by_references(self, references: Sequence, limit: int = None) -> List[Dict]:
+        """
+        Fetch several references in one statement, in request order.
+        Each reference is a VerseReference-like object (surah_id, start, end; start None
+        for a whole surah), a (surah, ayah) pair or a (surah, first, last) range.
+        """
+        ranges = [self._reference_range(reference) for reference in references]
+        if not ranges:
+            return []
+        
+        values = ", ".join("(?, ?, ?, ?)" for _ in ranges)
+        query = f"""
+        WITH wanted(position, surahId, firstAyat, lastAyat) AS (VALUES {values})
+        SELECT q.ayatId, q.ayatNumber, q.arabicText, q.urduTranslation, 
+               s.name_en, s.name_ar, q.surahId
+        FROM wanted w
+        CROSS JOIN quran q ON q.surahId = w.surahId AND q.ayatNumber BETWEEN w.firstAyat AND w.lastAyat
+        JOIN surah s ON q.surahId = s.id
+        ORDER BY w.position, q.ayatNumber
+        """
+        params = tuple(value for position, bounds in enumerate(ranges) for value in (position,) + bounds)
+        if limit:
+            query += "LIMIT ?"
+            params += (limit,)
+        return self.db.execute_records(query, params, Verse)
+    
+    @staticmethod
+    def _reference_range(reference) -> Tuple[int, int, int]:
+        """(surah, first ayah, last ayah) of a reference object or tuple"""
+        if hasattr(reference, 'surah_id'):
+            if reference.start is None:
+                return reference.surah_id, 1, 999
+            return reference.surah_id, reference.start, reference.end
+        if len(reference) == 2:
+            return reference[0], reference[1], reference[1]
+        return tuple(reference)
     
     def search_by_surah_name(self, surah_name: str) -> Optional[Dict]:
         """Search surah by name (English or Arabic)"""
-        query = """
-        SELECT * FROM surah 
+        query = f"""
+        SELECT {self._select(Surah, 'surah')} FROM surah 
         WHERE name_en LIKE ? OR name_ar LIKE ?
         LIMIT 1
         """
         pattern = f"%{surah_name}%"
-        result = self.db.execute_query(query, (pattern, pattern))
-        return dict(result[0]) if result else None
+        result = self.db.execute_records(query, (pattern, pattern), Surah)
+        return result[0] if result else None
     
     def get_favorites(self, table_name: str) -> List[Dict]:
         """Get favorite items from any table"""
@@ -203,13 +420,16 @@ class QuranQueries:
             return []
         
         if table_name == 'quran':
-            query = f"""
-            SELECT q.*, s.name_en, s.name_ar 
-            FROM {table_name} q
+            query = """
+            SELECT q.ayatId, q.ayatNumber, q.arabicText, q.urduTranslation, q.withoutAerab,
+                   q.favourite, s.name_en, s.name_ar, q.surahId
+            FROM quran q
             JOIN surah s ON q.surahId = s.id
             WHERE q.favourite = 1
             """
-        else:
-            query = f"SELECT * FROM {table_name} WHERE favorite = 1 OR favourite = 1"
+            return self.db.execute_records(query, record_cls=Verse)
         
-        return [dict(row) for row in self.db.execute_query(query)]
\ No newline at end of file
+        record_cls = {'allah_names': AllahName, 'dua': Dua, 'surah': Surah}.get(table_name, Record)
+        select = self._select(record_cls, table_name)
+        query = f"SELECT {select} FROM {table_name} WHERE favorite = 1 OR favourite = 1"
+        return self.db.execute_records(query, record_cls=record_cls)
\ No newline at end of file
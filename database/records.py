@@ -0,0 +1,96 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, Sequence, Tuple
+
+
+class Record(Mapping):
+    """Compact, read-only row object backed by a tuple.
+
+    Rows of one result set share a single column -> position index, so each
+    record costs one small object plus its value tuple instead of a
+    sqlite3.Row and a dict. Existing dict-style access (`row['name_en']`,
+    `row.get(...)`, `dict(row)`) keeps working through the Mapping protocol,
+    and columns are also readable as attributes.
+    """
+
+    __slots__ = ("_values", "_index")
+
+    # Columns loaded for this record type; empty means every column the table has
+    COLUMNS: Tuple[str, ...] = ()
+
+    def __init__(self, values: Sequence, index: Dict[str, int]):
+        self._values = values
+        self._index = index
+
+    @classmethod
+    def columns_sql(cls, alias: str = "", columns: Sequence[str] = None) -> str:
+        """SELECT list for the given columns (defaults to COLUMNS, or `*` without them)"""
+        prefix = f"{alias}." if alias else ""
+        columns = columns or cls.COLUMNS
+        if not columns:
+            return prefix + "*"
+        unknown = set(columns) - set(cls.COLUMNS or columns)
+        if unknown:
+            raise ValueError(f"Unknown {cls.__name__} columns: {sorted(unknown)}")
+        return ", ".join(prefix + column for column in columns)
+
+    def __getitem__(self, key: str):
+        try:
+            return self._values[self._index[key]]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._values[self._index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def to_dict(self) -> Dict:
+        return dict(zip(self._index, self._values))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+class Verse(Record):
+    __slots__ = ()
+    COLUMNS = ("ayatId", "surahId", "ayatNumber", "arabicText", "withoutAerab", "urduTranslation",
+               "favourite", "name_en", "name_ar")
+
+
+# The surah, allah_names and dua tables differ between database builds;
+# QuranQueries selects the columns below that the table actually has.
+
+class Surah(Record):
+    __slots__ = ()
+    COLUMNS = ("id", "name_en", "name_ar")
+
+
+class AllahName(Record):
+    __slots__ = ()
+    COLUMNS = ("arabic", "english", "englishMeaning", "urduMeaning", "englishExplanation")
+
+
+class Dua(Record):
+    __slots__ = ()
+    COLUMNS = ("surah", "aya", "aya_number")
+
+
+class Juz(Record):
+    """Juz rows are loaded with every column the table has"""
+    __slots__ = ()
+
+
+def json_default(value):
+    """`default=` hook for json.dump(s): records become plain dicts, anything else its str()"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,192 @@
+"""Precomputed related verses.
+
+Usage:
+    python -m database.related_verses [--db quran.db] [--out indexes/related_verses.bin] [-k 10]
+
+Every verse is a TF-IDF vector over the approximate roots of its words
+(roots found in more than MAX_ROOT_SHARE of all verses, such as الله or
+من, are left out). For each verse, the k verses with the highest cosine
+similarity are written as a fixed-width table of global verse numbers
+(int16, 0 = no neighbour). At runtime the file is memory-mapped, so a
+lookup is a slice of one row and no similarity is computed per query.
+"""
+import os
+import sys
+import math
+import mmap
+import heapq
+import struct
+import argparse
+import threading
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from config.settings import Settings
+from database.concordance import approximate_root
+from database.positional_index import PositionalIndex
+from database.search_index import tokenize_text
+from utils.shared_instance import SharedInstance
+
+MAGIC = b"QRVN"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHI")    # magic, version, k, rows
+DEFAULT_K = 10
+
+# Roots in more verses than this share carry no topical signal
+MAX_ROOT_SHARE = 0.05
+# Neighbours below this cosine similarity are left as 0
+MIN_SIMILARITY = 0.05
+
+
+def compute_neighbors(verse_counts: Sequence[int], verses: Iterable[Dict], k: int = DEFAULT_K) -> array:
+    """Row-major int16 table of the k most similar verses of each verse, by global verse number"""
+    positions = PositionalIndex(verse_counts, {})
+    roots_by_verse: Dict[int, Dict[str, int]] = {}
+    for verse in verses:
+        number = positions.global_index(verse['surahId'], verse['ayatNumber'])
+        if number is None:
+            continue
+        counts = roots_by_verse.setdefault(number, {})
+        for word in tokenize_text(verse.get('withoutAerab') or verse.get('arabicText') or ""):
+            root = approximate_root(word)
+            counts[root] = counts.get(root, 0) + 1
+
+    total = positions.total
+    postings: Dict[str, List[int]] = {}
+    for number, counts in roots_by_verse.items():
+        for root in counts:
+            postings.setdefault(root, []).append(number)
+    max_verses = max(2, int(total * MAX_ROOT_SHARE))
+    idf = {
+        root: math.log(total / len(numbers))
+        for root, numbers in postings.items() if 1 < len(numbers) <= max_verses
+    }
+
+    # Sublinear TF-IDF vectors, normalized to unit length
+    vectors: Dict[int, Dict[str, float]] = {}
+    for number, counts in roots_by_verse.items():
+        vector = {root: (1 + math.log(count)) * idf[root] for root, count in counts.items() if root in idf}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            vectors[number] = {root: weight / norm for root, weight in vector.items()}
+
+    table = array("h", bytes(2 * total * k))
+    for number, vector in vectors.items():
+        scores: Dict[int, float] = {}
+        for root, weight in vector.items():
+            for other in postings[root]:
+                if other != number and other in vectors:
+                    scores[other] = scores.get(other, 0.0) + weight * vectors[other][root]
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        row = (number - 1) * k
+        for column, (other, score) in enumerate(best):
+            if score < MIN_SIMILARITY:
+                break
+            table[row + column] = other
+    return table
+
+
+def write_neighbors(path: str, table: array, k: int):
+    rows = len(table) // k
+    data = array("h", table)
+    if sys.byteorder != "little":
+        data.byteswap()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, k, rows))
+        f.write(data.tobytes())
+
+
+class RelatedVerses(SharedInstance):
+    """Memory-mapped neighbour table written by the offline job"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, neighbors: Sequence[int], k: int, positions: PositionalIndex):
+        self._neighbors = neighbors
+        self.k = k
+        self.positions = positions
+
+    @classmethod
+    def _build(cls, db_queries) -> "RelatedVerses":
+        """Shared table from Settings.INDEX_DIR; empty when the offline job has not been run"""
+        path = os.path.join(Settings.INDEX_DIR, "related_verses.bin")
+        if not os.path.exists(path):
+            # Not a failure: the feature is off until the offline job is run and the app restarted
+            logging.getLogger(__name__).info(
+                f"{path} not found; run python -m database.related_verses to enable related verses"
+            )
+            return cls((), 0, PositionalIndex([], {}))
+        positions = db_queries.positions
+        if not positions.total:
+            raise ValueError("verse positions are not loaded")
+        return cls.load(path, positions)
+
+    @classmethod
+    def _empty(cls) -> "RelatedVerses":
+        return cls((), 0, PositionalIndex([], {}))
+
+    @classmethod
+    def load(cls, path: str, positions: PositionalIndex) -> "RelatedVerses":
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, k, rows = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} related-verses file")
+        if rows != positions.total:
+            raise ValueError(f"{path} has {rows} verses but the database has {positions.total}")
+        if len(data) != HEADER.size + 2 * rows * k:
+            raise ValueError(f"{path} is truncated")
+        if sys.byteorder == "little":
+            neighbors = memoryview(data)[HEADER.size:].cast("h")
+        else:
+            neighbors = array("h", data[HEADER.size:])
+            neighbors.byteswap()
+        return cls(neighbors, k, positions)
+
+    def preload(self) -> int:
+        """Read one value per page of the mapped array so first lookups do not wait on disk"""
+        return sum(self._neighbors[::2048])
+
+    def __bool__(self) -> bool:
+        return self.k > 0
+
+    def related(self, surah_id: int, ayat_number: int, limit: int = None) -> List[Tuple[int, int]]:
+        """(surah, ayah) of the verses most related to a verse, most similar first"""
+        number = self.positions.global_index(surah_id, ayat_number)
+        if not self.k or number is None:
+            return []
+        limit = min(limit or self.k, self.k)
+        row = self._neighbors[(number - 1) * self.k:(number - 1) * self.k + limit]
+        return [self.positions.verse_at(other) for other in row if other]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute related verses from quran.db")
+    parser.add_argument("--db", default=Settings.DATABASE_PATH, help="database file (default: %(default)s)")
+    parser.add_argument("--out", default=os.path.join(Settings.INDEX_DIR, "related_verses.bin"),
+                        help="output file (default: %(default)s)")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="neighbours per verse (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    from database.connection import DatabaseManager
+    from database.queries import QuranQueries
+    queries = QuranQueries()
+    queries.db = DatabaseManager(args.db)
+    counts = {row['surahId']: row['verses'] for row in queries.get_verse_counts()}
+    if not counts:
+        print(f"No verses found in {args.db}")
+        return 1
+    verse_counts = [counts.get(surah_id, 0) for surah_id in range(1, max(counts) + 1)]
+
+    table = compute_neighbors(verse_counts, queries.iter_verses(page_size=1000), args.k)
+    write_neighbors(args.out, table, args.k)
+    filled = sum(1 for value in table if value)
+    print(f"Wrote {len(table) // args.k} x {args.k} neighbours ({filled} filled, "
+          f"{os.path.getsize(args.out) // 1024} KB) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
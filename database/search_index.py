@@ -0,0 +1,331 @@
+import re
+import math
+import string
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.shared_instance import SharedInstance
+from utils.text_normalizer import normalize_arabic
+
+# Query syntax, e.g.  صبر AND (صلاة OR زكاة) NOT عذاب  "بسم الله"  رحمة NEAR/5 مغفرة  surah:2-5
+#   word        the word with or without a leading article or conjunction (الصبر, والصبر, بالصبر)
+#   "phrase"    consecutive words, spelled exactly as written
+#   wo*rd       wildcard over the index vocabulary, with and without articles
+#   a b         same as a AND b
+#   a NEAR/n b  both within n words of each other in one verse (NEAR alone is NEAR/5)
+#   surah:n     only surah n, or surahs n to m with surah:n-m
+TOKEN_PATTERN = re.compile(r'"(?P<phrase>[^"]*)"|(?P<paren>[()])|(?P<word>[^\s()"]+)')
+FILTER_PATTERN = re.compile(r"^surah:(\d{1,3})(?:-(\d{1,3}))?$", re.IGNORECASE)
+NEAR_PATTERN = re.compile(r"^NEAR(?:/(\d{1,2}))?$", re.IGNORECASE)
+OPERATORS = {"AND", "OR", "NOT"}
+DEFAULT_NEAR = 5
+
+# Leading article forms removed for unquoted words, longest first
+ARTICLE_PREFIXES = ("وبال", "فبال", "وال", "فال", "بال", "كال", "ولل", "فلل", "لل", "ال")
+
+# Stripped from the ends of words
+PUNCTUATION = string.punctuation + "؟،؛«»…"
+
+# Expanded wildcards kept between queries
+WILDCARD_CACHE_SIZE = 256
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+class SearchQueryError(ValueError):
+    """A search query that does not parse"""
+
+
+def bare_form(word: str) -> str:
+    """Word without a leading article and the conjunction or preposition attached to it"""
+    for prefix in ARTICLE_PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= 3:
+            return word[len(prefix):]
+    return word
+
+
+def tokenize_text(text: str) -> List[str]:
+    """Normalized Arabic words of a verse or query term"""
+    words = (word.strip(PUNCTUATION) for word in normalize_arabic(text).split())
+    return [word for word in words if any("\u0621" <= ch <= "\u064a" for ch in word)]
+
+
+def parse_search_query(text: str) -> Tuple[Optional[tuple], List[Tuple[int, int]]]:
+    """
+    Parse a search query into an expression tree and surah filters.
+    Nodes: ("word", bare), ("phrase", words), ("wildcard", regex), ("and"|"or", a, b),
+    ("not", a), ("near", a, b, distance). The tree is None when the query is only filters.
+    """
+    tokens, surah_ranges = [], []
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        if match.group("phrase") is not None:
+            words = tokenize_text(match.group("phrase"))
+            if not words:
+                raise SearchQueryError(f'Empty phrase: "{match.group("phrase")}"')
+            tokens.append(("phrase", tuple(words)))
+        elif match.group("paren"):
+            tokens.append((match.group("paren"), None))
+        else:
+            word = match.group("word")
+            surah_filter = FILTER_PATTERN.match(word)
+            near = NEAR_PATTERN.match(word)
+            if surah_filter:
+                first = int(surah_filter.group(1))
+                surah_ranges.append((first, int(surah_filter.group(2) or first)))
+            elif near:
+                distance = int(near.group(1) or DEFAULT_NEAR)
+                if distance < 1:
+                    raise SearchQueryError("NEAR distance must be at least 1")
+                tokens.append(("NEAR", distance))
+            elif word.upper() in OPERATORS:
+                tokens.append((word.upper(), None))
+            elif "*" in word:
+                pattern = normalize_arabic(word.replace("*", "\0")).replace("\0", "*")
+                if not pattern.strip("*"):
+                    raise SearchQueryError("A wildcard needs at least one letter")
+                tokens.append(("wildcard", "^" + ".*".join(map(re.escape, pattern.split("*"))) + "$"))
+            else:
+                words = tokenize_text(word)
+                if not words:
+                    raise SearchQueryError(f"Not an Arabic search word: {word}")
+                # Punctuation can split one typed word; treat the parts as a phrase
+                tokens.append(("word", bare_form(words[0])) if len(words) == 1 else ("phrase", tuple(words)))
+
+    if not tokens:
+        if surah_ranges:
+            return None, surah_ranges
+        raise SearchQueryError("The query has no search words")
+    return _QueryParser(tokens).parse(), surah_ranges
+
+
+class _QueryParser:
+    """Recursive descent over: or := and (OR and)* ; and := near ((AND | NOT)? near)* ;
+    near := unary (NEAR unary)* ; unary := NOT unary | atom ; atom := word | phrase | ( or )"""
+
+    def __init__(self, tokens: List[tuple]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self) -> tuple:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self) -> tuple:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise SearchQueryError(f"Unexpected {self.peek()}")
+        return node
+
+    def parse_or(self) -> tuple:
+        node = self.parse_and()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self) -> tuple:
+        node = self.parse_near()
+        while self.peek() in ("AND", "NOT", "word", "phrase", "wildcard", "("):
+            if self.peek() == "AND":
+                self.take()
+                node = ("and", node, self.parse_near())
+            elif self.peek() == "NOT":
+                self.take()
+                node = ("and", node, ("not", self.parse_near()))
+            else:
+                node = ("and", node, self.parse_near())
+        return node
+
+    def parse_near(self) -> tuple:
+        node = self.parse_unary()
+        while self.peek() == "NEAR":
+            distance = self.take()[1]
+            node = ("near", node, self.parse_unary(), distance)
+        return node
+
+    def parse_unary(self) -> tuple:
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.parse_unary())
+        return self.parse_atom()
+
+    def parse_atom(self) -> tuple:
+        kind = self.peek()
+        if kind is None:
+            raise SearchQueryError("The query ends with an operator")
+        if kind == "(":
+            self.take()
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise SearchQueryError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind in ("word", "phrase", "wildcard"):
+            return self.take()
+        raise SearchQueryError(f"Unexpected {kind}")
+
+
+class VerseSearchIndex(SharedInstance):
+    """Positional inverted index over the Arabic text of every verse.
+
+    Each word maps to {verse number: word positions}, both under its exact
+    spelling and under its article-free form, so AND/OR/NOT are set
+    operations on verse numbers and phrases and NEAR compare positions
+    within the few verses that contain every word. Matches are ranked with
+    BM25 over the positive words of the query.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, verses: Iterable[Dict]):
+        self.verses: List[Dict] = []
+        self._exact: Dict[str, Dict[int, List[int]]] = {}
+        self._bare: Dict[str, Dict[int, List[int]]] = {}
+        self._lengths: List[int] = []
+        for number, verse in enumerate(verses):
+            self.verses.append(verse)
+            words = tokenize_text(verse.get('withoutAerab') or verse.get('arabicText') or "")
+            self._lengths.append(len(words))
+            for position, word in enumerate(words):
+                self._exact.setdefault(word, {}).setdefault(number, []).append(position)
+                self._bare.setdefault(bare_form(word), {}).setdefault(number, []).append(position)
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        self._wildcards: Dict[str, Dict[int, List[int]]] = {}
+
+    @classmethod
+    def _build(cls, db_queries) -> "VerseSearchIndex":
+        """Shared index over the shared in-memory corpus"""
+        from database.corpus import QuranCorpus
+        corpus = QuranCorpus.get_instance(db_queries)
+        if not len(corpus):
+            raise ValueError("the Quran corpus is not loaded")
+        return cls(corpus)
+
+    @classmethod
+    def _empty(cls) -> "VerseSearchIndex":
+        return cls([])
+
+    def search(self, query: str, page: int = 1, page_size: int = 20) -> Dict:
+        """
+        Run a search query.
+        Returns: {'query', 'total', 'page', 'page_size', 'pages',
+                  'results': verse dicts with a 'score', best first}
+        Raises SearchQueryError for queries that do not parse.
+        """
+        tree, surah_ranges = parse_search_query(query)
+        matches = self._evaluate(tree) if tree else {number: [] for number in range(len(self.verses))}
+        if surah_ranges:
+            matches = {
+                number: positions for number, positions in matches.items()
+                if any(first <= self.verses[number]['surahId'] <= last for first, last in surah_ranges)
+            }
+
+        scores = self._scores(tree, matches)
+        ranked = sorted(matches, key=lambda number: (-scores[number], number))
+        page, page_size = max(1, page), max(1, page_size)
+        start = (page - 1) * page_size
+        return {
+            "query": query,
+            "total": len(ranked),
+            "page": page,
+            "page_size": page_size,
+            "pages": math.ceil(len(ranked) / page_size),
+            "results": [
+                {**dict(self.verses[number]), "score": round(scores[number], 3)}
+                for number in ranked[start:start + page_size]
+            ],
+        }
+
+    def _postings(self, node: tuple) -> Dict[int, List[int]]:
+        kind = node[0]
+        if kind == "word":
+            return self._bare.get(node[1], {})
+        if kind == "wildcard":
+            if node[1] not in self._wildcards:
+                pattern = re.compile(node[1])
+                merged: Dict[int, set] = {}
+                for vocabulary in (self._exact, self._bare):
+                    for word, postings in vocabulary.items():
+                        if pattern.match(word):
+                            for number, positions in postings.items():
+                                merged.setdefault(number, set()).update(positions)
+                if len(self._wildcards) >= WILDCARD_CACHE_SIZE:
+                    self._wildcards.clear()
+                self._wildcards[node[1]] = {number: sorted(positions) for number, positions in merged.items()}
+            return self._wildcards[node[1]]
+        # Phrase: start positions where every following word is in place
+        postings = [self._exact.get(word, {}) for word in node[1]]
+        common = set(postings[0]).intersection(*postings[1:]) if all(postings) else set()
+        result = {}
+        for number in common:
+            following = [set(word_postings[number]) for word_postings in postings[1:]]
+            starts = [
+                start for start in postings[0][number]
+                if all(start + offset + 1 in positions for offset, positions in enumerate(following))
+            ]
+            if starts:
+                result[number] = starts
+        return result
+
+    def _evaluate(self, node: tuple) -> Dict[int, List[int]]:
+        """Matching verse numbers with the positions that matched"""
+        kind = node[0]
+        if kind in ("word", "phrase", "wildcard"):
+            return self._postings(node)
+        if kind == "not":
+            excluded = self._evaluate(node[1])
+            return {number: [] for number in range(len(self.verses)) if number not in excluded}
+        if kind == "or":
+            left, right = self._evaluate(node[1]), self._evaluate(node[2])
+            merged = dict(left)
+            for number, positions in right.items():
+                merged[number] = merged.get(number, []) + positions
+            return merged
+        left = self._evaluate(node[1])
+        if kind == "and" and node[2][0] == "not":
+            # a NOT b: drop b's verses instead of building the complement
+            excluded = self._evaluate(node[2][1])
+            return {number: positions for number, positions in left.items() if number not in excluded}
+        right = self._evaluate(node[2])
+        if kind == "and":
+            return {number: left[number] + right[number] for number in left.keys() & right.keys()}
+        # near
+        distance, result = node[3], {}
+        for number in left.keys() & right.keys():
+            near = {
+                position for a in left[number] for b in right[number] if abs(a - b) <= distance
+                for position in (a, b)
+            }
+            if near:
+                result[number] = sorted(near)
+        return result
+
+    def _scores(self, tree: Optional[tuple], matches: Dict[int, List[int]]) -> Dict[int, float]:
+        """BM25 of each matching verse over the query's positive words"""
+        scores = dict.fromkeys(matches, 0.0)
+        total = len(self.verses)
+        for leaf in self._positive_leaves(tree):
+            postings = self._postings(leaf)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for number in matches.keys() & postings.keys():
+                frequency = len(postings[number])
+                norm = 1 - B + B * self._lengths[number] / (self._average_length or 1)
+                scores[number] += idf * frequency * (K1 + 1) / (frequency + K1 * norm)
+        return scores
+
+    def _positive_leaves(self, node: Optional[tuple]) -> List[tuple]:
+        if node is None or node[0] == "not":
+            return []
+        if node[0] in ("word", "phrase", "wildcard"):
+            return [node]
+        if node[0] == "and" and node[2][0] == "not":
+            return self._positive_leaves(node[1])
+        return self._positive_leaves(node[1]) + self._positive_leaves(node[2])
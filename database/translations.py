@@ -0,0 +1,130 @@
+"""Translation loader for quran.db.
+
+Usage:
+    python -m database.translations load --lang en --file en.sahih.txt [--db quran.db]
+    python -m database.translations list [--db quran.db]
+
+Translations live in one normalized table, translations(ayatId, lang, text),
+with an FTS5 index over the text, so a new language is just another load.
+Input files have one verse per line as `surah|ayah|text` (the Tanzil text
+format; tabs also work, lines starting with # are skipped) or are a JSON list
+of {"surah", "ayah", "text"} objects. Loading a language replaces any earlier
+load of the same language.
+"""
+import sys
+import json
+import sqlite3
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config.settings import Settings
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS translations (
+        ayatId INTEGER NOT NULL,
+        lang TEXT NOT NULL,
+        text TEXT NOT NULL,
+        PRIMARY KEY (lang, ayatId)
+    )
+    """,
+    # External-content index: the text is stored once, in translations
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS translations_fts USING fts5(
+        text, content='translations', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+
+def parse_translation_file(path: str) -> Iterator[Tuple[int, int, str]]:
+    """(surah, ayah, text) for every verse in a translation file"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            for row in json.load(f):
+                yield int(row["surah"]), int(row["ayah"]), row["text"].strip()
+            return
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split("|", 2) if "|" in line else line.split("\t", 2)
+            if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+                raise ValueError(f"{path}:{line_number}: expected surah|ayah|text")
+            yield int(parts[0]), int(parts[1]), parts[2].strip()
+
+
+class TranslationLoader:
+    """Creates the translations schema and loads translation sets into one database file"""
+
+    def __init__(self, db_path: str = Settings.DATABASE_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+
+    def close(self):
+        self.conn.close()
+
+    def ensure_schema(self):
+        for statement in SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def load(self, lang: str, verses: Iterable[Tuple[int, int, str]]) -> Dict[str, int]:
+        """
+        Replace the translation for a language.
+        Returns counts of loaded verses and of lines whose surah:ayah is not in the quran table.
+        """
+        self.ensure_schema()
+        ayat_ids = {
+            (surah_id, ayat_number): ayat_id
+            for ayat_id, surah_id, ayat_number in self.conn.execute("SELECT ayatId, surahId, ayatNumber FROM quran")
+        }
+        rows, unknown = [], 0
+        for surah_id, ayat_number, text in verses:
+            ayat_id = ayat_ids.get((surah_id, ayat_number))
+            if ayat_id is None or not text:
+                unknown += 1
+                continue
+            rows.append((ayat_id, lang, text))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM translations WHERE lang = ?", (lang,))
+            self.conn.executemany("INSERT OR REPLACE INTO translations (ayatId, lang, text) VALUES (?, ?, ?)", rows)
+            # Rebuilding is simpler than tracking deletes in an external-content index
+            self.conn.execute("INSERT INTO translations_fts (translations_fts) VALUES ('rebuild')")
+        return {"loaded": len(rows), "unknown": unknown}
+
+    def languages(self) -> List[Tuple[str, int]]:
+        """(language, verse count) for every loaded translation"""
+        self.ensure_schema()
+        return self.conn.execute("SELECT lang, COUNT(*) FROM translations GROUP BY lang ORDER BY lang").fetchall()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load Quran translations into quran.db")
+    parser.add_argument("--db", default=Settings.DATABASE_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="load or replace one language")
+    load.add_argument("--lang", required=True, help="language code, e.g. en")
+    load.add_argument("--file", required=True, help="surah|ayah|text lines or a JSON list")
+    commands.add_parser("list", help="show loaded languages")
+    args = parser.parse_args(argv)
+
+    loader = TranslationLoader(args.db)
+    try:
+        if args.command == "load":
+            counts = loader.load(args.lang, parse_translation_file(args.file))
+            print(f"Loaded {counts['loaded']} verses for '{args.lang}'"
+                  + (f", skipped {counts['unknown']} unknown or empty" if counts["unknown"] else ""))
+        for lang, count in loader.languages():
+            print(f"{lang}: {count} verses")
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        loader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import re
+import threading
+from typing import Dict, List, Tuple
+from utils.reference_parser import ReferenceParser
+from utils.shared_instance import SharedInstance
+from utils.text_normalizer import ARABIC_DIACRITICS, normalize_arabic
+
+
+class CitationVerifier(SharedInstance):
+    """Checks the verses a generated answer cites against the in-memory corpus.
+
+    Citations are extracted with the reference parser and resolved with dict
+    lookups, so verification adds no database round trips. Cited verses get
+    their real Arabic text attached to the response sources; citations of
+    verses that do not exist, that were not in the context given to the LLM,
+    or whose quoted Arabic does not match the verse are reported as issues.
+    """
+
+    NOT_FOUND = "not_found"
+    NOT_IN_CONTEXT = "not_in_context"
+    TEXT_MISMATCH = "text_mismatch"
+
+    # Verses attached per cited range
+    MAX_CITED_VERSES = 10
+
+    # A one-line Arabic run with enough diacritics to be a Quranic quote rather than Urdu or Arabic prose
+    QUOTE_PATTERN = re.compile(r"[\u0600-\u06FF][\u0600-\u06FF \t\u200c]{8,}[\u0600-\u06FF]")
+    MIN_QUOTE_DIACRITICS = 3
+    # Quotes further than this many characters from a citation are not attributed to it
+    MAX_QUOTE_DISTANCE = 300
+    # Share of quoted words that must appear in the cited verses
+    MIN_QUOTE_OVERLAP = 0.6
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, corpus, parser: ReferenceParser):
+        self.corpus = corpus
+        self.parser = parser
+
+    @classmethod
+    def _build(cls, db_queries) -> "CitationVerifier":
+        """Shared verifier over the shared corpus and surah index"""
+        from database.corpus import QuranCorpus
+        from utils.surah_resolver import SurahResolver
+        corpus = QuranCorpus.get_instance(db_queries)
+        resolver = SurahResolver.get_instance(db_queries)
+        if not len(corpus) or not resolver.surahs:
+            raise ValueError("the Quran corpus or surah index is not loaded")
+        return cls(corpus, ReferenceParser(resolver.resolve_id))
+
+    @classmethod
+    def _empty(cls) -> "CitationVerifier":
+        from database.corpus import QuranCorpus
+        return cls(QuranCorpus([]), ReferenceParser())
+
+    def verify(self, text: str, sources: List[Dict] = None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Verify the citations in an answer.
+        Returns: (sources with verified Arabic text attached and cited verses added,
+                  issues as {'reference', 'issue'} dicts)
+        """
+        sources = [dict(source) for source in sources or []]
+        if not text or not len(self.corpus):
+            return sources, []
+
+        by_verse = {
+            (source.get('surah_id'), source.get('verse_number')): source
+            for source in sources if source.get('type') == 'verse'
+        }
+        context = set(by_verse)
+
+        issues, cited = [], []
+        for reference, span in self.parser.find_references(text):
+            if reference.whole_surah:
+                continue
+            end = min(reference.end, reference.start + self.MAX_CITED_VERSES - 1)
+            verses = self.corpus.verses(reference.surah_id, reference.start, end)
+            if None in verses:
+                issues.append({"reference": str(reference), "issue": self.NOT_FOUND})
+                continue
+            cited.append((reference, span, verses))
+
+            if context and any((verse['surahId'], verse['ayatNumber']) not in context for verse in verses):
+                issues.append({"reference": str(reference), "issue": self.NOT_IN_CONTEXT})
+
+            for verse in verses:
+                key = (verse['surahId'], verse['ayatNumber'])
+                source = by_verse.get(key)
+                if source is None:
+                    source = {
+                        "type": "verse",
+                        "surah": verse['name_en'],
+                        "verse_number": verse['ayatNumber'],
+                        "surah_id": verse['surahId'],
+                        "translation": verse.get('urduTranslation', ''),
+                        "cited": True
+                    }
+                    sources.append(source)
+                    by_verse[key] = source
+                source["arabic_text"] = verse['arabicText']
+                source["verified"] = True
+
+        issues.extend(self._check_quotes(text, cited))
+        return sources, issues
+
+    def _check_quotes(self, text: str, cited: list) -> List[Dict]:
+        """A quoted Arabic passage that matches none of the cited verses is charged to the nearest citation"""
+        if not cited:
+            return []
+        cited_words = [self._verse_words(verses) for _, _, verses in cited]
+
+        issues = []
+        for (start, end), words in self._find_quotes(text):
+            if any(self._quote_matches(words, verse_words) for verse_words in cited_words):
+                continue
+            distances = [max(start - span[1], span[0] - end, 0) for _, span, _ in cited]
+            nearest = min(range(len(cited)), key=distances.__getitem__)
+            issue = {"reference": str(cited[nearest][0]), "issue": self.TEXT_MISMATCH}
+            if distances[nearest] <= self.MAX_QUOTE_DISTANCE and issue not in issues:
+                issues.append(issue)
+        return issues
+
+    def _find_quotes(self, text: str) -> List[Tuple[Tuple[int, int], set]]:
+        """Quoted Arabic runs as (span, normalized word set)"""
+        quotes = []
+        for match in self.QUOTE_PATTERN.finditer(text):
+            if len(ARABIC_DIACRITICS.findall(match.group())) >= self.MIN_QUOTE_DIACRITICS:
+                quotes.append((match.span(), set(normalize_arabic(match.group()).split())))
+        return quotes
+
+    @staticmethod
+    def _verse_words(verses: List[Dict]) -> set:
+        words = set()
+        for verse in verses:
+            words |= set(normalize_arabic(verse.get('arabicText') or "").split())
+        return words
+
+    def _quote_matches(self, quote: set, verse_words: set) -> bool:
+        return len(quote & verse_words) >= self.MIN_QUOTE_OVERLAP * len(quote)
@@ -1,18 +1,80 @@
-import google.generativeai as genai
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Callable, Optional
 from config.settings import Settings
 from config.prompts import SYSTEM_PROMPTS
 from llm.prompt_templates import PromptTemplates
+from llm.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, LatencyTracker
 import logging
 
+# Set when an answer in the current task was built without the LLM, so callers do not cache it
+degraded_response: ContextVar[bool] = ContextVar("degraded_response", default=False)
+
 class GeminiClient:
-    def __init__(self):
-        genai.configure(api_key=Settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(model_name ='gemini-2.0-flash')
+    # Backend health is shared by every client instance
+    breaker = CircuitBreaker(Settings.LLM_BREAKER_FAILURE_THRESHOLD, Settings.LLM_BREAKER_RESET_SECONDS)
+    latency = LatencyTracker()
+    # Gemini backend shared by clients without their own, created on first use
+    _default_backend = None
+    _backend_lock = threading.Lock()
+    # Backend calls get their own bounded threads: a timed-out or hedged call keeps running
+    # until the backend returns, and must not hold the default executor the DB calls use
+    executor = ThreadPoolExecutor(max_workers=Settings.LLM_EXECUTOR_WORKERS, thread_name_prefix="llm")
+    
+    def __init__(self, backend: Optional[Callable[[str], str]] = None, breaker: CircuitBreaker = None,
+                 retry_policy: RetryPolicy = None, timeout: float = None, deadline: float = None,
+                 hedge: bool = None, hedge_after: float = None):
+        """
+        backend: blocking callable that takes the formatted prompt and returns text.
+        Defaults to Gemini, which is only imported on the first call; tests pass a local fake.
+        """
+        self._backend = backend
+        self.breaker = breaker or GeminiClient.breaker
+        self.retry_policy = retry_policy or RetryPolicy(
+            Settings.LLM_MAX_RETRIES, Settings.LLM_BACKOFF_BASE, Settings.LLM_BACKOFF_MAX
+        )
+        self.timeout = timeout if timeout is not None else Settings.LLM_TIMEOUT
+        self.deadline = deadline if deadline is not None else Settings.LLM_DEADLINE
+        self.hedge = hedge if hedge is not None else Settings.LLM_HEDGE_ENABLED
+        self.hedge_after = hedge_after if hedge_after is not None else Settings.LLM_HEDGE_AFTER
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def backend(self) -> Callable[[str], str]:
+        if self._backend is None:
+            with GeminiClient._backend_lock:
+                if GeminiClient._default_backend is None:
+                    GeminiClient._default_backend = self._create_gemini_backend()
+            self._backend = GeminiClient._default_backend
+        return self._backend
+    
+    def ensure_backend(self) -> Callable[[str], str]:
+        """Create the backend now, importing Gemini, instead of on the first request"""
+        return self.backend
+    
+    @staticmethod
+    def _create_gemini_backend() -> Callable[[str], str]:
+        """Create the default blocking Gemini backend"""
+        import google.generativeai as genai
+        
+        genai.configure(api_key=Settings.GEMINI_API_KEY)
+        model = genai.GenerativeModel(model_name ='gemini-2.0-flash')
+        
+        def generate(formatted_prompt: str) -> str:
+            return model.generate_content(formatted_prompt).text
+        
+        return generate
+    
     async def generate_response(self, prompt: str, context: str = "", language: str = "en", 
-                              response_type: str = "general") -> str:
-        """Generate response using Gemini with proper context and templates"""
+                              response_type: str = "general", conversation: str = "") -> str:
+        """
+        Generate response using Gemini with proper context and templates.
+        conversation: bounded summary of the session so far, so follow-up questions keep their context.
+        """
+        database_context = context
         try:
             # Get appropriate template
             template = PromptTemplates.get_template(response_type, language)
@@ -36,13 +98,118 @@ class GeminiClient:
                 
                 Please provide a respectful, helpful response in {language} language.
                 """
+            if conversation:
+                formatted_prompt = (
+                    f"Conversation so far (use it to resolve follow-up questions):\n{conversation}\n\n"
+                    + formatted_prompt
+                )
             
-            response = self.model.generate_content(formatted_prompt)
-            return response.text
+            return await self._call_with_retries(formatted_prompt)
             
+        except CircuitOpenError:
+            self.logger.warning("LLM circuit open, answering from database context only")
+            degraded_response.set(True)
+            return self._get_database_only_response(database_context, language, response_type)
         except Exception as e:
             self.logger.error(f"Error generating response: {e}")
+            degraded_response.set(True)
+            return self._get_database_only_response(database_context, language, response_type)
+    
+    async def _call_with_retries(self, formatted_prompt: str) -> str:
+        """Call the backend under the per-call deadline, retrying retriable errors"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        attempt = 0
+        
+        while True:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("LLM backend unhealthy")
+            
+            remaining = deadline - loop.time()
+            start = time.perf_counter()
+            recorded = False
+            try:
+                text = await self._call_with_hedging(formatted_prompt, min(self.timeout, remaining))
+                self.breaker.record_success()
+                recorded = True
+                self.latency.record(time.perf_counter() - start)
+                return text
+            except Exception as e:
+                # Only upstream trouble (timeouts, 5xx, rate limits) says the backend is unhealthy;
+                # a bad request or a safety block must not open the circuit for every user
+                retriable = self.retry_policy.is_retriable(e)
+                if retriable:
+                    self.breaker.record_failure()
+                    recorded = True
+                if attempt >= self.retry_policy.max_retries or not retriable:
+                    raise
+                
+                delay = self.retry_policy.backoff(attempt)
+                if loop.time() + delay >= deadline:
+                    raise
+                
+                self.logger.warning(f"Retrying LLM call after {type(e).__name__} (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+                attempt += 1
+            finally:
+                # A half-open trial ended by a client error or a cancellation must not keep the circuit half-open
+                if not recorded:
+                    self.breaker.release_trial()
+    
+    async def _call_with_hedging(self, formatted_prompt: str, timeout: float) -> str:
+        """Run one attempt; when hedging, send a second request once the first is slower than p95"""
+        loop = asyncio.get_running_loop()
+        first = loop.run_in_executor(self.executor, self.backend, formatted_prompt)
+        
+        hedge_delay = self._get_hedge_delay()
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await asyncio.wait_for(first, timeout)
+        
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done:
+            return first.result()
+        
+        self.logger.info(f"Hedging LLM request after {hedge_delay:.2f}s")
+        pending = {first, loop.run_in_executor(self.executor, self.backend, formatted_prompt)}
+        end = loop.time() + timeout - hedge_delay
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, end - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+                    last_error = future.exception()
+            raise last_error
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _get_hedge_delay(self) -> Optional[float]:
+        """Delay before a hedged request, or None when hedging is off or has no baseline yet"""
+        if not self.hedge:
+            return None
+        if self.hedge_after > 0:
+            return self.hedge_after
+        return self.latency.percentile(0.95)
+    
+    def _get_database_only_response(self, database_context: str, language: str,
+                                    response_type: str = "general") -> str:
+        """Templated answer built from the worker's database context when the LLM is unavailable"""
+        # The fallback context holds prompt instructions, not database content
+        if response_type == "fallback" or not database_context or not database_context.strip():
             return self._get_error_message(language)
+        
+        headers = {
+            "en": "The AI assistant is temporarily unavailable. Here is what we found in the Quran database:",
+            "ur": "اے آئی معاون عارضی طور پر دستیاب نہیں ہے۔ قرآن ڈیٹابیس سے یہ مواد ملا ہے:",
+            "ar": "المساعد الذكي غير متاح مؤقتًا. إليك ما وجدناه في قاعدة بيانات القرآن:"
+        }
+        return f"{headers.get(language, headers['en'])}\n\n{database_context.strip()}"
     
     def _get_no_database_context_message(self, language: str) -> str:
         """Return appropriate message when no database context is available"""
@@ -0,0 +1,116 @@
+import random
+import time
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the backend is unhealthy"""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker shared by all LLM clients.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls are rejected for `reset_timeout` seconds. The first call after
+    that is let through as a trial; its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go to the backend"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                # Let a single trial request through
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+    def release_trial(self):
+        """End a half-open trial that gave no verdict (a client error, a cancelled call).
+
+        The circuit re-opens for another reset period instead of staying
+        half-open with its only trial slot taken; a closed circuit is left alone.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class RetryPolicy:
+    """Retry budget with full-jitter exponential backoff"""
+
+    # Matched by class name so the policy does not depend on the Google client libraries
+    RETRIABLE_ERROR_NAMES = {
+        "TimeoutError", "ConnectionError", "ServiceUnavailable", "ResourceExhausted",
+        "InternalServerError", "DeadlineExceeded", "TooManyRequests", "GatewayTimeout"
+    }
+
+    def __init__(self, max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 4.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def is_retriable(self, error: BaseException) -> bool:
+        return any(cls.__name__ in self.RETRIABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies used to pick a hedging delay"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency at the given fraction, or None until enough samples exist"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
@@ -1,8 +1,11 @@
 import asyncio
 import logging
-import gradio as gr
 from typing import Dict, Any, List, Tuple
 from agents.orchestrator import QuranChatbotOrchestrator
+from database.search_index import SearchQueryError
+from utils.language_detector import LanguageDetector
+from utils.warmup import Warmup
+from config.settings import Settings
 
 # Configure logging
 logging.basicConfig(
@@ -13,18 +16,23 @@ logging.basicConfig(
 class QuranChatbotUI:
     """Gradio UI for Quran Chatbot"""
     
-    def __init__(self):
-        self.orchestrator = QuranChatbotOrchestrator()
+    def __init__(self, orchestrator: QuranChatbotOrchestrator = None):
+        self.orchestrator = orchestrator or QuranChatbotOrchestrator()
         self.logger = logging.getLogger(__name__)
         
-    async def process_message(self, message: str, history: List[Tuple[str, str]]) -> Tuple[str, List[Tuple[str, str]]]:
-        """Process user message and return response with updated history"""
+    async def process_message(self, message: str, history: List[Tuple[str, str]],
+                              session_id: str = None) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Process user message and return response with updated history.
+        history is only displayed; the conversation the LLM sees is the bounded
+        memory the orchestrator keeps for session_id.
+        """
         try:
             if not message.strip():
                 return "", history
             
             # Process query using orchestrator
-            response = await self.orchestrator.process_query(message)
+            response = await self.orchestrator.process_query(message, {"session_id": session_id})
             
             # Format response
             formatted_response = self._format_response(response)
@@ -60,10 +68,45 @@ class QuranChatbotUI:
                 elif source['type'] == 'dua':
                     formatted += f"{i}. Dua from Surah {source['surah']}, Verse {source['verse']}\n"
         
+        # Citations that could not be matched to the Quran text
+        issues = [
+            issue for issue in response.get('citation_issues', [])
+            if issue['issue'] in ('not_found', 'text_mismatch')
+        ]
+        if issues:
+            references = ", ".join(sorted({issue['reference'] for issue in issues}))
+            formatted += f"\n⚠️ Please double-check these references: {references}\n"
+        
         return formatted
     
+    def start_reading(self, target: str) -> Tuple[str, Any]:
+        """Open a surah, verse range or juz in reading mode; returns the first page and the next-page cursor"""
+        if not target or not target.strip():
+            return "", None
+        
+        verse_worker = self.orchestrator.verse_worker
+        scope = verse_worker.reading_scope(target)
+        if not scope:
+            return "Could not find that surah, verse range or juz. Try \"2\", \"Yasin\", \"2:255-260\" or \"juz 30\".", None
+        
+        return self.read_next(scope, LanguageDetector.detect_language(target))
+    
+    def read_next(self, cursor: Dict[str, Any], language: str = "en") -> Tuple[str, Any]:
+        """Render the page at the cursor; only one page is held at a time"""
+        if not cursor:
+            return "", None
+        
+        try:
+            response = self.orchestrator.verse_worker.read_page(cursor, language)
+            return response['content'], response['reading']['next']
+        except Exception as e:
+            self.logger.error(f"Error in reading mode: {e}")
+            return "Sorry, something went wrong. Please try again. 🤲", None
+    
     def create_interface(self):
         """Create and configure Gradio interface"""
+        # Imported here so headless and API use never pay for Gradio
+        import gradio as gr
         
         # Custom CSS for Islamic theme
         css = """
@@ -118,18 +161,33 @@ class QuranChatbotUI:
             # Example questions
             with gr.Row():
                 gr.Examples(
-                    examples=[
-                        ["Tell me about Surah Al-Fatiha"],
-                        ["What are the 99 names of Allah?"],
-                        ["Share a dua for protection"],
-                        ["Explain the meaning of Bismillah"],
-                        ["Tell me about prayer times"],
-                        ["What does the Quran say about patience?"]
-                    ],
+                    examples=[[question] for question in Settings.EXAMPLE_QUESTIONS],
                     inputs=msg,
                     label="💡 Example Questions"
                 )
             
+            # Reading mode: pages straight from the database, no LLM involved
+            with gr.Accordion("📖 Read the Quran", open=False):
+                with gr.Row():
+                    read_target = gr.Textbox(
+                        label="Surah, verse range or juz",
+                        placeholder="e.g. 2, Al-Baqarah, 2:255-260, juz 30",
+                        container=False,
+                        scale=4
+                    )
+                    read_btn = gr.Button("Start reading 📖", variant="primary", scale=1)
+                reading_page = gr.Markdown()
+                reading_cursor = gr.State(None)
+                next_page_btn = gr.Button("Next page ▶️", variant="secondary")
+                
+                read_target.submit(self.start_reading, read_target, [reading_page, reading_cursor])
+                read_btn.click(self.start_reading, read_target, [reading_page, reading_cursor])
+                next_page_btn.click(
+                    lambda cursor, target: self.read_next(cursor, LanguageDetector.detect_language(target or "")),
+                    [reading_cursor, read_target],
+                    [reading_page, reading_cursor]
+                )
+            
             # Information section
             with gr.Accordion("ℹ️ About", open=False):
                 gr.Markdown("""
@@ -138,6 +196,7 @@ class QuranChatbotUI:
                 - **Allah's Names**: Learn about the 99 beautiful names of Allah
                 - **Duas**: Access authentic Islamic prayers and supplications  
                 - **Spiritual Guidance**: Get Islamic guidance on various topics
+                - **Reading Mode**: Read a whole surah or juz page by page
                 - **Multi-language**: Supports English, Urdu, and Arabic
                 
                 ### How to use:
@@ -149,13 +208,13 @@ class QuranChatbotUI:
                 """)
             
             # Handle message submission
-            def submit_message(message, history):
+            def submit_message(message, history, request: gr.Request):
                 # Run async function in event loop
                 try:
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
                     _, updated_history = loop.run_until_complete(
-                        self.process_message(message, history)
+                        self.process_message(message, history, request.session_hash)
                     )
                     loop.close()
                     return "", updated_history
@@ -170,7 +229,11 @@ class QuranChatbotUI:
             
             # Clear chat
             clear_btn = gr.Button("🗑️ Clear Chat", variant="secondary")
-            clear_btn.click(lambda: [], outputs=chatbot)
+            def clear_chat(request: gr.Request):
+                self.orchestrator.sessions.clear(request.session_hash)
+                return []
+            
+            clear_btn.click(clear_chat, outputs=chatbot)
         
         return interface
     
@@ -189,8 +252,15 @@ class QuranChatbot:
     def __init__(self):
         self.orchestrator = QuranChatbotOrchestrator()
         self.logger = logging.getLogger(__name__)
-        self.session_history = []
-        self.ui = QuranChatbotUI()
+        self.warmup = Warmup(self.orchestrator)
+        self._ui = None
+    
+    @property
+    def ui(self) -> QuranChatbotUI:
+        """Gradio UI sharing this chatbot's orchestrator, created when first needed"""
+        if self._ui is None:
+            self._ui = QuranChatbotUI(self.orchestrator)
+        return self._ui
 
     def _display_response(self, response: Dict[str, Any]):
         """Display formatted response to user"""
@@ -211,21 +281,61 @@ class QuranChatbot:
         
         print("-" * 50)
     
-    async def process_single_query(self, query: str) -> Dict[str, Any]:
-        """Process a single query (useful for API integration)"""
-        return await self.orchestrator.process_query(query)
+    async def process_single_query(self, query: str, session_id: str = None) -> Dict[str, Any]:
+        """Process a single query (useful for API integration); pass a session_id to keep conversation context"""
+        return await self.orchestrator.process_query(query, {"session_id": session_id})
+    
+    def get_verses(self, references: str) -> List[Dict[str, Any]]:
+        """Fetch verses for a reference list such as "2:153, 2:155-157, 39:10" (useful for API integration)"""
+        return [verse.to_dict() for verse in self.orchestrator.verse_worker.get_verses(references)]
+    
+    def get_related_verses(self, reference: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Precomputed related verses of one verse such as "2:153" (useful for API integration)"""
+        verse_worker = self.orchestrator.verse_worker
+        parsed = verse_worker.reference_parser.parse(reference)
+        if not parsed or parsed.whole_surah:
+            return []
+        return [verse.to_dict() for verse in verse_worker.get_related_verses(parsed.surah_id, parsed.start, limit)]
+    
+    def advanced_search(self, query: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """Boolean/proximity verse search such as 'صبر AND صلاة surah:2-5' (useful for API integration)"""
+        try:
+            return self.orchestrator.verse_worker.db_queries.boolean_search(query, page, page_size)
+        except SearchQueryError as e:
+            return {"query": query, "error": str(e), "total": 0, "results": []}
     
     def start_ui(self, **kwargs):
         """Start the Gradio UI"""
         self.ui.launch(**kwargs)
+    
+    async def run_headless(self):
+        """Chat on the terminal without Gradio; an empty line or EOF quits"""
+        print("🌙 Quran Chatbot (headless). Press Enter on an empty line to quit.")
+        while True:
+            try:
+                query = input("\n👤 You: ").strip()
+            except (EOFError, KeyboardInterrupt):
+                break
+            if not query:
+                break
+            self._display_response(await self.process_single_query(query, session_id="cli"))
 
 # Usage example
 async def main():
     """Main function with CLI argument support"""
-    import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Quran Chatbot")
+    parser.add_argument("--headless", action="store_true", help="chat on the terminal without loading Gradio")
+    args = parser.parse_args()
     
     chatbot = QuranChatbot()
-    chatbot.start_ui()
+    report = await chatbot.warmup.run()
+    print(f"✅ Ready after a {report['total_ms']:.0f} ms warm-up")
+    if args.headless:
+        await chatbot.run_headless()
+    else:
+        chatbot.start_ui()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,26 @@
+# sample_db.py
+"""Small quran.db for tests: surahs 1-3 with every verse position and empty text"""
+import sqlite3
+from database.connection import DatabaseManager
+from database.queries import QuranQueries
+
+VERSE_COUNTS = {1: 7, 2: 286, 3: 200}
+
+
+def make_queries(path: str) -> QuranQueries:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE surah (id INTEGER PRIMARY KEY, name_en TEXT, name_ar TEXT)")
+    conn.execute("CREATE TABLE quran (ayatId INTEGER PRIMARY KEY, surahId INTEGER, ayatNumber INTEGER, "
+                 "arabicText TEXT, withoutAerab TEXT, urduTranslation TEXT, favourite INTEGER)")
+    ayat_id = 0
+    for surah_id, count in VERSE_COUNTS.items():
+        conn.execute("INSERT INTO surah VALUES (?, ?, ?)", (surah_id, f"Surah {surah_id}", ""))
+        for ayat_number in range(1, count + 1):
+            ayat_id += 1
+            conn.execute("INSERT INTO quran VALUES (?, ?, ?, '', '', '', 0)", (ayat_id, surah_id, ayat_number))
+    conn.commit()
+    conn.close()
+    
+    queries = QuranQueries()
+    queries.db = DatabaseManager(path)
+    return queries
@@ -0,0 +1,443 @@
+"""Prefork HTTP JSON API.
+
+Usage:
+    python server.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+The parent binds one listening socket and forks N worker processes that all
+accept on it; each worker has its own event loop, orchestrator and LLM client.
+The parent builds the in-memory indexes (corpus, search index, resolvers)
+before forking and freezes them out of the garbage collector, so the workers
+share those pages copy-on-write instead of each loading its own copy.
+Read-only indexes written offline (concordance, related verses) are
+memory-mapped, so the workers share one copy in the page cache. Conversation
+memory is kept in SESSION_DIR, because consecutive requests of a session
+reach different workers. Every worker
+writes its counters to its own slot of a shared anonymous mmap, which lets
+any worker answer /health and /metrics for the whole server. A worker runs
+the warm-up (utils/warmup.py) before it accepts, and /health reports
+"starting" until every worker is ready. The parent only supervises and
+restarts workers that die.
+
+Endpoints:
+    POST /query      {"query": "...", "session_id": "...", "commentary": false}
+    GET  /verses     ?ref=2:153,2:155-157
+    GET  /related    ?ref=2:153&limit=5
+    GET  /search     ?q=صبر AND صلاة&page=1&page_size=20
+    GET  /health
+    GET  /metrics
+"""
+import gc
+import os
+import sys
+import json
+import mmap
+import time
+import socket
+import signal
+import struct
+import asyncio
+import argparse
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from config.settings import Settings
+from database.records import json_default
+
+# Per-worker counters, all doubles so a slot is written with one pack_into
+SLOT_FIELDS = ("pid", "started", "heartbeat", "ready", "warmup_ms", "requests", "errors", "in_flight",
+               "latency_total", "latency_max")
+SLOT = struct.Struct("<" + "d" * len(SLOT_FIELDS))
+
+HEARTBEAT_SECONDS = 2.0
+MAX_BODY_BYTES = 64 * 1024
+KEEPALIVE_TIMEOUT = 15.0
+# A worker that dies sooner than this after starting is restarted only after a pause
+MIN_WORKER_LIFETIME = 1.0
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class WorkerMetrics:
+    """Counters of one worker process, mirrored into its slot of the shared map"""
+
+    def __init__(self, shared_map: mmap.mmap, slot: int):
+        self._map = shared_map
+        self._offset = slot * SLOT.size
+        self.values = dict.fromkeys(SLOT_FIELDS, 0.0)
+
+    def start(self):
+        now = time.time()
+        self.values = dict.fromkeys(SLOT_FIELDS, 0.0)
+        self.values.update(pid=float(os.getpid()), started=now, heartbeat=now)
+        self._flush()
+
+    def set_ready(self, warmup_ms: float):
+        self.values.update(ready=1.0, warmup_ms=warmup_ms)
+        self._flush()
+
+    def heartbeat(self):
+        self.values["heartbeat"] = time.time()
+        self._flush()
+
+    def request_started(self):
+        self.values["in_flight"] += 1
+        self._flush()
+
+    def request_finished(self, latency: float, error: bool = False):
+        values = self.values
+        values["in_flight"] -= 1
+        values["requests"] += 1
+        values["errors"] += error
+        values["latency_total"] += latency
+        values["latency_max"] = max(values["latency_max"], latency)
+        self._flush()
+
+    def _flush(self):
+        SLOT.pack_into(self._map, self._offset, *(self.values[field] for field in SLOT_FIELDS))
+
+
+class SharedMetrics:
+    """Anonymous shared memory with one counter slot per worker, created before forking"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._map = mmap.mmap(-1, SLOT.size * workers)
+
+    def slot(self, index: int) -> WorkerMetrics:
+        return WorkerMetrics(self._map, index)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Counters of every worker slot; a slot may be up to one update behind its worker"""
+        now = time.time()
+        workers = []
+        for index in range(self.workers):
+            values = dict(zip(SLOT_FIELDS, SLOT.unpack_from(self._map, index * SLOT.size)))
+            requests = int(values["requests"])
+            workers.append({
+                "slot": index,
+                "pid": int(values["pid"]),
+                "healthy": values["pid"] > 0 and now - values["heartbeat"] < 3 * HEARTBEAT_SECONDS,
+                "ready": bool(values["ready"]),
+                "warmup_ms": round(values["warmup_ms"], 1),
+                "uptime": round(now - values["started"], 1) if values["pid"] else 0.0,
+                "requests": requests,
+                "errors": int(values["errors"]),
+                "in_flight": int(values["in_flight"]),
+                "latency_avg_ms": round(1000 * values["latency_total"] / requests, 1) if requests else 0.0,
+                "latency_max_ms": round(1000 * values["latency_max"], 1),
+            })
+        return workers
+
+    def aggregate(self) -> Dict[str, Any]:
+        workers = self.snapshot()
+        requests = sum(worker["requests"] for worker in workers)
+        latency_total = sum(worker["latency_avg_ms"] * worker["requests"] for worker in workers)
+        return {
+            "workers": len(workers),
+            "healthy_workers": sum(worker["healthy"] for worker in workers),
+            "ready_workers": sum(worker["ready"] for worker in workers),
+            "requests": requests,
+            "errors": sum(worker["errors"] for worker in workers),
+            "in_flight": sum(worker["in_flight"] for worker in workers),
+            "latency_avg_ms": round(latency_total / requests, 1) if requests else 0.0,
+            "latency_max_ms": max((worker["latency_max_ms"] for worker in workers), default=0.0),
+            "per_worker": workers,
+        }
+
+
+class JsonApi:
+    """HTTP/1.1 JSON endpoints of one worker process, served with keep-alive"""
+
+    def __init__(self, orchestrator, metrics: SharedMetrics, worker_metrics: WorkerMetrics):
+        self.orchestrator = orchestrator
+        self.metrics = metrics
+        self.worker_metrics = worker_metrics
+        self.logger = logging.getLogger(__name__)
+        self.routes = {
+            ("POST", "/query"): self.query,
+            ("GET", "/verses"): self.verses,
+            ("GET", "/related"): self.related,
+            ("GET", "/search"): self.search,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.aggregate_metrics,
+        }
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = await self._serve_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Client went away, or an idle keep-alive connection was cancelled at shutdown
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> bool:
+        started = time.perf_counter()
+        self.worker_metrics.request_started()
+        status, payload, keep_alive = 500, {"error": "internal error"}, False
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+            headers = await self._read_headers(reader)
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HttpError(413, f"request body over {MAX_BODY_BYTES} bytes")
+            body = await reader.readexactly(length) if length else b""
+            status, payload = 200, await self.dispatch(method, target, body)
+        except HttpError as e:
+            status, payload = e.status, {"error": str(e)}
+        except ValueError:
+            status, payload = 400, {"error": "malformed request"}
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            self.logger.error(f"Error serving {request_line!r}: {e}")
+        finally:
+            self.worker_metrics.request_finished(time.perf_counter() - started, status >= 500)
+
+        body = json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        return keep_alive
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.strip():
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Any:
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HttpError(405, f"{method} not allowed on {url.path}")
+            raise HttpError(404, f"no endpoint {url.path}")
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if body:
+            try:
+                params.update(json.loads(body.decode("utf-8")))
+            except (UnicodeDecodeError, json.JSONDecodeError, TypeError):
+                raise HttpError(400, "body must be a JSON object")
+        return await handler(params)
+
+    async def query(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if not str(params.get("query") or "").strip():
+            raise HttpError(400, "query is required")
+        return await self.orchestrator.process_query(str(params["query"]), {
+            "session_id": params.get("session_id"),
+            "commentary": bool(params.get("commentary")),
+        })
+
+    async def verses(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [verse.to_dict() for verse in self.orchestrator.verse_worker.get_verses(self._required(params, "ref"))]
+
+    async def related(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        verse_worker = self.orchestrator.verse_worker
+        reference = verse_worker.reference_parser.parse(self._required(params, "ref"))
+        if not reference or reference.whole_surah:
+            raise HttpError(400, "ref must name one verse, such as 2:153")
+        verses = verse_worker.get_related_verses(reference.surah_id, reference.start, int(params.get("limit") or 5))
+        return [verse.to_dict() for verse in verses]
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        from database.search_index import SearchQueryError
+        try:
+            return self.orchestrator.verse_worker.db_queries.boolean_search(
+                self._required(params, "q"), int(params.get("page") or 1), int(params.get("page_size") or 20)
+            )
+        except SearchQueryError as e:
+            raise HttpError(400, str(e))
+
+    async def health(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        workers = self.metrics.snapshot()
+        serving = sum(worker["healthy"] and worker["ready"] for worker in workers)
+        warming = sum(worker["healthy"] and not worker["ready"] for worker in workers)
+        return {
+            "status": "ok" if serving == len(workers) else "starting" if serving + warming == len(workers)
+            else "degraded" if serving else "down",
+            "pid": os.getpid(),
+            "workers": [{key: worker[key] for key in ("slot", "pid", "healthy", "ready", "warmup_ms", "uptime")}
+                        for worker in workers],
+        }
+
+    async def aggregate_metrics(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.metrics.aggregate()
+
+    @staticmethod
+    def _required(params: Dict[str, Any], name: str) -> str:
+        value = str(params.get(name) or "").strip()
+        if not value:
+            raise HttpError(400, f"{name} is required")
+        return value
+
+
+async def _heartbeat(worker_metrics: WorkerMetrics):
+    """Refresh the worker's heartbeat every HEARTBEAT_SECONDS until cancelled"""
+    while True:
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        worker_metrics.heartbeat()
+
+
+async def _run_worker(sock: socket.socket, metrics: SharedMetrics, slot: int):
+    """Event loop of one worker: its own orchestrator and LLM client, accepting on the shared socket"""
+    from agents.orchestrator import QuranChatbotOrchestrator
+    from utils.query_log import QueryLog
+    from utils.session_memory import FileSessionStore
+    from utils.warmup import Warmup
+    worker_metrics = metrics.slot(slot)
+    # One query log per worker: rotating one file from several processes would lose entries
+    query_log = QueryLog.get_instance(f"{Settings.QUERY_LOG_PATH}.worker{slot}") \
+        if Settings.QUERY_LOG_ENABLED else None
+    orchestrator = QuranChatbotOrchestrator()
+    # A session's next request may reach any worker
+    orchestrator.sessions = FileSessionStore()
+    api = JsonApi(orchestrator, metrics, worker_metrics)
+    worker_metrics.start()
+    # Beat from the start: a warm-up longer than the health window must read as starting, not dead
+    heartbeat = asyncio.create_task(_heartbeat(worker_metrics))
+    try:
+        # Accept only once warm; meanwhile the other workers take the connections
+        report = await Warmup(orchestrator).run()
+        worker_metrics.set_ready(report["total_ms"])
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        server = await asyncio.start_server(api.serve_connection, sock=sock)
+        logging.getLogger(__name__).info(f"Worker {slot} (pid {os.getpid()}) serving")
+        await stop.wait()
+        server.close()
+        await server.wait_closed()
+    finally:
+        heartbeat.cancel()
+        # Workers leave through os._exit, which skips atexit
+        if query_log:
+            query_log.close()
+
+
+def preload_indexes():
+    """Build the shared in-memory indexes once, in the parent, for the workers to inherit"""
+    from utils.warmup import preload_shared_indexes
+    timings = preload_shared_indexes()
+    # Keep the collector from touching, and so copying, the inherited objects in every worker
+    gc.freeze()
+    logging.getLogger(__name__).info(f"Preloaded shared indexes in {sum(timings.values()):.0f} ms: {timings}")
+
+
+def _spawn(sock: socket.socket, metrics: SharedMetrics, slot: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    status = 0
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        asyncio.run(_run_worker(sock, metrics, slot))
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Worker {slot} failed: {e}")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def serve(host: str = None, port: int = None, workers: int = None):
+    """Bind once, fork the workers and keep them running until SIGTERM or SIGINT"""
+    logger = logging.getLogger(__name__)
+    host = host or Settings.SERVER_HOST
+    port = port if port is not None else Settings.SERVER_PORT
+    workers = workers or Settings.SERVER_WORKERS or os.cpu_count() or 1
+
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.setblocking(False)
+    if not hasattr(os, "fork"):
+        logger.warning("fork is not available on this platform, serving from a single process")
+        workers = 1
+    metrics = SharedMetrics(workers)
+    preload_indexes()
+    logger.info(f"Listening on http://{host}:{port} with {workers} worker process(es)")
+    if workers == 1:
+        asyncio.run(_run_worker(sock, metrics, 0))
+        return
+
+    children: Dict[int, Tuple[int, float]] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        children[_spawn(sock, metrics, slot)] = (slot, time.monotonic())
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot, started = children.pop(pid, (None, 0.0))
+        if slot is None or stopping:
+            continue
+        logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}, restarting")
+        if time.monotonic() - started < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        children[_spawn(sock, metrics, slot)] = (slot, time.monotonic())
+    sock.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the chatbot as a JSON API from several processes")
+    parser.add_argument("--host", default=Settings.SERVER_HOST, help="bind address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=Settings.SERVER_PORT, help="port (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=Settings.SERVER_WORKERS,
+                        help="worker processes, 0 for one per CPU (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
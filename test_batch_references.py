@@ -0,0 +1,18 @@
+# test_batch_references.py
+import os
+import tempfile
+from sample_db import make_queries
+
+
+def test_batch_references():
+    with tempfile.TemporaryDirectory() as directory:
+        queries = make_queries(os.path.join(directory, "quran.db"))
+        
+        verses = queries.get_verses_by_references([(3, 10), (2, 155, 157), (1, 1), (2, 300)])
+        assert [(v['surahId'], v['ayatNumber']) for v in verses] == [(3, 10), (2, 155), (2, 156), (2, 157), (1, 1)]
+        assert len(queries.get_verses_by_references([(2, 1, 286)], limit=10)) == 10
+        assert queries.get_verses_by_references([]) == []
+
+
+if __name__ == "__main__":
+    test_batch_references()
@@ -0,0 +1,39 @@
+# test_citation_verifier.py
+from database.corpus import QuranCorpus
+from llm.citation_verifier import CitationVerifier
+from utils.reference_parser import ReferenceParser
+
+VERSES = [
+    {"surahId": 2, "ayatNumber": 153, "name_en": "Al-Baqarah", "urduTranslation": "",
+     "arabicText": "يَا أَيُّهَا الَّذِينَ آمَنُوا اسْتَعِينُوا بِالصَّبْرِ وَالصَّلَاةِ ۚ إِنَّ اللَّهَ مَعَ الصَّابِرِينَ"},
+    {"surahId": 39, "ayatNumber": 10, "name_en": "Az-Zumar", "urduTranslation": "",
+     "arabicText": "إِنَّمَا يُوَفَّى الصَّابِرُونَ أَجْرَهُم بِغَيْرِ حِسَابٍ"},
+]
+
+
+def test_citation_verifier():
+    verifier = CitationVerifier(QuranCorpus(VERSES), ReferenceParser(lambda name: 2 if "baqarah" in name.lower() else None))
+    context = [{"type": "verse", "surah": "Al-Baqarah", "verse_number": 153, "surah_id": 2}]
+    
+    answer = (
+        "Allah says in Surah Al-Baqarah (2), Verse 153:\n"
+        "إِنَّ اللَّهَ مَعَ الصَّابِرِينَ\n"
+        "See also 39:10 and 2:300.\n"
+    )
+    sources, issues = verifier.verify(answer, context)
+    print(issues)
+    assert {"reference": "2:300", "issue": "not_found"} in issues
+    assert {"reference": "39:10", "issue": "not_in_context"} in issues
+    assert not any(issue["issue"] == "text_mismatch" for issue in issues)
+    assert [(source["surah_id"], source["verse_number"], source["verified"]) for source in sources] == \
+        [(2, 153, True), (39, 10, True)]
+    assert sources[0]["arabic_text"] == VERSES[0]["arabicText"]
+    assert context[0].get("verified") is None, "input sources must not be modified"
+    
+    # A quote that matches none of the cited verses
+    _, issues = verifier.verify("As 39:10 says:\nقُلْ هُوَ اللَّهُ أَحَدٌ اللَّهُ الصَّمَدُ", [])
+    assert issues == [{"reference": "39:10", "issue": "text_mismatch"}]
+
+
+if __name__ == "__main__":
+    test_citation_verifier()
@@ -0,0 +1,41 @@
+# test_concordance.py
+import os
+import tempfile
+from database.concordance import Concordance, approximate_root
+
+VERSES = [
+    (1, 1, "بسم الله الرحمن الرحيم"),
+    (1, 2, "الحمد لله رب العالمين"),
+    (2, 1, "واستعينوا بالصبر والصلاة"),
+    (2, 2, "إن الله مع الصابرين"),
+    (2, 3, "وبشر الصابرين الذين إذا أصابتهم مصيبة قالوا إنا لله"),
+]
+
+
+def test_concordance():
+    concordance = Concordance.build(
+        [2, 3],
+        ({"surahId": surah_id, "ayatNumber": ayat_number, "withoutAerab": text} for surah_id, ayat_number, text in VERSES)
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "concordance.bin")
+        concordance.save(path)
+        loaded = Concordance.load(path)
+
+    counts = loaded.lookup("الصابرين")
+    print(f"الصابرين -> {counts}")
+    assert counts["occurrences"] == 2 and counts["verses"] == [(2, 2), (2, 3)]
+    # The root groups الصبر with الصابرين
+    assert counts["root"] == approximate_root("صبر") == "صبر"
+    assert counts["root_occurrences"] == 3 and counts["root_verses"] == [(2, 1), (2, 2), (2, 3)]
+
+    # Diacritics, articles and punctuation do not matter
+    assert loaded.lookup("الرَّحِيمِ؟")["verses"] == [(1, 1)]
+    allah = loaded.lookup("الله")
+    assert allah["occurrences"] == 2 and allah["root_occurrences"] == 4
+    assert loaded.lookup("زكاة") is None
+
+
+if __name__ == "__main__":
+    test_concordance()
@@ -0,0 +1,97 @@
+# test_concurrent_search.py
+import asyncio
+import logging
+import threading
+import time
+from utils.enhance_search_utility import EnhancedSearchUtility
+
+
+def make_utility(strategies):
+    """A search utility running the given (name, callable) strategies, without a database"""
+    utility = EnhancedSearchUtility.__new__(EnhancedSearchUtility)
+    utility.logger = logging.getLogger("test_concurrent_search")
+    utility.last_search_stats = {}
+    utility._build_strategies = lambda query, language: strategies
+    return utility
+
+
+def after(seconds, results):
+    def search():
+        time.sleep(seconds)
+        return results
+    return search
+
+
+def test_priority_order():
+    # Topic search finishes first, but direct search ranks above it
+    utility = make_utility([
+        ("direct_search", after(0.1, ["direct"])),
+        ("topic_search", after(0, ["topic"])),
+    ])
+    results, has_results, strategy = asyncio.run(utility.smart_search_concurrent("patience", "en"))
+    assert (results, has_results, strategy) == (["direct"], True, "direct_search")
+
+    # Empty higher-priority strategies hand over to the next one
+    utility = make_utility([
+        ("direct_search", after(0.05, [])),
+        ("concept_mapping", after(0, [])),
+        ("topic_search", after(0.02, ["topic"])),
+    ])
+    assert asyncio.run(utility.smart_search_concurrent("patience", "en"))[2] == "topic_search"
+    stats = utility.last_search_stats
+    print(f"Stats: {stats}")
+    assert stats["strategy"] == "topic_search" and not stats["timed_out"]
+    assert set(stats["timings"]) == {"direct_search", "concept_mapping", "topic_search"}
+
+
+def test_lower_priority_cancelled():
+    release = threading.Event()
+    utility = make_utility([
+        ("direct_search", after(0, ["direct"])),
+        ("keyword_extraction", lambda: release.wait(5) and []),
+    ])
+
+    async def search():
+        try:
+            return await utility.smart_search_concurrent("patience", "en")
+        finally:
+            release.set()
+
+    assert asyncio.run(search())[2] == "direct_search"
+    assert utility.last_search_stats["cancelled"] == ["keyword_extraction"]
+
+
+def test_timeout_and_errors():
+    release = threading.Event()
+
+    def broken():
+        raise RuntimeError("database is locked")
+
+    utility = make_utility([
+        ("direct_search", lambda: release.wait(5) and ["late"]),
+        ("concept_mapping", broken),
+        ("topic_search", after(0, ["topic"])),
+    ])
+
+    async def search():
+        started = time.perf_counter()
+        try:
+            return await utility.smart_search_concurrent("patience", "en", timeout=0.2), time.perf_counter() - started
+        finally:
+            release.set()
+
+    (results, has_results, strategy), elapsed = asyncio.run(search())
+    assert elapsed < 1
+    assert (results, strategy) == (["topic"], "topic_search")
+    stats = utility.last_search_stats
+    assert stats["timed_out"] == ["direct_search"] and "concept_mapping" in stats["timings"]
+
+    # Nothing found anywhere
+    utility = make_utility([("direct_search", broken), ("topic_search", after(0, []))])
+    assert asyncio.run(utility.smart_search_concurrent("patience", "en")) == ([], False, "no_results")
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_lower_priority_cancelled()
+    test_timeout_and_errors()
@@ -0,0 +1,73 @@
+# test_dua_index.py
+from utils.dua_index import DuaCategoryIndex
+
+DUAS = [
+    {"surah": "2", "aya_number": 201, "aya": "رَبَّنَا آتِنَا فِي الدُّنْيَا حَسَنَةً وَقِنَا عَذَابَ النَّارِ"},
+    {"surah": "Al-Baqarah", "aya_number": 286, "aya": "رَبَّنَا لَا تُؤَاخِذْنَا وَاغْفِرْ لَنَا وَارْحَمْنَا"},
+    {"surah": "7", "aya_number": 23, "aya": "رَبَّنَا ظَلَمْنَا أَنفُسَنَا وَإِن لَّمْ تَغْفِرْ لَنَا"},
+    {"surah": "20", "aya_number": 114, "aya": "رَّبِّ زِدْنِي عِلْمًا"},
+    {"surah": "Unknown", "aya_number": None, "aya": "اللَّهُمَّ إِنِّي أَسْأَلُكَ الْعَافِيَةَ"},
+]
+
+CATEGORIES = {
+    "forgiveness": ["forgive", "mercy"],
+    "knowledge": ["knowledge", "learn"],
+    "health": ["health", "cure"],
+    "general": ["dua"],
+}
+
+CONTENT_TERMS = {
+    "forgiveness": ["اغفر", "تغفر", "ارحمنا"],
+    "knowledge": ["علما"],
+    "general": ["ربنا"],
+}
+
+
+class FakeVerses:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, references):
+        self.calls.append(references)
+        return [{"surahId": surah, "ayatNumber": number, "text": f"{surah}:{number}"} for surah, number in references]
+
+
+def test_category_ranking():
+    verses = FakeVerses()
+    index = DuaCategoryIndex(DUAS, CATEGORIES, CONTENT_TERMS, verses_lookup=verses,
+                             surah_lookup=lambda name: 2 if "baqarah" in name.lower() else None)
+
+    # Every reference is resolved in one batch, surah names included
+    assert verses.calls == [[(2, 201), (2, 286), (7, 23), (20, 114)]]
+
+    # 2:286 holds two forgiveness terms, 7:23 one
+    forgiveness = index.lookup("forgiveness")
+    assert [entry["dua"]["aya_number"] for entry in forgiveness] == [286, 23]
+    assert [entry["verse"]["text"] for entry in forgiveness] == ["2:286", "7:23"]
+    assert [entry["dua"]["aya_number"] for entry in index.lookup("knowledge")] == [114]
+    assert len(index.lookup("forgiveness", limit=1)) == 1
+
+    # A dua without a resolvable reference is kept, without a verse
+    unlinked = [entry for entry in index.lookup("general", limit=10) if entry["verse"] is None]
+    assert [entry["dua"]["surah"] for entry in unlinked] == ["Unknown"]
+
+
+def test_general_fallback():
+    index = DuaCategoryIndex(DUAS + [dict(DUAS[3])], CATEGORIES, CONTENT_TERMS)
+
+    # General matches lead, then every other dua once, in table order
+    general = index.lookup("general", limit=10)
+    print(f"General: {[entry['dua']['aya_number'] for entry in general]}")
+    assert [entry["dua"]["aya_number"] for entry in general] == [201, 286, 23, 114, None]
+
+    # Categories without matching duas, and unknown ones, fall back to the general list
+    assert index.lookup("health") == general[:3]
+    assert index.lookup("travel", limit=10) == general
+
+    empty = DuaCategoryIndex([], CATEGORIES, CONTENT_TERMS)
+    assert empty.lookup("forgiveness") == [] and empty.lookup("general") == []
+
+
+if __name__ == "__main__":
+    test_category_ranking()
+    test_general_fallback()
@@ -0,0 +1,77 @@
+# test_fragment_cache.py
+from agents.workers.verse_worker import VerseWorker
+from utils.fragment_cache import FragmentCache, TEMPLATE_VERSION, verse_key, dua_key
+
+VERSES = [
+    {"ayatId": 8, "surahId": 2, "ayatNumber": 1, "name_en": "Al-Baqarah", "arabicText": "الم",
+     "urduTranslation": "الف لام میم"},
+    {"ayatId": 160, "surahId": 2, "ayatNumber": 153, "name_en": "Al-Baqarah",
+     "arabicText": "يَا أَيُّهَا الَّذِينَ آمَنُوا اسْتَعِينُوا بِالصَّبْرِ وَالصَّلَاةِ",
+     "translation": "O you who believe, seek help through patience and prayer"},
+]
+
+
+def test_fragment_cache():
+    cache = FragmentCache(max_entries=2)
+    calls = []
+
+    def renderer(text):
+        return lambda: calls.append(text) or text
+
+    assert cache.render("verse", 1, "en", renderer("one")) == "one"
+    assert cache.render("verse", 1, "en", renderer("changed")) == "one"
+    assert cache.render("verse", 1, "ur", renderer("one ur")) == "one ur"
+    assert calls == ["one", "one ur"]
+
+    # Least recently used fragments are evicted first
+    cache.render("verse", 1, "en", renderer("one"))
+    cache.render("verse", 2, "en", renderer("two"))
+    assert len(cache) == 2
+    cache.render("verse", 1, "en", renderer("again"))
+    assert calls == ["one", "one ur", "two"]
+    assert cache.render("verse", 1, "ur", renderer("one ur")) == "one ur"
+    assert calls[-1] == "one ur"
+
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["hits"] == 3 and stats["misses"] == 4 and stats["entries"] == 2
+    assert ("verse", 1, "ur", TEMPLATE_VERSION) in cache._fragments
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_fragment_keys():
+    assert verse_key(VERSES[0]) == 8
+    assert verse_key({"surahId": 2, "ayatNumber": 1}) == (2, 1)
+    # The same verse with another translation is another fragment
+    assert verse_key(VERSES[1]) != verse_key(dict(VERSES[1], translation="Another translation"))
+    assert dua_key({"surah": 2, "aya_number": 201, "aya": "ربنا آتنا"}) != \
+        dua_key({"surah": 2, "aya_number": 201, "aya": "ربنا"})
+
+
+def test_cached_formatting():
+    worker = VerseWorker.__new__(VerseWorker)
+    worker.fragments = FragmentCache(max_entries=100)
+
+    expected = (
+        "Relevant Quranic verses found:\n\n"
+        "1. Surah Al-Baqarah (2), Verse 1:\nArabic: الم\nUrdu Translation: الف لام میم\n\n"
+        f"2. Surah Al-Baqarah (2), Verse 153:\nArabic: {VERSES[1]['arabicText']}\n"
+        "Translation: O you who believe, seek help through patience and prayer\n\n"
+    )
+    first = worker._format_verses_context(VERSES, "ur")
+    second = worker._format_verses_context(VERSES, "ur")
+    print(first)
+    assert first == second
+    assert worker.fragments.stats()["hits"] == len(VERSES)
+    assert first == expected
+
+    sources = worker._format_verse_sources(VERSES)
+    assert worker._format_verse_sources(VERSES) == sources
+    assert [source["verse_number"] for source in sources] == [1, 153]
+
+
+if __name__ == "__main__":
+    test_fragment_cache()
+    test_fragment_keys()
+    test_cached_formatting()
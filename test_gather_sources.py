@@ -0,0 +1,66 @@
+# test_gather_sources.py
+import asyncio
+import logging
+import threading
+import time
+from agents.base_worker import BaseWorker
+
+
+class FakeWorker(BaseWorker):
+    async def process_request(self, query, language, context):
+        return {}
+
+    def can_handle(self, query, intent):
+        return False
+
+
+def make_worker():
+    """A worker without database or LLM client; gather_sources needs only the logger"""
+    worker = FakeWorker.__new__(FakeWorker)
+    worker.logger = logging.getLogger("test_gather_sources")
+    return worker
+
+
+def test_gather_sources():
+    worker = make_worker()
+    release = threading.Event()
+
+    def broken():
+        raise RuntimeError("no such table: dua")
+
+    def slow(seconds, value):
+        def source():
+            time.sleep(seconds)
+            return value
+        return source
+
+    sources = {
+        "verses": slow(0, ["2:153"]),
+        "names": slow(0.3, ["Ar-Rahman"]),         # slower than verses, within the default timeout
+        "duas": broken,
+        "hung": lambda: release.wait(5) and "late",
+    }
+
+    async def gather():
+        started = time.perf_counter()
+        try:
+            # Only the hung source has its own timeout; the others use WORKER_SOURCE_TIMEOUT
+            return await worker.gather_sources(sources, timeouts={"hung": 0.5}), time.perf_counter() - started
+        finally:
+            release.set()
+
+    fetched, elapsed = asyncio.run(gather())
+    print(f"Fetched in {elapsed * 1000:.0f} ms: {fetched}")
+    assert fetched == {"verses": ["2:153"], "names": ["Ar-Rahman"], "duas": None, "hung": None}
+    assert list(fetched) == list(sources)
+    # Sources run together: total latency is the hung source's timeout, not the sum
+    assert 0.5 <= elapsed < 1.5
+
+    # A per-source timeout shorter than a source drops only that source
+    fetched = asyncio.run(worker.gather_sources({"verses": slow(0, [1]), "names": slow(0.3, [2])},
+                                                timeouts={"names": 0.05}))
+    assert fetched == {"verses": [1], "names": None}
+
+
+if __name__ == "__main__":
+    test_gather_sources()
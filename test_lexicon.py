@@ -0,0 +1,46 @@
+# test_lexicon.py
+from config.english_handling import EnglishHandlingConfig
+from utils.lexicon import LEXICON, light_stem
+
+
+def test_lexicon():
+    test_cases = [
+        ("patience", "patience"),
+        ("Be patient", "patience"),
+        ("patiently", "patience"),
+        ("forgiving", "forgiveness"),
+        ("Allah is merciful", "mercy"),
+        ("praying at night", "prayer"),
+        ("worshipping", "worship"),
+        ("grateful", "gratitude"),
+    ]
+    for text, concept in test_cases:
+        concepts = LEXICON.concepts(text)
+        print(f"{text} -> {concepts}")
+        assert concept in concepts
+
+    # Whole words only: "today" is not "day", "evening" is not "even"
+    assert LEXICON.concepts("today") == []
+    assert LEXICON.concepts("even so") == []
+    assert light_stem("prayers") == light_stem("prayer") == light_stem("pray")
+
+    # Suffix-stripping must not land on an unrelated concept
+    assert LEXICON.concepts("current") == [] and LEXICON.concepts("currently") == []
+    assert "fasting" not in LEXICON.concepts("faster") and LEXICON.concepts("fasting") == ["fasting"]
+    assert LEXICON.concepts("hopping") == [] and LEXICON.concepts("hoping") == ["hope"]
+    assert light_stem("cured") == light_stem("cure") != light_stem("current")
+
+    # Everyday words are not concept triggers
+    assert LEXICON.concepts("What kind of dua should I read") == []
+    assert LEXICON.concepts("I want to know how many times patience is mentioned") == ["patience"]
+    assert LEXICON.concepts("How should I live") == [] and LEXICON.concepts("as fast as I can") == []
+    assert LEXICON.concepts("kindness to parents") == ["kindness", "parents"]
+    assert LEXICON.concepts("fasting in Ramadan") == ["fasting"]
+    assert LEXICON.primary_terms("I want to know how many times patience is mentioned") == ["صبر"]
+
+    assert EnglishHandlingConfig.get_arabic_terms("patience") == EnglishHandlingConfig.ENGLISH_TO_ARABIC_MAPPING["patience"]
+    assert LEXICON.primary_terms("being patient and forgiving") == ["صبر", "غفر"]
+
+
+if __name__ == "__main__":
+    test_lexicon()
@@ -0,0 +1,124 @@
+# test_llm_resilience.py
+import asyncio
+import threading
+import time
+from llm.gemini_client import GeminiClient
+from llm.resilience import CircuitBreaker, RetryPolicy
+
+
+class FakeBackend:
+    """Local stand-in for Gemini that plays back scripted behaviours"""
+    
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.calls = 0
+    
+    def __call__(self, prompt: str) -> str:
+        behaviour = self.behaviours[min(self.calls, len(self.behaviours) - 1)]
+        self.calls += 1
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        delay, text = behaviour
+        time.sleep(delay)
+        return text
+
+
+def make_client(backend, **kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    kwargs.setdefault("retry_policy", RetryPolicy(max_retries=2, backoff_base=0.01, backoff_max=0.02))
+    return GeminiClient(backend=backend, **kwargs)
+
+
+def test_retries_retriable_errors():
+    backend = FakeBackend(ConnectionError("reset"), (0, "answer"))
+    response = asyncio.run(make_client(backend).generate_response("q", "ctx"))
+    print(f"Retry response: {response} after {backend.calls} calls")
+    assert response == "answer" and backend.calls == 2
+
+
+def test_timeout_returns_database_answer():
+    backend = FakeBackend((0.5, "too late"))
+    client = make_client(backend, timeout=0.1, deadline=0.15)
+    response = asyncio.run(client.generate_response("q", "Surah Al-Fatiha, Verse 1"))
+    print(f"Timeout response: {response[:60]}")
+    assert "Surah Al-Fatiha, Verse 1" in response
+
+
+def test_hedged_request_wins():
+    backend = FakeBackend((0.5, "slow"), (0, "hedged"))
+    client = make_client(backend, hedge=True, hedge_after=0.05, timeout=1)
+    response = asyncio.run(client.generate_response("q", "ctx"))
+    print(f"Hedged response: {response}")
+    assert response == "hedged"
+
+
+def test_circuit_breaker_short_circuits():
+    backend = FakeBackend(ConnectionError("upstream down"))
+    client = make_client(backend)
+    for _ in range(3):
+        asyncio.run(client.generate_response("q", "ctx"))
+    calls_before = backend.calls
+    response = asyncio.run(client.generate_response("q", "Verse context"))
+    print(f"Breaker state: {client.breaker.state}, response: {response[:40]}")
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert backend.calls == calls_before and "Verse context" in response
+
+
+def test_client_errors_keep_circuit_closed():
+    # Bad requests and safety blocks are the caller's problem, not the backend's health
+    backend = FakeBackend(ValueError("invalid argument"))
+    client = make_client(backend)
+    for _ in range(5):
+        response = asyncio.run(client.generate_response("q", "Verse context"))
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert backend.calls == 5 and "Verse context" in response
+
+
+def test_half_open_trial_always_resolved():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+
+    # A client error on the trial says nothing about the backend: the circuit re-opens, not stuck half-open
+    now[0] = 10
+    client = make_client(FakeBackend(ValueError("safety block"), (0, "answer")), breaker=breaker)
+    assert "Verse context" in asyncio.run(client.generate_response("q", "Verse context"))
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+    now[0] = 20
+    assert asyncio.run(client.generate_response("q", "ctx")) == "answer"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # So does a trial cancelled by the caller's own timeout
+    breaker.record_failure()
+    now[0] = 30
+    client = make_client(FakeBackend((0.3, "too late"), (0, "answer")), breaker=breaker)
+
+    async def cancelled():
+        try:
+            await asyncio.wait_for(client.generate_response("q", "ctx"), 0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(cancelled())
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] = 40
+    assert asyncio.run(client.generate_response("q", "ctx")) == "answer"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_backend_runs_on_own_executor():
+    backend = FakeBackend((0, "answer"))
+    threads = []
+    client = make_client(lambda prompt: threads.append(threading.current_thread().name) or backend(prompt))
+    assert asyncio.run(client.generate_response("q", "ctx")) == "answer"
+    assert threads and threads[0].startswith("llm")
+
+
+if __name__ == "__main__":
+    test_retries_retriable_errors()
+    test_timeout_returns_database_answer()
+    test_hedged_request_wins()
+    test_circuit_breaker_short_circuits()
+    test_client_errors_keep_circuit_closed()
+    test_half_open_trial_always_resolved()
+    test_backend_runs_on_own_executor()
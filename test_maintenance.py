@@ -0,0 +1,39 @@
+# test_maintenance.py
+import os
+import sqlite3
+import tempfile
+from database.maintenance import SchemaMaintenance, print_report
+from sample_db import make_queries
+
+
+def test_index_builder():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quran.db")
+        make_queries(path)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE juz (no INTEGER, name TEXT, favourite INTEGER)")
+        conn.commit()
+        conn.close()
+        
+        maintenance = SchemaMaintenance(path)
+        try:
+            report, unsampled = maintenance.check_query_plans()
+            assert not print_report(report, unsampled), "unindexed database should fail the check"
+            
+            created = maintenance.create_indexes()
+            print(f"Created: {created}")
+            assert {"idx_quran_surah_ayat", "idx_quran_favourite", "idx_juz_no"} <= set(created)
+            maintenance.optimize()
+            
+            report, unsampled = maintenance.check_query_plans()
+            assert print_report(report, unsampled)
+            assert not unsampled
+            
+            # Running again changes nothing
+            assert maintenance.create_indexes() == []
+        finally:
+            maintenance.close()
+
+
+if __name__ == "__main__":
+    test_index_builder()
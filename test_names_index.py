@@ -0,0 +1,74 @@
+# test_names_index.py
+from utils.names_index import AllahNamesIndex
+
+NAMES = [
+    {"arabic": "الرَّحْمَٰنُ", "english": "Ar-Rahman", "englishMeaning": "The Most Merciful", "urduMeaning": "بہت مہربان"},
+    {"arabic": "الرَّحِيمُ", "english": "Ar-Raheem", "englishMeaning": "The Most Compassionate", "urduMeaning": "نہایت رحم والا"},
+    {"arabic": "السَّلَامُ", "english": "As-Salam", "englishMeaning": "The Source of Peace", "urduMeaning": "سلامتی دینے والا"},
+    {"arabic": "الْغَفَّارُ", "english": "Al-Ghaffar", "englishMeaning": "The Constant Forgiver", "urduMeaning": "بہت بخشنے والا"},
+    {"arabic": "الْغَفُورُ", "english": "Al-Ghafoor", "englishMeaning": "The All-Forgiving", "urduMeaning": "بخشنے والا"},
+    {"arabic": "الْعَلِيمُ", "english": "Al-Aleem", "englishMeaning": "The All-Knowing", "urduMeaning": "سب کچھ جاننے والا"},
+    {"arabic": "الْحَفِيظُ", "english": "Al-Hafeez", "englishMeaning": "The Preserver", "urduMeaning": "حفاظت کرنے والا"},
+]
+
+
+def english(names):
+    return [name["english"] for name in names]
+
+
+def test_lookup():
+    index = AllahNamesIndex(NAMES)
+
+    # Exact, with or without the article and hyphen
+    assert english(index.lookup("Ar-Rahman")) == ["Ar-Rahman"]
+    assert english(index.lookup("rahman")) == ["Ar-Rahman"]
+    assert english(index.lookup("Al Ghaffar")) == ["Al-Ghaffar"]
+
+    # Prefix of at least MIN_PREFIX_LENGTH letters
+    assert english(index.lookup("Ghaf")) == ["Al-Ghaffar", "Al-Ghafoor"]
+    assert index.lookup("Gh") == []
+
+    # Fuzzy: transliteration variants and typos, best first
+    assert english(index.lookup("Ar-Raheem"))[0] == "Ar-Raheem"
+    assert english(index.lookup("Rahim")) == ["Ar-Raheem"]
+    assert english(index.lookup("Ghafur"))[0] == "Al-Ghafoor"
+    assert index.lookup("Zxqwv") == []
+
+    # Arabic with and without diacritics and the article
+    assert english(index.lookup("الرَّحْمَٰنُ")) == ["Ar-Rahman"]
+    assert english(index.lookup("الرحمن")) == ["Ar-Rahman"]
+    assert english(index.lookup("رحيم")) == ["Ar-Raheem"]
+    assert english(index.lookup("الغفار")) == ["Al-Ghaffar"]
+    assert english(index.lookup("Ghaf", limit=1)) == ["Al-Ghaffar"]
+
+
+def test_by_attribute():
+    index = AllahNamesIndex(NAMES)
+    assert english(index.by_attribute("mercy")) == ["Ar-Rahman", "Ar-Raheem"]
+    assert english(index.by_attribute("Forgiveness")) == ["Al-Ghaffar", "Al-Ghafoor"]
+    assert english(index.by_attribute("peace")) == ["As-Salam"]
+    assert english(index.by_attribute("protection")) == ["Al-Hafeez"]
+    assert english(index.by_attribute("knowledge")) == ["Al-Aleem"]
+    # Keywords outside ATTRIBUTE_KEYWORDS are matched as meaning-word prefixes
+    assert english(index.by_attribute("preserver")) == ["Al-Hafeez"]
+    assert index.by_attribute("thunder") == []
+
+
+def test_search_terms_ranking():
+    index = AllahNamesIndex(NAMES)
+    text = "What does Ar-Rahman mean, and which names are about forgiveness?"
+    assert index.search_terms(text) == ["does", "Ar-Rahman", "mean", "which", "forgiveness"]
+
+    # Names follow the order of the words that found them, without repeats
+    found = english(index.search(text))
+    print(f"Search: {found}")
+    assert found == ["Ar-Rahman", "Al-Ghaffar", "Al-Ghafoor"]
+    assert english(index.search("forgiveness and mercy")) == ["Al-Ghaffar", "Al-Ghafoor", "Ar-Rahman", "Ar-Raheem"]
+    assert english(index.search("mercy Ar-Rahman", limit=2)) == ["Ar-Rahman", "Ar-Raheem"]
+    assert index.search("Tell me the names of Allah") == []
+
+
+if __name__ == "__main__":
+    test_lookup()
+    test_by_attribute()
+    test_search_terms_ranking()
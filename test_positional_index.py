@@ -0,0 +1,40 @@
+# test_positional_index.py
+from database.positional_index import PositionalIndex, JUZ_START_VERSES
+
+VERSE_COUNTS = [
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128, 111, 110, 98, 135,
+    112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73, 54, 45, 83, 182, 88, 75, 85,
+    54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60, 49, 62, 55, 78, 96, 29, 22, 24, 13,
+    14, 11, 11, 18, 12, 12, 30, 52, 52, 44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42,
+    29, 19, 36, 25, 22, 17, 19, 26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11,
+    11, 8, 3, 9, 5, 4, 7, 3, 6, 3, 5, 4, 5, 6,
+]
+
+
+def test_positional_index():
+    index = PositionalIndex(VERSE_COUNTS, {"juz": JUZ_START_VERSES})
+    assert index.total == 6236
+    
+    test_cases = [
+        ((1, 1), 1, 1),
+        ((2, 141), 148, 1),
+        ((2, 142), 149, 2),
+        ((18, 10), 2150, 15),
+        ((18, 75), 2215, 16),
+        ((114, 6), 6236, 30),
+    ]
+    for (surah_id, ayat_number), global_index, juz in test_cases:
+        position = index.locate(surah_id, ayat_number)
+        print(f"{surah_id}:{ayat_number} -> {position}")
+        assert position == {"surah": surah_id, "ayah": ayat_number, "index": global_index, "juz": juz}
+        assert index.verse_at(global_index) == (surah_id, ayat_number)
+    
+    assert index.locate(2, 287) is None
+    assert index.verse_at(6237) is None
+    assert index.division_span("juz", 30) == {"first": (78, 1), "last": (114, 6), "verses": 564}
+    assert index.division_bounds("juz", 1) == ((1, 0), (2, 142))
+    assert index.surah_span(2)["first"]["juz"] == 1 and index.surah_span(2)["last"]["juz"] == 3
+
+
+if __name__ == "__main__":
+    test_positional_index()
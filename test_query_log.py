@@ -0,0 +1,63 @@
+# test_query_log.py
+import os
+import glob
+import tempfile
+from utils.query_log import QueryLog, read_entries, summarize, prefill_questions, read_prefill, main
+
+
+def entry(query, path="routed", results=2, total=100.0, intent="verse_search", worker="VerseWorker", error=False):
+    return {"ts": 0, "query": query, "language": "en", "intent": intent, "worker": worker, "path": path,
+            "error": error, "results": results, "database": bool(results), "ms": {"answer": total - 1, "total": total}}
+
+
+ENTRIES = [
+    *[entry("what does the quran say about patience?") for _ in range(3)],
+    entry("what does the quran say about patience?", path="cache", total=5.0),
+    *[entry("2:153", path="direct", intent="verse_reference", total=3.0) for _ in range(4)],
+    entry("dua for protection", intent="dua_request", worker="DuaWorker", total=900.0),
+    entry("tell me about zakat on crypto", results=0, total=400.0),
+    entry("crypto trading", results=0, intent="general_query", worker="EnhancedFallbackResponse", total=800.0),
+    entry("broken", error=True, intent=None, worker="ErrorHandler"),
+]
+
+
+def test_query_log():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "logs", "queries.jsonl")
+        log = QueryLog(path, max_bytes=1000, backups=5)
+        for item in ENTRIES:
+            log.record(item)
+        log.close()
+        log.record(entry("after close"))
+
+        # Small files rotate; every file starting with the path is read
+        files = glob.glob(path + "*")
+        print(f"Log files: {sorted(os.path.basename(name) for name in files)}")
+        assert len(files) > 1
+        with open(path + ".worker1", "w", encoding="utf-8") as f:
+            f.write('{"query": "dua for protection", "path": "routed", "results": 1, "ms": {"total": 10}}\n{"query": "cut sh')
+        entries = list(read_entries([path]))
+        assert len(entries) == len(ENTRIES) + 1
+
+        summary = summarize(entries, top=5)
+        print(f"Summary: {summary}")
+        assert summary["entries"] == len(ENTRIES) + 1 and summary["errors"] == 1
+        assert set(summary["top_queries"][:2]) == {("what does the quran say about patience?", 4), ("2:153", 4)}
+        assert dict(summary["zero_result_words"]) == {"crypto": 2, "zakat": 1, "trading": 1}
+        slowest = summary["slowest_paths"][0]
+        assert (slowest["intent"], slowest["max_ms"], slowest["count"]) == ("dua_request", 900.0, 1)
+        assert summary["cache_hit_rate"] == round(1 / 12, 3)
+
+        # Direct answers are never cached, so they are not worth pre-answering
+        assert prefill_questions(entries, min_count=2) == ["what does the quran say about patience?", "dua for protection"]
+        assert prefill_questions(entries, min_count=1, top=1) == ["what does the quran say about patience?"]
+
+        out = os.path.join(directory, "prefill.txt")
+        assert main(["prefill", "--log", path, "--min-count", "2", "--out", out]) == 0
+        assert read_prefill(out) == ["what does the quran say about patience?", "dua for protection"]
+        assert read_prefill(os.path.join(directory, "missing.txt")) == [] and read_prefill("") == []
+        assert main(["report", "--log", path, "--top", "3"]) == 0
+
+
+if __name__ == "__main__":
+    test_query_log()
@@ -0,0 +1,67 @@
+# test_query_pipeline.py
+import dataclasses
+from agents.orchestrator import QuranChatbotOrchestrator
+from agents.workers.dua_worker import DuaWorker
+from agents.workers.guidance_worker import GuidanceWorker
+from agents.workers.learning_worker import LearningWorker
+from utils.query_pipeline import QueryPipeline, prepare_query
+from utils.validators import InputValidator
+
+KEYWORD_GROUPS = [
+    *QuranChatbotOrchestrator.INTENT_PATTERNS.values(),
+    *DuaWorker.keyword_groups(),
+    *GuidanceWorker.keyword_groups(),
+    *LearningWorker.keyword_groups(),
+]
+
+
+def test_keyword_hits():
+    pipeline = QueryPipeline(KEYWORD_GROUPS)
+
+    test_queries = [
+        "What should I do when I am worried about my family?",
+        "Explain the meaning of Surah Al-Fatiha",
+        "Teach me a dua for forgiveness of sins",
+        "Tell me about the history of hajj",
+        "صبر کے بارے میں قرآن کیا کہتا ہے",
+        "ما هو دعاء السفر",
+        "prayers and praying",
+    ]
+    for query in test_queries:
+        prepared = pipeline.prepare(query, detect_language=False)
+        print(f"{query} -> {sorted(prepared.keyword_hits)}")
+        assert prepared.is_valid
+        for group in KEYWORD_GROUPS:
+            # Same answer as the per-worker `keyword in query.lower()` checks
+            assert prepared.has_any(group) == any(keyword in query.lower() for keyword in group)
+
+    prepared = pipeline.prepare("Which surah mentions Musa in 2:60?", detect_language=False)
+    assert prepared.tokens[:2] == ("which", "surah")
+    assert prepared.script == "latin"
+    assert pipeline.prepare("سورة البقرة", detect_language=False).script == "arabic"
+
+
+def test_validation_and_immutability():
+    pipeline = QueryPipeline(KEYWORD_GROUPS)
+
+    restricted = pipeline.prepare("Tell me about political debates", detect_language=False)
+    assert not restricted.is_valid
+    assert restricted.validation_message == InputValidator.RESTRICTED_MESSAGE
+    assert not pipeline.prepare("   ", detect_language=False).is_valid
+
+    prepared = pipeline.prepare("<b>dua</b> for travel", detect_language=False)
+    assert "<" not in prepared.sanitized
+    try:
+        prepared.sanitized = "changed"
+        assert False, "PreparedQuery should be immutable"
+    except dataclasses.FrozenInstanceError:
+        pass
+
+    # Workers called directly with plain strings still work
+    assert prepare_query(prepared) is prepared
+    assert prepare_query("A dua for travel").has_any(DuaWorker.DUA_CATEGORIES['travel'])
+
+
+if __name__ == "__main__":
+    test_keyword_hits()
+    test_validation_and_immutability()
@@ -0,0 +1,28 @@
+# test_reading_mode.py
+import os
+import tempfile
+from sample_db import make_queries
+
+
+def test_keyset_pagination():
+    with tempfile.TemporaryDirectory() as directory:
+        queries = make_queries(os.path.join(directory, "quran.db"))
+        
+        verses = [(v['surahId'], v['ayatNumber']) for v in queries.iter_surah_verses(2, page_size=50)]
+        print(f"Surah 2: {len(verses)} verses")
+        assert verses == [(2, n) for n in range(1, 287)]
+        
+        resumed = [v['ayatNumber'] for v in queries.iter_surah_verses(2, after_ayat=280, page_size=4)]
+        assert resumed == [281, 282, 283, 284, 285, 286]
+        
+        # Juz 1 runs from 1:1 up to the verse before 2:142
+        juz_one = list(queries.iter_juz_verses(1, page_size=25))
+        assert len(juz_one) == 7 + 141
+        assert (juz_one[-1]['surahId'], juz_one[-1]['ayatNumber']) == (2, 141)
+        
+        page = queries.get_verse_page((2, 284), limit=5)
+        assert [(v['surahId'], v['ayatNumber']) for v in page] == [(2, 285), (2, 286), (3, 1), (3, 2), (3, 3)]
+
+
+if __name__ == "__main__":
+    test_keyset_pagination()
@@ -0,0 +1,94 @@
+# test_records.py
+import json
+import os
+import sqlite3
+import tempfile
+from database.connection import DatabaseManager
+from database.queries import QuranQueries
+from database.records import Record, Verse, Surah, AllahName, Dua, json_default
+from utils.cache_manager import CacheManager
+
+
+def make_verse():
+    index = {"surahId": 0, "ayatNumber": 1, "arabicText": 2}
+    return Verse((2, 255, "اللَّهُ لَا إِلَٰهَ إِلَّا هُوَ"), index)
+
+
+def test_mapping():
+    verse = make_verse()
+    assert verse["ayatNumber"] == 255 and verse.surahId == 2
+    assert verse.get("name_en") is None and verse.get("name_en", "") == ""
+    assert "arabicText" in verse and "favourite" not in verse
+    assert list(verse) == ["surahId", "ayatNumber", "arabicText"] and len(verse) == 3
+    assert dict(verse) == verse.to_dict() == {"surahId": 2, "ayatNumber": 255, "arabicText": verse["arabicText"]}
+    assert verse == {"surahId": 2, "ayatNumber": 255, "arabicText": verse["arabicText"]}
+    assert {**verse, "translation": "Allah"}["translation"] == "Allah"
+
+    try:
+        value = verse["name_en"]
+        assert False, f"missing column should raise KeyError, got {value!r}"
+    except KeyError as e:
+        assert e.args == ("name_en",)
+    try:
+        value = verse.name_en
+        assert False, f"missing column should raise AttributeError, got {value!r}"
+    except AttributeError:
+        pass
+    assert repr(verse).startswith("Verse({'surahId': 2")
+
+
+def test_columns_sql():
+    assert Verse.columns_sql(columns=["surahId", "ayatNumber"]) == "surahId, ayatNumber"
+    assert Verse.columns_sql("q").startswith("q.ayatId, q.surahId")
+    try:
+        Verse.columns_sql(columns=["surahId", "password"])
+        assert False, "unknown columns should be rejected"
+    except ValueError as e:
+        assert "password" in str(e)
+
+    # Only records without COLUMNS load every column
+    assert Surah.columns_sql() == "id, name_en, name_ar" and Dua.columns_sql("d") == "d.surah, d.aya, d.aya_number"
+    assert Record.columns_sql("s") == "s.*" and Record.columns_sql(columns=["tasbih"]) == "tasbih"
+
+
+def test_schema_columns():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quran.db")
+        conn = sqlite3.connect(path)
+        # A build without englishExplanation and with an id and a favourite flag
+        conn.execute("CREATE TABLE allah_names (id INTEGER, arabic TEXT, english TEXT, englishMeaning TEXT, urduMeaning TEXT, favourite INTEGER)")
+        conn.execute("INSERT INTO allah_names VALUES (1, 'الرَّحْمَٰنُ', 'Ar-Rahman', 'The Most Merciful', 'بہت مہربان', 1)")
+        conn.commit()
+        conn.close()
+
+        queries = QuranQueries()
+        queries.db = DatabaseManager(path)
+        assert queries.table_columns("allah_names") == ("id", "arabic", "english", "englishMeaning", "urduMeaning", "favourite")
+
+        # Only the declared columns this build has are loaded
+        expected = {"arabic": "الرَّحْمَٰنُ", "english": "Ar-Rahman", "englishMeaning": "The Most Merciful", "urduMeaning": "بہت مہربان"}
+        assert queries.get_all_allah_names()[0].to_dict() == expected
+        assert [dict(name) for name in queries.get_allah_names("Merciful")] == [expected]
+
+
+def test_json():
+    verse = make_verse()
+    response = {"response": "...", "verses": [verse], "metadata": {"names": (AllahName(("Ar-Rahman",), {"english": 0}),)}}
+
+    encoded = json.loads(json.dumps(response, ensure_ascii=False, default=json_default))
+    assert encoded["verses"] == [verse.to_dict()]
+    assert encoded["metadata"]["names"] == [{"english": "Ar-Rahman"}]
+    assert json.dumps({"at": object}, default=json_default) == json.dumps({"at": str(object)})
+
+    # The response cache stores records as their columns instead of dropping the write
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CacheManager(cache_dir=directory)
+        cache.set("ayat al kursi", "en", response)
+        assert cache.get("ayat al kursi", "en") == encoded
+
+
+if __name__ == "__main__":
+    test_mapping()
+    test_columns_sql()
+    test_schema_columns()
+    test_json()
@@ -0,0 +1,48 @@
+# test_reference_parser.py
+from utils.reference_parser import ReferenceParser, VerseReference
+
+SURAH_NAMES = {"al-baqarah": 2, "البقرة": 2, "al-fatiha": 1, "yasin": 36}
+
+
+def test_reference_parser():
+    parser = ReferenceParser(lambda name: SURAH_NAMES.get(name.lower()))
+    
+    test_cases = [
+        ("2:255", VerseReference(2, 255), True),
+        ("Show me 2:255-257", VerseReference(2, 255, 257), True),
+        ("Surah Al-Baqarah verse 255", VerseReference(2, 255), True),
+        ("سورة البقرة آية ٢٥٥", VerseReference(2, 255), True),
+        ("Surah 36", VerseReference(36), True),
+        ("Explain 2:286", VerseReference(2, 286), False),
+        ("Tell me about Surah Al-Fatiha", VerseReference(1), False),
+        ("Surah 200", None, False),
+        ("Show me verses about patience", None, False),
+    ]
+    
+    for query, expected, reference_only in test_cases:
+        result = parser.parse_query(query)
+        print(f"{query!r} -> {result}")
+        assert result == (expected, reference_only)
+
+
+
+def test_reference_list_parser():
+    parser = ReferenceParser()
+    
+    test_cases = [
+        ("2:153, 2:155-157, 39:10", [VerseReference(2, 153), VerseReference(2, 155, 157), VerseReference(39, 10)], True),
+        ("Show me 2:153, 155-157 and 39:10", [VerseReference(2, 153), VerseReference(2, 155, 157), VerseReference(39, 10)], True),
+        ("٢:١٥٣؛ ٣:٢٠٠", [VerseReference(2, 153), VerseReference(3, 200)], True),
+        ("2:255 has 10 words", [VerseReference(2, 255)], False),
+        ("Show me verses about patience", [], False),
+    ]
+    
+    for text, expected, reference_only in test_cases:
+        result = parser.parse_references(text)
+        print(f"{text!r} -> {result}")
+        assert result == (expected, reference_only)
+
+
+if __name__ == "__main__":
+    test_reference_parser()
+    test_reference_list_parser()
@@ -0,0 +1,50 @@
+# test_related_verses.py
+import os
+import tempfile
+from database.positional_index import PositionalIndex
+from database.related_verses import RelatedVerses, compute_neighbors, write_neighbors
+
+# Only a few verses have text; the rest of the 100 are empty and get no neighbours
+VERSE_COUNTS = [40, 60]
+VERSES = [
+    (1, 1, "واستعينوا بالصبر والصلاة"),
+    (1, 2, "إن الله مع الصابرين"),
+    (1, 3, "وأقيموا الصلاة وآتوا الزكاة"),
+    (2, 1, "اصبروا وصابروا ورابطوا"),
+    (2, 2, "خذ من أموالهم صدقة تطهرهم وتزكيهم بها"),
+    (2, 3, "الذين ينفقون أموالهم في سبيل الله صدقة"),
+]
+
+
+def test_related_verses():
+    table = compute_neighbors(
+        VERSE_COUNTS,
+        ({"surahId": surah_id, "ayatNumber": ayat_number, "withoutAerab": text} for surah_id, ayat_number, text in VERSES),
+        k=3
+    )
+    assert len(table) == sum(VERSE_COUNTS) * 3
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "related_verses.bin")
+        write_neighbors(path, table, 3)
+        related = RelatedVerses.load(path, PositionalIndex(VERSE_COUNTS, {}))
+
+        print(f"1:2 -> {related.related(1, 2)}")
+        # Patience verses find each other, charity verses find each other
+        assert related.related(1, 2)[0] in [(1, 1), (2, 1)]
+        assert (1, 2) in related.related(2, 1)
+        assert related.related(2, 2) == [(2, 3)]
+        assert related.related(1, 1, limit=1) == related.related(1, 1)[:1]
+        assert related.related(1, 10) == []
+        assert related.related(3, 1) == []
+
+        try:
+            RelatedVerses.load(path, PositionalIndex([40, 61], {}))
+            assert False, "a table for another verse count must be rejected"
+        except ValueError:
+            pass
+        del related
+
+
+if __name__ == "__main__":
+    test_related_verses()
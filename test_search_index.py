@@ -0,0 +1,50 @@
+# test_search_index.py
+from database.search_index import VerseSearchIndex, SearchQueryError
+
+VERSES = [
+    (1, 1, "بسم الله الرحمن الرحيم"),
+    (2, 153, "يا أيها الذين آمنوا استعينوا بالصبر والصلاة إن الله مع الصابرين"),
+    (2, 155, "ولنبلونكم بشيء من الخوف والجوع وبشر الصابرين"),
+    (3, 200, "يا أيها الذين آمنوا اصبروا وصابروا ورابطوا واتقوا الله"),
+    (39, 53, "لا تقنطوا من رحمة الله إن الله يغفر الذنوب جميعا"),
+    (40, 7, "ربنا وسعت كل شيء رحمة وعلما فاغفر للذين تابوا"),
+]
+
+
+def test_boolean_search():
+    index = VerseSearchIndex(
+        {"surahId": surah_id, "ayatNumber": ayat_number, "withoutAerab": text}
+        for surah_id, ayat_number, text in VERSES
+    )
+
+    def found(query, **kwargs):
+        result = index.search(query, **kwargs)
+        print(f"{query} -> {result['total']} {[(r['surahId'], r['ayatNumber']) for r in result['results']]}")
+        return sorted((r['surahId'], r['ayatNumber']) for r in result['results'])
+
+    # Articles and attached conjunctions are ignored for plain words
+    assert found("صبر AND صلاه") == [(2, 153)]
+    assert found("الصابرين") == [(2, 153), (2, 155)]
+    assert found("رحمه NOT فاغفر") == [(39, 53)]
+    assert found("رحمه OR الرحمن") == [(1, 1), (39, 53), (40, 7)]
+    assert found('"الله الرحمن"') == [(1, 1)]
+    assert found('"الرحمن الله"') == []
+    assert found("امنوا NEAR/4 الله") == []
+    assert found("امنوا NEAR اصبروا") == [(3, 200)]
+    assert found("صاب*") == [(2, 153), (2, 155)]
+    assert found("*صاب*") == [(2, 153), (2, 155), (3, 200)]
+    assert found("الله surah:2-3") == [(2, 153), (3, 200)]
+
+    page = index.search("الله", page=2, page_size=2)
+    assert page["total"] == 4 and page["pages"] == 2 and len(page["results"]) == 2
+
+    for bad_query in ["صبر AND", "(صبر", "", "NEAR/0"]:
+        try:
+            index.search(bad_query)
+            assert False, f"{bad_query!r} should not parse"
+        except SearchQueryError:
+            pass
+
+
+if __name__ == "__main__":
+    test_boolean_search()
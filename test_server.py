@@ -0,0 +1,184 @@
+# test_server.py
+import os
+import json
+import time
+import asyncio
+import tempfile
+import server
+from database.corpus import QuranCorpus
+from database.search_index import VerseSearchIndex
+from sample_db import make_queries
+from server import JsonApi, SharedMetrics
+from llm.gemini_client import GeminiClient
+from utils.query_pipeline import QueryPipeline
+from utils.warmup import SHARED_INDEXES, Warmup, preload_shared_indexes
+
+
+class FakeOrchestrator:
+    async def process_query(self, query, user_context=None):
+        return {"content": f"answer to {query}", "session": (user_context or {}).get("session_id")}
+
+
+def test_metrics_shared_across_processes():
+    if not hasattr(os, "fork"):
+        return
+    metrics = SharedMetrics(2)
+    metrics.slot(0).start()
+    pid = os.fork()
+    if pid == 0:
+        worker = metrics.slot(1)
+        worker.start()
+        for latency in (0.01, 0.03):
+            worker.request_started()
+            worker.request_finished(latency)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    totals = metrics.aggregate()
+    print(f"Aggregated: {totals}")
+    assert totals["requests"] == 2 and totals["latency_max_ms"] == 30.0
+    assert totals["per_worker"][1]["pid"] == pid and totals["per_worker"][0]["pid"] == os.getpid()
+
+
+def test_indexes_shared_across_processes():
+    if not hasattr(os, "fork"):
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        queries = make_queries(os.path.join(directory, "quran.db"))
+        for index in SHARED_INDEXES:
+            index.reset()
+        try:
+            timings = preload_shared_indexes(queries)
+            print(f"Preloaded: {timings}")
+            assert list(timings) == [index.__name__ for index in SHARED_INDEXES]
+            corpus, search_index = QuranCorpus.get_instance(), VerseSearchIndex.get_instance()
+            assert len(corpus) == 493
+            # Workers must not be able to load their own copy
+            os.remove(os.path.join(directory, "quran.db"))
+
+            workers = []
+            for _ in range(2):
+                read_end, write_end = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    # The forked worker finds the parent's objects, at the same addresses
+                    shared = QuranCorpus.get_instance() is corpus and VerseSearchIndex.get_instance() is search_index
+                    os.write(write_end, b"1" if shared and len(QuranCorpus.get_instance()) == 493 else b"0")
+                    os._exit(0)
+                os.close(write_end)
+                workers.append((pid, read_end))
+            for pid, read_end in workers:
+                os.waitpid(pid, 0)
+                assert os.read(read_end, 1) == b"1"
+                os.close(read_end)
+        finally:
+            for index in SHARED_INDEXES:
+                index.reset()
+
+
+class SlowQueries:
+    """A database whose page-cache warm-up outlasts the health window"""
+
+    def warm_cache(self):
+        time.sleep(0.5)
+
+    def warm_indexes(self):
+        raise RuntimeError("no indexes in this test")
+
+
+class WarmingOrchestrator:
+    def __init__(self):
+        self.verse_worker = type("VerseWorker", (), {"db_queries": SlowQueries()})()
+        self.pipeline = QueryPipeline([["patience"]])
+        self.fallback_llm = GeminiClient(backend=lambda prompt: "answer")
+
+
+def test_slow_warmup_stays_healthy():
+    heartbeat_seconds = server.HEARTBEAT_SECONDS
+    server.HEARTBEAT_SECONDS = 0.05
+    try:
+        metrics = SharedMetrics(1)
+        worker = metrics.slot(0)
+        worker.start()
+
+        async def boot():
+            # As _run_worker does: beat in the background while the warm-up runs
+            heartbeat = asyncio.create_task(server._heartbeat(worker))
+            try:
+                return await Warmup(WarmingOrchestrator(), questions=[]).run(preanswer=False)
+            finally:
+                heartbeat.cancel()
+
+        report = asyncio.run(boot())
+        assert report["steps"]["database"] >= 500
+        # The warm-up took ten health windows, yet the worker reads as starting, not dead
+        slot = metrics.snapshot()[0]
+        assert slot["healthy"] and not slot["ready"]
+        assert asyncio.run(JsonApi(None, metrics, worker).health({}))["status"] == "starting"
+    finally:
+        server.HEARTBEAT_SECONDS = heartbeat_seconds
+
+
+async def exchange(port, requests):
+    """Send raw requests over one keep-alive connection, return (status, payload) pairs"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for request in requests:
+        writer.write(request.encode("utf-8"))
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = (await reader.readline()).strip()
+            if not line:
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        responses.append((status, json.loads(await reader.readexactly(length))))
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def post(path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    return f"POST {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n{body.decode()}"
+
+
+def test_json_api():
+    metrics = SharedMetrics(1)
+    worker = metrics.slot(0)
+    worker.start()
+    assert metrics.aggregate()["ready_workers"] == 0
+    worker.set_ready(12.5)
+    api = JsonApi(FakeOrchestrator(), metrics, worker)
+
+    async def run():
+        server = await asyncio.start_server(api.serve_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        responses = await exchange(port, [
+            post("/query", {"query": "2:153", "session_id": "s1"}),
+            post("/query", {"query": ""}),
+            "GET /health HTTP/1.1\r\nHost: x\r\n\r\n",
+            "GET /missing HTTP/1.1\r\nHost: x\r\n\r\n",
+            "DELETE /query HTTP/1.1\r\nHost: x\r\n\r\n",
+            "POST /query HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\n\r\n{{{",
+        ])
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    responses = asyncio.run(run())
+    print(responses)
+    assert responses[0] == (200, {"content": "answer to 2:153", "session": "s1"})
+    assert [status for status, _ in responses[1:]] == [400, 200, 404, 405, 400]
+    assert responses[2][1]["status"] == "ok"
+    assert metrics.aggregate()["requests"] == 6
+
+
+if __name__ == "__main__":
+    test_metrics_shared_across_processes()
+    test_indexes_shared_across_processes()
+    test_slow_warmup_stays_healthy()
+    test_json_api()
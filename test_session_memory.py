@@ -0,0 +1,114 @@
+# test_session_memory.py
+import os
+import time
+import asyncio
+import tempfile
+from utils.session_memory import FileSessionStore, SessionStore
+from test_llm_resilience import make_client
+
+
+def verse_response(content: str, *references):
+    return {
+        "content": content,
+        "sources": [{"type": "verse", "surah_id": surah, "verse_number": verse} for surah, verse in references]
+    }
+
+
+def test_window_and_summaries():
+    store = SessionStore(max_sessions=10, window=2, summary_chars=200, turn_chars=60)
+    store.record("a", "Verses about patience", verse_response("Be patient. Allah is with the patient.", (2, 153)))
+    store.record("a", "What does the second one mean?", verse_response("It promises good tidings. " * 10))
+    store.record("a", "And about prayer?", verse_response("Establish prayer.", (2, 43), (2, 45)))
+
+    memory = store.get("a")
+    assert len(memory.turns) == 2 and len(memory.summaries) == 1
+    context = store.context("a")
+    print(context)
+    # The oldest turn survives only as a summary line with its verses
+    assert "- Asked: Verses about patience (verses 2:153)" in context
+    assert "User: And about prayer?" in context
+    # Long answers are clipped when recorded
+    assert all(len(turn.answer) <= 60 for turn in memory.turns)
+
+    for i in range(50):
+        store.record("a", f"Question number {i} about a long topic", verse_response("Answer."))
+    assert len(store.context("a")) < 200 + 2 * 140 + 100
+    assert store.context("unknown") == "" and store.context(None) == ""
+
+
+def test_session_eviction():
+    store = SessionStore(max_sessions=3, window=2, summary_chars=100, turn_chars=50)
+    for session in ("a", "b", "c"):
+        store.record(session, "hello", verse_response("salam"))
+    store.get("a")                       # "a" is now the most recently used
+    store.record("d", "hello", verse_response("salam"))
+    assert len(store) == 3
+    assert store.get("b") is None and store.get("a") is not None
+    store.clear("a")
+    assert store.get("a") is None
+    store.record(None, "hello", verse_response("salam"))
+    assert len(store) == 2
+
+
+def test_file_sessions_shared_across_processes():
+    limits = dict(max_sessions=3, window=2, summary_chars=200, turn_chars=60)
+    with tempfile.TemporaryDirectory() as directory:
+        # Two workers of the prefork server, each with its own store over one directory
+        first, second = FileSessionStore(directory, **limits), FileSessionStore(directory, **limits)
+        first.record("a", "Verses about patience", verse_response("Be patient.", (2, 153)))
+        second.record("a", "What does it mean?", verse_response("It promises good tidings."))
+        first.record("a", "And about prayer?", verse_response("Establish prayer.", (2, 43)))
+
+        memory = second.get("a")
+        assert len(memory.turns) == 2 and list(memory.summaries) == ["Asked: Verses about patience (verses 2:153)"]
+        assert first.context("a") == second.context("a")
+        assert "User: And about prayer?" in second.context("a")
+
+        if hasattr(os, "fork"):
+            pid = os.fork()
+            if pid == 0:
+                FileSessionStore(directory, **limits).record("b", "Tell me about 3:200", verse_response("Be steadfast."))
+                os._exit(0)
+            os.waitpid(pid, 0)
+            assert "User: Tell me about 3:200" in first.context("b")
+
+        # Least recently used sessions go once there are more than max_sessions files
+        for session in ("c", "d"):
+            time.sleep(0.01)
+            first.record(session, "hello", verse_response("salam"))
+        assert len(second) == 3 and second.get("a") is None
+        second.clear("c")
+        assert first.get("c") is None and first.context("c") == "" and len(first) == 2
+
+        # A file another worker removes while it is being ranked is skipped, not raised from record()
+        real_stat, real_exists, vanished = os.stat, os.path.exists, first._path("d")
+
+        def racing_stat(path, *args, **kwargs):
+            if path == vanished:
+                raise FileNotFoundError(path)
+            return real_stat(path, *args, **kwargs)
+
+        os.stat, os.path.exists = racing_stat, lambda path: path == vanished or real_exists(path)
+        try:
+            for session in ("e", "f"):
+                time.sleep(0.01)
+                first.record(session, "hello", verse_response("salam"))
+        finally:
+            os.stat, os.path.exists = real_stat, real_exists
+        assert second.get("e") is not None and second.get("f") is not None
+
+
+def test_conversation_reaches_prompt():
+    prompts = []
+    client = make_client(lambda prompt: prompts.append(prompt) or "answer")
+    asyncio.run(client.generate_response("and the next one?", "ctx", conversation="User: 2:153\nAssistant: ..."))
+    assert "User: 2:153" in prompts[0] and "and the next one?" in prompts[0]
+    asyncio.run(client.generate_response("q", "ctx"))
+    assert "Conversation so far" not in prompts[1]
+
+
+if __name__ == "__main__":
+    test_window_and_summaries()
+    test_session_eviction()
+    test_file_sessions_shared_across_processes()
+    test_conversation_reaches_prompt()
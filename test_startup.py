@@ -0,0 +1,28 @@
+# test_startup.py
+from utils.startup_profile import COLD_START_TARGETS, measure_cold_start, package_breakdown, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:      2000 |       2500 |   langdetect.detector
+import time:       300 |       2800 | langdetect
+"""
+
+
+def test_parse_importtime():
+    timings = parse_importtime(SAMPLE)
+    assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+        ("_io", 120, 120, 2), ("langdetect.detector", 2000, 2500, 1), ("langdetect", 300, 2800, 0)
+    ]
+    assert package_breakdown(timings) == {"langdetect": 2300, "_io": 120}
+
+
+def test_no_heavy_modules_at_start():
+    # Headless entry points never pay for Gradio, Gemini or langdetect at start-up.
+    # Wall time depends on the machine, so the budget is checked by `python -m utils.startup_profile coldstart`.
+    for target in COLD_START_TARGETS:
+        assert measure_cold_start(target, runs=1)["heavy_modules"] == [], target
+
+
+if __name__ == "__main__":
+    test_parse_importtime()
+    test_no_heavy_modules_at_start()
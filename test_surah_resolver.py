@@ -0,0 +1,90 @@
+# test_surah_resolver.py
+import time
+from agents.workers.verse_worker import VerseWorker
+from config.settings import Settings
+from utils.surah_resolver import SurahResolver
+
+SURAHS = [
+    {"id": 1, "name_en": "Al-Fatiha", "name_ar": "الفاتحة"},
+    {"id": 2, "name_en": "Al-Baqarah", "name_ar": "البقرة"},
+    {"id": 3, "name_en": "Aal-i-Imraan", "name_ar": "آل عمران"},
+    {"id": 36, "name_en": "Yaseen", "name_ar": "يس"},
+    {"id": 112, "name_en": "Al-Ikhlas", "name_ar": "الإخلاص"},
+]
+
+
+class FakeQueries:
+    """Surah table that fails until it is told to work"""
+
+    def __init__(self):
+        self.working = False
+        self.calls = 0
+
+    def get_all_surahs(self):
+        self.calls += 1
+        if not self.working:
+            raise RuntimeError("no such table: surah")
+        return SURAHS
+
+
+def test_resolve():
+    resolver = SurahResolver(SURAHS)
+
+    # Exact keys, with and without the article and the "surah" prefix
+    assert resolver.resolve_id("Al-Baqarah") == 2
+    assert resolver.resolve_id("baqarah") == 2
+    assert resolver.resolve_id("Surah Al Fatiha") == 1
+    assert resolver.resolve_id("112") == 112
+
+    # Transliteration variants and typos go through the trigram index
+    assert resolver.resolve_id("Al-Fateha") == 1
+    assert resolver.resolve_id("Baqara") == 2
+    assert resolver.resolve_id("Ikhlaas") == 112
+    assert resolver.resolve_id("Imran") == 3      # part of a longer name
+
+    # Arabic script, with diacritics and the article stripped
+    assert resolver.resolve_id("البقرة") == 2
+    assert resolver.resolve_id("سورة الْبَقَرَة") == 2
+    assert resolver.resolve_id("الاخلاص") == 112
+
+    # Anything too far from every name is rejected, although it may still be ranked
+    ranked = resolver.resolve("Baqxyzw")
+    print(f"Ranked: {[(surah['name_en'], score) for surah, score in ranked]}")
+    assert all(score < SurahResolver.MIN_SCORE for _, score in ranked)
+    assert resolver.resolve_id("Baqxyzw") is None
+    assert resolver.resolve_id("Zumzumzum") is None
+    assert resolver.resolve_id("") is None and resolver.resolve_id("999") is None
+
+
+def test_failed_build_is_retried():
+    queries = FakeQueries()
+    retry_seconds = Settings.INDEX_RETRY_SECONDS
+    Settings.INDEX_RETRY_SECONDS = 0.2
+    SurahResolver.reset()
+    try:
+        # A failed build serves one cached empty resolver instead of rebuilding on every call
+        first = SurahResolver.get_instance(queries)
+        assert first.resolve_id("Al-Baqarah") is None
+        worker = VerseWorker.__new__(VerseWorker)
+        worker.db_queries = queries
+        assert worker.surah_resolver is first
+        assert SurahResolver.get_instance(queries) is first and queries.calls == 1
+
+        # Within the retry period nothing is rebuilt, even when the database recovers
+        queries.working = True
+        assert SurahResolver.get_instance(queries) is first and queries.calls == 1
+
+        time.sleep(0.25)
+        resolver = SurahResolver.get_instance(queries)
+        assert resolver is not first and resolver.resolve_id("Al-Baqarah") == 2
+        # Workers read the shared resolver on use, so one built while it failed recovers too
+        assert worker.surah_resolver is resolver
+        assert SurahResolver.get_instance(queries) is resolver and queries.calls == 2
+    finally:
+        Settings.INDEX_RETRY_SECONDS = retry_seconds
+        SurahResolver.reset()
+
+
+if __name__ == "__main__":
+    test_resolve()
+    test_failed_build_is_retried()
@@ -0,0 +1,44 @@
+# test_translations.py
+import os
+import tempfile
+from database.queries import QuranQueries
+from database.translations import TranslationLoader, parse_translation_file
+from sample_db import make_queries
+
+TRANSLATION = """# Sample English translation
+1|1|In the name of Allah, the Entirely Merciful, the Especially Merciful.
+2|153|O you who have believed, seek help through patience and prayer.
+2|155|And give good tidings to the patient.
+9|1|A verse of a surah that is not in the database.
+"""
+
+
+def test_translation_search():
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "quran.db")
+        queries = make_queries(db_path)
+        assert queries.get_translation_languages() == []
+
+        translation_path = os.path.join(directory, "en.txt")
+        with open(translation_path, "w", encoding="utf-8") as f:
+            f.write(TRANSLATION)
+
+        loader = TranslationLoader(db_path)
+        counts = loader.load("en", parse_translation_file(translation_path))
+        # Reloading replaces the language instead of duplicating it
+        counts = loader.load("en", parse_translation_file(translation_path))
+        assert counts == {"loaded": 3, "unknown": 1}
+        assert loader.languages() == [("en", 3)]
+        loader.close()
+
+        fresh = QuranQueries()
+        fresh.db = queries.db
+        results = fresh.search_verses("patience prayer", "en")
+        print(f"Matched: {[(r['surahId'], r['ayatNumber']) for r in results]}")
+        assert [(r['surahId'], r['ayatNumber']) for r in results] == [(2, 153)]
+        assert results[0]['translation'].startswith("O you who have believed")
+        assert fresh.search_verses("merciful", "ur") == []
+
+
+if __name__ == "__main__":
+    test_translation_search()
@@ -0,0 +1,84 @@
+# test_warmup.py
+import os
+import asyncio
+import logging
+import tempfile
+from agents.orchestrator import QuranChatbotOrchestrator
+from llm.gemini_client import GeminiClient
+from utils.query_pipeline import QueryPipeline
+from utils.session_memory import SessionStore
+from utils.warmup import Warmup
+from sample_db import make_queries
+
+
+class FakeVerseWorker:
+    def __init__(self, db_queries):
+        self.db_queries = db_queries
+
+    async def answer_related(self, query, language):
+        return {"content": f"verses related to {query}", "sources": []}
+
+
+class FakeQueryLog:
+    def __init__(self):
+        self.entries = []
+
+    def record(self, entry):
+        self.entries.append(entry)
+
+
+class FakeOrchestrator:
+    """The parts of the orchestrator the warm-up touches"""
+
+    def __init__(self, db_queries):
+        self.verse_worker = FakeVerseWorker(db_queries)
+        self.pipeline = QueryPipeline([["patience", "صبر"]])
+        self.fallback_llm = GeminiClient(backend=lambda prompt: "answer")
+        self.answered = []
+
+    async def process_query(self, query, user_context=None):
+        self.answered.append(query)
+        return {"content": "answer"}
+
+
+def test_warmup():
+    with tempfile.TemporaryDirectory() as directory:
+        orchestrator = FakeOrchestrator(make_queries(os.path.join(directory, "quran.db")))
+        warmup = Warmup(orchestrator, questions=["What does the Quran say about patience?", "Dua for protection"])
+        assert not warmup.ready
+
+        report = asyncio.run(warmup.run(preanswer=False))
+        print(f"Warm-up: {report}")
+        assert warmup.ready and report["ready"] and not report["errors"]
+        assert list(report["steps"]) == ["database", "indexes", "language_detection", "routing", "templates", "llm_client"]
+        assert orchestrator.answered == []
+
+        report = asyncio.run(warmup.run(preanswer=True))
+        assert report["preanswered"] == 2 and "preanswer" in report["steps"]
+        assert orchestrator.answered == warmup.questions
+
+
+def test_preanswers_not_logged():
+    with tempfile.TemporaryDirectory() as directory:
+        # The real process_query, answering every question on the direct path
+        orchestrator = QuranChatbotOrchestrator.__new__(QuranChatbotOrchestrator)
+        orchestrator.verse_worker = FakeVerseWorker(make_queries(os.path.join(directory, "quran.db")))
+        orchestrator.pipeline = QueryPipeline([["patience"]])
+        orchestrator.fallback_llm = GeminiClient(backend=lambda prompt: "answer")
+        orchestrator.sessions = SessionStore()
+        orchestrator.response_cache = None
+        orchestrator.query_log = FakeQueryLog()
+        orchestrator.logger = logging.getLogger("test_warmup")
+
+        report = asyncio.run(Warmup(orchestrator, questions=["Verses about patience"]).run(preanswer=True))
+        assert report["preanswered"] == 1
+        assert orchestrator.query_log.entries == []
+
+        # Real traffic is still logged
+        asyncio.run(orchestrator.process_query("Verses about patience"))
+        assert [entry["query"] for entry in orchestrator.query_log.entries] == ["verses about patience"]
+
+
+if __name__ == "__main__":
+    test_warmup()
+    test_preanswers_not_logged()
@@ -0,0 +1,61 @@
+# test_word_count.py
+import asyncio
+import logging
+from agents.workers.learning_worker import LearningWorker
+from database.concordance import Concordance
+from llm.citation_verifier import CitationVerifier
+
+# الصابرين in seven verses, and only other forms of صبر elsewhere
+VERSES = [(1, ayat_number, "إن الله مع الصابرين") for ayat_number in range(1, 8)] + [
+    (2, 1, "واستعينوا بالصبر والصلاة"),
+    (2, 2, "فاصبر صبرا جميلا"),
+]
+
+
+def make_worker():
+    """A learning worker reading a small in-memory concordance, without database or LLM client"""
+    Concordance._instance = Concordance.build(
+        [7, 2],
+        ({"surahId": surah_id, "ayatNumber": ayat_number, "withoutAerab": text} for surah_id, ayat_number, text in VERSES)
+    )
+    CitationVerifier._instance = CitationVerifier._empty()
+    worker = LearningWorker.__new__(LearningWorker)
+    worker.db_queries = None
+    worker.logger = logging.getLogger("test_word_count")
+    return worker
+
+
+def test_count_answer():
+    worker = make_worker()
+    try:
+        response = asyncio.run(worker.answer_count("كم مرة ذكرت كلمة الصابرين", "en"))
+        print(response["content"])
+        assert response["content"].startswith("The word الصابرين occurs 7 times in 7 verses")
+
+        # The payload keeps the counts and the first few references, not every verse
+        concordance = response["concordance"]
+        assert concordance["occurrences"] == 7 and concordance["root_verse_count"] == 9
+        assert concordance["verses"] == [(1, n) for n in range(1, LearningWorker.MAX_RESPONSE_VERSES + 1)]
+        assert len(concordance["root_verses"]) == LearningWorker.MAX_RESPONSE_VERSES
+
+        # Only related forms occur: lead with the root count, never "0 times in 0 verses"
+        response = asyncio.run(worker.answer_count("كم مرة ذكرت كلمة صابر", "en"))
+        print(response["content"])
+        assert "0 times" not in response["content"]
+        assert response["content"].startswith("The word صابر is not found in the Quran in this exact form")
+        assert "occur 9 times in 9 verses" in response["content"]
+        assert response["concordance"]["occurrences"] == 0
+        assert "0 مرة" not in asyncio.run(worker.answer_count("كم مرة ذكرت كلمة صابر", "ar"))["content"]
+
+        assert asyncio.run(worker.answer_count("كم مرة ذكرت كلمة زكاة", "en")) is None
+
+        # "know" is not the counted concept
+        response = asyncio.run(worker.answer_count("I want to know how many times patience is mentioned", "en"))
+        assert response["content"].startswith("The word patience (صبر)")
+    finally:
+        Concordance.reset()
+        CitationVerifier.reset()
+
+
+if __name__ == "__main__":
+    test_count_answer()
@@ -2,6 +2,7 @@ import json
 import os
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
+from database.records import json_default
 
 class CacheManager:
     """Simple file-based cache for frequent queries"""
@@ -60,7 +61,7 @@ class CacheManager:
             }
             
             with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+                json.dump(cache_data, f, ensure_ascii=False, indent=2, default=json_default)
                 
         except Exception as e:
             # Silently fail cache writes
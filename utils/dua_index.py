@@ -0,0 +1,115 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from utils.fragment_cache import dua_key
+from utils.shared_instance import SharedInstance
+from utils.text_normalizer import normalize_arabic
+
+
+class DuaCategoryIndex(SharedInstance):
+    """Precomputed category -> ranked duas map.
+
+    Every dua is scored once per category at build time: Arabic content terms
+    found in the dua text weigh more than category keywords found in its text
+    or surah column. Answering "duas for X" is then one dict lookup returning
+    ranked duas together with the verse each one is linked to.
+    """
+
+    CONTENT_TERM_WEIGHT = 2
+    KEYWORD_WEIGHT = 1
+    GENERAL_CATEGORY = 'general'
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, duas: List[Dict], categories: Dict[str, List[str]],
+                 content_terms: Dict[str, List[str]],
+                 verses_lookup: Callable[[List[Tuple[int, int]]], List[Dict]] = None,
+                 surah_lookup: Callable[[str], Optional[int]] = None):
+        """
+        categories: category -> query keywords (as used to identify the category)
+        content_terms: category -> Arabic terms that mark a dua of that category
+        verses_lookup: list of (surah_id, verse_number) -> verse rows, used to link duas to verses
+        surah_lookup: surah name -> surah number, for dua rows that store a name
+        """
+        self.surah_lookup = surah_lookup
+        self._entries = {}
+
+        linked = self._link_all(duas, verses_lookup)
+        texts = [normalize_arabic(f"{dua.get('aya') or ''} {dua.get('surah') or ''}").lower() for dua in duas]
+
+        for category in set(categories) | set(content_terms):
+            terms = [normalize_arabic(term) for term in content_terms.get(category, [])]
+            keywords = [normalize_arabic(keyword).lower() for keyword in categories.get(category, [])]
+
+            scored = []
+            for position, text in enumerate(texts):
+                score = self.CONTENT_TERM_WEIGHT * sum(1 for term in terms if term in text)
+                score += self.KEYWORD_WEIGHT * sum(1 for keyword in keywords if self._has_word(text, keyword))
+                if score:
+                    scored.append((score, position))
+
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            self._entries[category] = [linked[position] for _, position in scored]
+
+        # Every dua belongs to the general list, best general matches first
+        general = list(self._entries.get(self.GENERAL_CATEGORY, []))
+        seen = {dua_key(entry['dua']) for entry in general}
+        for entry in linked:
+            key = dua_key(entry['dua'])
+            if key not in seen:
+                seen.add(key)
+                general.append(entry)
+        self._entries[self.GENERAL_CATEGORY] = general
+
+    @classmethod
+    def _build(cls, db_queries, categories: Dict[str, List[str]] = None,
+               content_terms: Dict[str, List[str]] = None) -> "DuaCategoryIndex":
+        """Shared index, built from the dua table on first use"""
+        from utils.surah_resolver import SurahResolver
+        return cls(
+            db_queries.get_all_duas(), categories or {}, content_terms or {},
+            verses_lookup=db_queries.get_verses_by_references,
+            surah_lookup=SurahResolver.get_instance(db_queries).resolve_id
+        )
+
+    @classmethod
+    def _empty(cls, categories: Dict[str, List[str]] = None,
+               content_terms: Dict[str, List[str]] = None) -> "DuaCategoryIndex":
+        return cls([], categories or {}, content_terms or {})
+
+    def lookup(self, category: str, limit: int = 3) -> List[Dict]:
+        """Ranked duas for a category as {'dua', 'verse'} entries, general duas when it has none"""
+        entries = self._entries.get(category) or self._entries.get(self.GENERAL_CATEGORY, [])
+        return entries[:limit]
+
+    def _link_all(self, duas: List[Dict], verses_lookup) -> List[Dict]:
+        """Pair each dua with the verse its surah/aya_number columns point to, in one batch lookup"""
+        references = [self._verse_reference(dua) for dua in duas]
+        verses = {}
+        wanted = sorted({reference for reference in references if reference})
+        if wanted and verses_lookup:
+            try:
+                verses = {(verse['surahId'], verse['ayatNumber']): verse for verse in verses_lookup(wanted)}
+            except Exception:
+                verses = {}
+        return [{'dua': dua, 'verse': verses.get(reference)} for dua, reference in zip(duas, references)]
+
+    def _verse_reference(self, dua: Dict) -> Optional[Tuple[int, int]]:
+        surah, verse_number = dua.get('surah'), dua.get('aya_number')
+        try:
+            verse_number = int(verse_number)
+        except (TypeError, ValueError):
+            return None
+
+        if isinstance(surah, int) or (isinstance(surah, str) and surah.strip().isdigit()):
+            return int(surah), verse_number
+        if surah and self.surah_lookup:
+            surah_id = self.surah_lookup(str(surah))
+            if surah_id:
+                return surah_id, verse_number
+        return None
+
+    @staticmethod
+    def _has_word(text: str, keyword: str) -> bool:
+        return re.search(rf"(?<!\w){re.escape(keyword)}", text) is not None
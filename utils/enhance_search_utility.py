@@ -1,6 +1,10 @@
-from typing import List, Dict, Tuple
+import asyncio
+import time
+from typing import List, Dict, Tuple, Callable, Optional
 from database.queries import QuranQueries
 from config.english_handling import EnglishHandlingConfig
+from config.settings import Settings
+from utils.lexicon import LEXICON
 import logging
 
 class EnhancedSearchUtility:
@@ -10,12 +14,20 @@ class EnhancedSearchUtility:
         self.db_queries = QuranQueries()
         self.config = EnglishHandlingConfig()
         self.logger = logging.getLogger(__name__)
+        # Winner and per-strategy timings (ms) of the most recent concurrent search
+        self.last_search_stats = {}
     
-    async def smart_search(self, query: str, language: str) -> Tuple[List[Dict], bool, str]:
+    async def smart_search(self, query: str, language: str,
+                           concurrent: Optional[bool] = None) -> Tuple[List[Dict], bool, str]:
         """
         Perform smart search that handles English queries intelligently
         Returns: (results, has_results, search_strategy_used)
         """
+        if concurrent is None:
+            concurrent = Settings.CONCURRENT_SEARCH
+        if concurrent:
+            return await self.smart_search_concurrent(query, language)
+        
         results = []
         has_results = False
         strategy = "direct_search"
@@ -57,21 +69,98 @@ class EnhancedSearchUtility:
         
         return results, has_results, strategy
     
+    async def smart_search_concurrent(self, query: str, language: str,
+                                      timeout: Optional[float] = None) -> Tuple[List[Dict], bool, str]:
+        """
+        Launch all search strategies together on the default executor.
+        Returns the highest-priority non-empty result as soon as every
+        strategy ranked above it has finished empty, and cancels the rest.
+        Strategies still running after `timeout` seconds (SEARCH_TIMEOUT by
+        default) count as empty, so one hung query cannot hold the search.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (Settings.SEARCH_TIMEOUT if timeout is None else timeout)
+        timings = {}
+        strategies = self._build_strategies(query, language)
+        pending = [
+            (name, loop.run_in_executor(None, self._run_timed_strategy, name, search, timings))
+            for name, search in strategies
+        ]
+        
+        results, strategy, timed_out = [], "no_results", []
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    # Strategies still running count as empty; the best finished one wins
+                    timed_out = [name for name, future in pending if not future.done()]
+                    for name, future in pending:
+                        if future.done() and future.result():
+                            results, strategy = future.result(), name
+                            break
+                    break
+                
+                await asyncio.wait([future for _, future in pending], timeout=remaining,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                
+                # Only the head of the priority list may decide the outcome
+                while pending and pending[0][1].done():
+                    name, future = pending.pop(0)
+                    if future.result():
+                        results, strategy = future.result(), name
+                        break
+                
+                if results:
+                    break
+        finally:
+            for _, future in pending:
+                future.cancel()
+        
+        self.last_search_stats = {
+            "strategy": strategy,
+            "timings": timings,
+            "cancelled": [name for name, future in pending if future.cancelled()],
+            "timed_out": timed_out
+        }
+        self.logger.debug(f"Concurrent search stats: {self.last_search_stats}")
+        
+        return results, bool(results), strategy
+    
+    def _build_strategies(self, query: str, language: str) -> List[Tuple[str, Callable[[], List[Dict]]]]:
+        """Search strategies in priority order, as blocking callables"""
+        strategies = [("direct_search", lambda: self.db_queries.search_verses(query, language))]
+        
+        if language == "en":
+            strategies.append(("concept_mapping", lambda: self._concept_mapping_results(query)))
+        
+        strategies.append(("topic_search", lambda: self.db_queries.search_verses_by_topic(query, language)))
+        strategies.append(("keyword_extraction", lambda: self._keyword_results(query, language)))
+        
+        return strategies
+    
+    def _run_timed_strategy(self, name: str, search: Callable[[], List[Dict]], timings: Dict) -> List[Dict]:
+        """Run one strategy in an executor thread and record its duration"""
+        start = time.perf_counter()
+        try:
+            return search()
+        except Exception as e:
+            self.logger.error(f"Error in search strategy {name}: {e}")
+            return []
+        finally:
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    
     async def _search_by_concept_mapping(self, english_query: str) -> List[Dict]:
         """Search using English to Arabic concept mapping"""
+        return self._concept_mapping_results(english_query)
+    
+    def _concept_mapping_results(self, english_query: str) -> List[Dict]:
+        """Blocking concept mapping search"""
         results = []
         
-        # Extract concepts from the query
-        words = english_query.lower().split()
-        
-        for word in words:
-            # Get Arabic terms for this English word
-            arabic_terms = self.config.get_arabic_terms(word)
-            
-            for arabic_term in arabic_terms:
-                # Search with Arabic term
-                verses = self.db_queries.search_verses(arabic_term, "ar")
-                results.extend(verses)
+        # Arabic terms of every concept in the query, from the shared lexicon
+        for arabic_term in LEXICON.arabic_terms(english_query):
+            verses = self.db_queries.search_verses(arabic_term, "ar")
+            results.extend(verses)
         
         # Remove duplicates
         unique_results = {r['ayatId']: r for r in results}.values()
@@ -79,6 +168,10 @@ class EnhancedSearchUtility:
     
     async def _search_by_keywords(self, query: str, language: str) -> List[Dict]:
         """Extract meaningful keywords and search"""
+        return self._keyword_results(query, language)
+    
+    def _keyword_results(self, query: str, language: str) -> List[Dict]:
+        """Blocking keyword extraction search"""
         # Simple keyword extraction
         import re
         
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping
+from config.settings import Settings
+
+# Bump whenever a fragment layout changes, so fragments in the old layout are never reused
+TEMPLATE_VERSION = 1
+
+
+def verse_key(verse: Mapping) -> Hashable:
+    """Fragment id of a verse; search rows carry a translation (of no recorded language) that is part of the id"""
+    key = verse.get('ayatId') or (verse['surahId'], verse['ayatNumber'])
+    return (key, verse['translation']) if verse.get('translation') else key
+
+
+def name_key(name: Mapping) -> Hashable:
+    return name['english']
+
+
+def dua_key(dua: Mapping) -> Hashable:
+    """Dua rows have no id column and a reference may hold several excerpts, so the text is part of the key"""
+    return (dua.get('surah'), dua.get('aya_number'), dua.get('aya'))
+
+
+class FragmentCache:
+    """Bounded LRU of rendered verse, name and dua fragments shared by the workers.
+
+    Keys are (kind, id, language, TEMPLATE_VERSION), so a popular verse is
+    rendered once per layout and language and later context is a join of
+    cached strings. Fragments are strings or dicts; cached dicts are shared,
+    so callers must not change them (the citation verifier copies sources
+    before adding to them).
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max_entries or Settings.FRAGMENT_CACHE_SIZE
+        self._fragments: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._entries_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls) -> "FragmentCache":
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def render(self, kind: str, fragment_id: Hashable, language: str, renderer: Callable[[], Any]) -> Any:
+        """The cached fragment, rendering and storing it on a miss"""
+        key = (kind, fragment_id, language, TEMPLATE_VERSION)
+        with self._entries_lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+
+        fragment = renderer()
+        with self._entries_lock:
+            self.misses += 1
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._fragments),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._entries_lock:
+            self._fragments.clear()
+
+    def __len__(self) -> int:
+        return len(self._fragments)
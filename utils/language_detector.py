@@ -1,15 +1,23 @@
-from langdetect import detect, DetectorFactory
 from config.settings import Settings
 
-# Set seed for consistent results
-DetectorFactory.seed = 0
-
 class LanguageDetector:
+    # langdetect.detect, imported on first use to keep it out of start-up
+    _detect = None
+    
+    @classmethod
+    def _detector(cls):
+        if cls._detect is None:
+            from langdetect import detect, DetectorFactory
+            # Set seed for consistent results
+            DetectorFactory.seed = 0
+            cls._detect = staticmethod(detect)
+        return cls._detect
+    
     @staticmethod
     def detect_language(text: str) -> str:
         """Detect language of input text"""
         try:
-            detected = detect(text)
+            detected = LanguageDetector._detector()(text)
             # Map detected languages to supported ones
             language_map = {
                 'ur': 'ur',
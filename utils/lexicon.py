@@ -0,0 +1,119 @@
+import re
+from typing import Dict, List, Mapping, Sequence, Tuple
+from config.english_handling import EnglishHandlingConfig
+
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Longest first; "ies" restores the y it replaced
+SUFFIXES = (
+    "fulness", "ments", "ances", "ences", "ness", "ment", "ance", "ence", "ancy", "ency",
+    "ings", "edly", "ants", "ents", "ing", "ies", "ful", "ous", "ant", "ent", "ers",
+    "ed", "er", "ly", "es", "s",
+)
+MIN_STEM = 3
+
+# Words whose suffix is part of the word ("evening" is not "even"), or whose
+# stem would collide with an unrelated word ("current" is not "cure",
+# "faster" is not "fasting", "hopping" is not "hope")
+STEM_EXCEPTIONS = {
+    "evening": "evening",
+    "evenings": "evening",
+    "news": "news",
+    "current": "current",
+    "currents": "current",
+    "currently": "current",
+    "currency": "currency",
+    "faster": "faster",
+    "hopping": "hopping",
+    "hopped": "hopping",
+    "hops": "hopping",
+}
+
+# Everyday words whose stem is a concept's stem but which rarely name it
+# ("what kind of dua", "as fast as"); the concept needs its own word
+AMBIGUOUS_WORDS = frozenset({"kind", "kinds", "fast"})
+
+
+def light_stem(word: str) -> str:
+    """Strip English inflectional and common derivational suffixes.
+
+    Deliberately crude: it only has to send the forms of a word ("patience",
+    "patient", "patiently") to the same key, and lexicon entries go through
+    it too, so odd-looking stems such as "pati" are fine.
+    """
+    word = word.lower().strip("'")
+    if word.endswith("'s"):
+        word = word[:-2]
+    if word in STEM_EXCEPTIONS:
+        return STEM_EXCEPTIONS[word]
+
+    # Up to two suffixes: "patiently" -> "patient" -> "pati"
+    for _ in range(2):
+        for suffix in SUFFIXES:
+            if not word.endswith(suffix) or len(word) - len(suffix) < MIN_STEM:
+                continue
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                continue
+            word = word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+            break
+        else:
+            break
+
+    # "worshipping" -> "worshipp" -> "worship"
+    if len(word) > MIN_STEM and word[-1] == word[-2] and word[-1] not in "aeioulsz":
+        word = word[:-1]
+    if len(word) > MIN_STEM and word.endswith("e"):
+        word = word[:-1]
+    if len(word) > MIN_STEM and word.endswith("y"):
+        word = word[:-1] + "i"
+    return word
+
+
+class Lexicon:
+    """English -> Arabic concept lexicon, compiled once into a stem lookup.
+
+    Every concept name and English synonym is stemmed into a hash table of
+    stem -> concepts, so expanding a query is one stem and one dict lookup per
+    word, and any inflection of a listed word ("forgiving", "prayers",
+    "merciful") finds its concept.
+    """
+
+    def __init__(self, arabic_terms: Mapping[str, Sequence[str]], synonyms: Mapping[str, Sequence[str]] = None):
+        self.terms: Dict[str, Tuple[str, ...]] = {
+            concept: tuple(dict.fromkeys(terms)) for concept, terms in arabic_terms.items()
+        }
+        self._concepts_by_stem: Dict[str, Tuple[str, ...]] = {}
+        for concept in self.terms:
+            for word in (concept, *(synonyms or {}).get(concept, ())):
+                stem = light_stem(word)
+                if concept not in self._concepts_by_stem.get(stem, ()):
+                    self._concepts_by_stem[stem] = self._concepts_by_stem.get(stem, ()) + (concept,)
+
+    @staticmethod
+    def words(text: str) -> List[str]:
+        return WORD_PATTERN.findall(text.lower())
+
+    def concepts(self, text_or_words) -> List[str]:
+        """Concepts named in a text or word list, in order of first mention"""
+        words = self.words(text_or_words) if isinstance(text_or_words, str) else text_or_words
+        found = {}
+        for word in words:
+            if word.lower() in AMBIGUOUS_WORDS:
+                continue
+            for concept in self._concepts_by_stem.get(light_stem(word), ()):
+                found[concept] = None
+        return list(found)
+
+    def arabic_terms(self, text_or_words) -> List[str]:
+        """Every Arabic search term of every concept in the text, without repeats"""
+        terms = {}
+        for concept in self.concepts(text_or_words):
+            terms.update(dict.fromkeys(self.terms[concept]))
+        return list(terms)
+
+    def primary_terms(self, text_or_words) -> List[str]:
+        """The root term of each concept in the text, for callers that search once per concept"""
+        return list(dict.fromkeys(self.terms[concept][0] for concept in self.concepts(text_or_words)))
+
+
+LEXICON = Lexicon(EnglishHandlingConfig.ENGLISH_TO_ARABIC_MAPPING, EnglishHandlingConfig.ENGLISH_SYNONYMS)
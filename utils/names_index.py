@@ -0,0 +1,171 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Set
+from utils.shared_instance import SharedInstance
+from utils.text_normalizer import (
+    arabic_key, normalize_arabic, transliteration_key, is_arabic_script, trigrams, similarity
+)
+
+
+class AllahNamesIndex(SharedInstance):
+    """In-memory index over the 99 names of Allah.
+
+    Loaded once from the allah_names table. Supports exact, prefix and fuzzy
+    lookup on transliterations and Arabic (with or without diacritics), and
+    lookup by attribute keyword against the English and Urdu meanings.
+    """
+
+    MIN_FUZZY_SCORE = 0.75
+    MIN_PREFIX_LENGTH = 3
+
+    # Attribute keywords and the meaning-word prefixes that express them
+    ATTRIBUTE_KEYWORDS = {
+        'mercy': ['merci', 'compassion', 'gracious', 'beneficent', 'kind', 'rahm', 'رحم', 'مہربان'],
+        'forgiveness': ['forgiv', 'pardon', 'repent', 'acceptor', 'غفر', 'بخش', 'معاف'],
+        'peace': ['peace', 'source of peace', 'سلام'],
+        'protection': ['protect', 'guardian', 'preserv', 'defend', 'حفاظت', 'نگہبان'],
+        'guidance': ['guid', 'light', 'ہدایت'],
+        'wisdom': ['wise', 'wisdom', 'judge', 'حکمت'],
+        'knowledge': ['know', 'aware', 'seeing', 'hearing', 'علم', 'جاننے'],
+        'power': ['mighty', 'powerful', 'strong', 'almighty', 'omnipotent', 'قوت', 'زبردست'],
+        'provision': ['provid', 'sustain', 'bestow', 'رزق'],
+        'help': ['helper', 'protector', 'friend', 'patron', 'مددگار'],
+        'love': ['loving', 'love', 'محبت'],
+        'patience': ['patient', 'forbear', 'صبر'],
+    }
+
+    # Words that say a query is about names without naming one
+    STOP_WORDS = {
+        'allah', 'allahs', 'name', 'names', 'asma', 'asmaul', 'husna', 'attribute', 'attributes',
+        'the', 'what', 'are', 'who', 'about', 'tell', 'and', 'for', 'with', 'meaning', 'means',
+        'explain', 'show', 'list', 'beautiful', 'his', 'all',
+        'اللہ', 'الله', 'نام', 'ناموں', 'اسماء', 'حسنیٰ', 'أسماء', 'الحسنى', 'کے', 'کیا', 'ہیں',
+    }
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, names: List[Dict]):
+        self.names = names
+        self._exact = defaultdict(set)       # key -> name positions
+        self._trigrams = defaultdict(set)    # trigram -> keys
+        self._meaning_words = defaultdict(set)  # meaning word -> name positions
+        self._meanings = []                  # lowercased meaning text per name
+
+        for position, name in enumerate(names):
+            keys = {
+                transliteration_key(name.get('english') or ""),
+                transliteration_key(name.get('english') or "", strip_article=False),
+                arabic_key(name.get('arabic') or ""),
+            } - {""}
+            for key in keys:
+                self._exact[key].add(position)
+                for gram in trigrams(key):
+                    self._trigrams[gram].add(key)
+
+            meaning = " ".join(filter(None, [
+                name.get('english'), name.get('englishMeaning'), normalize_arabic(name.get('urduMeaning') or "")
+            ])).lower()
+            self._meanings.append(meaning)
+            for word in re.findall(r"\w+", meaning):
+                self._meaning_words[word].add(position)
+
+        self._attributes = {
+            attribute: self._match_meaning_prefixes(prefixes)
+            for attribute, prefixes in self.ATTRIBUTE_KEYWORDS.items()
+        }
+
+    @classmethod
+    def _build(cls, db_queries) -> "AllahNamesIndex":
+        """Shared index, loaded from the allah_names table on first use"""
+        names = db_queries.get_all_allah_names()
+        if not names:
+            raise ValueError("allah_names table is empty")
+        return cls(names)
+
+    @classmethod
+    def _empty(cls) -> "AllahNamesIndex":
+        return cls([])
+
+    def all(self, limit: int = None) -> List[Dict]:
+        return self.names[:limit] if limit else list(self.names)
+
+    def lookup(self, term: str, limit: int = 10) -> List[Dict]:
+        """Find names by transliteration or Arabic: exact, then prefix, then fuzzy"""
+        if is_arabic_script(term):
+            query_keys = {arabic_key(term)}
+        else:
+            query_keys = {transliteration_key(term), transliteration_key(term, strip_article=False)}
+        query_keys.discard("")
+        if not query_keys:
+            return []
+
+        exact = set()
+        for key in query_keys:
+            exact |= self._exact.get(key, set())
+        if exact:
+            return self._by_positions(sorted(exact), limit)
+
+        prefix = {
+            position
+            for key, positions in self._exact.items()
+            for query_key in query_keys
+            if len(query_key) >= self.MIN_PREFIX_LENGTH and key.startswith(query_key)
+            for position in positions
+        }
+        if prefix:
+            return self._by_positions(sorted(prefix), limit)
+
+        scores = {}
+        for query_key in query_keys:
+            candidates = set()
+            for gram in trigrams(query_key):
+                candidates |= self._trigrams.get(gram, set())
+            for key in candidates:
+                score = similarity(query_key, key)
+                if score >= self.MIN_FUZZY_SCORE:
+                    for position in self._exact[key]:
+                        scores[position] = max(scores.get(position, 0.0), score)
+
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        return self._by_positions(ranked, limit)
+
+    def by_attribute(self, keyword: str, limit: int = 10) -> List[Dict]:
+        """Find names whose meaning expresses an attribute such as mercy or forgiveness"""
+        keyword = keyword.lower().strip()
+        positions = self._attributes.get(keyword)
+        if positions is None:
+            positions = self._match_meaning_prefixes([keyword])
+        return self._by_positions(sorted(positions), limit)
+
+    def search(self, text: str, limit: int = 10) -> List[Dict]:
+        """Search free text: each word is tried as a name and then as an attribute"""
+        found = []
+        for word in self.search_terms(text):
+            matches = self.lookup(word, limit) or self.by_attribute(word, limit)
+            found.extend(name for name in matches if name not in found)
+        return found[:limit]
+
+    def search_terms(self, text: str) -> List[str]:
+        """Words of a query that could name or describe one of the names"""
+        return [
+            word for word in re.findall(r"[\w'\-]+", text)
+            if len(word) > self.MIN_PREFIX_LENGTH and word.lower().split("'")[0] not in self.STOP_WORDS
+            and not word.isdigit()
+        ]
+
+    def _match_meaning_prefixes(self, prefixes: List[str]) -> Set[int]:
+        positions = set()
+        for prefix in prefixes:
+            prefix = normalize_arabic(prefix).lower()
+            if " " in prefix:
+                positions |= {i for i, meaning in enumerate(self._meanings) if prefix in meaning}
+                continue
+            for word, word_positions in self._meaning_words.items():
+                if word.startswith(prefix):
+                    positions |= word_positions
+        return positions
+
+    def _by_positions(self, positions, limit: int) -> List[Dict]:
+        return [self.names[position] for position in list(positions)[:limit]]
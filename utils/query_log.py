@@ -0,0 +1,224 @@
+"""Append-only query log and its analysis.
+
+Usage:
+    python -m utils.query_log report [--log logs/queries.jsonl] [--top 20]
+    python -m utils.query_log prefill [--log logs/queries.jsonl] [--min-count 3] [--top 50] [--out FILE]
+
+The orchestrator records one JSON line per answered query: the normalized
+query, language, intent, worker, answer path (direct, cache or routed),
+error flag, database result count and a latency breakdown in milliseconds.
+`report` prints the most asked queries, the words of queries that found
+nothing in the database and the slowest intent/worker paths. `prefill`
+writes the most asked routed questions, one per line, for
+WARMUP_QUESTIONS_FILE, so the warm-up pre-answers them into the response
+cache. Every file starting with the --log path is read, which covers the
+rotated backups and the per-worker logs of the prefork server.
+"""
+import os
+import re
+import atexit
+import sys
+import glob
+import json
+import queue
+import argparse
+import logging
+import statistics
+import threading
+from collections import Counter, defaultdict
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config.settings import Settings
+
+# Answer paths whose answers the response cache keeps, so worth pre-answering
+PREFILL_PATHS = ("cache", "routed")
+
+WORD_PATTERN = re.compile(r"\w+")
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'from', 'about', 'what', 'where', 'when', 'why', 'how', 'which',
+    'who', 'you', 'are', 'was', 'were', 'does', 'did', 'can', 'tell', 'show', 'give', 'find',
+    'help', 'please', 'say', 'says', 'quran', 'allah', 'this', 'that', 'there', 'any', 'some',
+    'کیا', 'کے', 'کی', 'میں', 'ہے', 'ہیں', 'بارے', 'اور', 'سے', 'کو', 'في', 'من', 'عن', 'ما', 'هل',
+}
+
+
+class _JsonLineFormatter(logging.Formatter):
+    """Serializes the entry on the listener thread rather than in the request"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, separators=(",", ":"))
+
+
+class QueryLog:
+    """Rotating JSON-lines log of answered queries, written by a background thread.
+
+    record() only puts the entry on a queue; a QueueListener thread serializes
+    it and appends it through a RotatingFileHandler, so requests never wait on
+    the disk. Entries still queued are written at exit, or by close().
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, path: str = None, max_bytes: int = None, backups: int = None):
+        self.path = path or Settings.QUERY_LOG_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._handler = RotatingFileHandler(
+            self.path, maxBytes=max_bytes or Settings.QUERY_LOG_MAX_BYTES,
+            backupCount=Settings.QUERY_LOG_BACKUPS if backups is None else backups,
+            encoding="utf-8", delay=True
+        )
+        self._handler.setFormatter(_JsonLineFormatter())
+        self._queue = queue.SimpleQueue()
+        self._listener = QueueListener(self._queue, self._handler)
+        self._listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    @classmethod
+    def get_instance(cls, path: str = None) -> Optional["QueryLog"]:
+        """The process-wide log; None when it cannot be opened, so queries are still answered"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    try:
+                        cls._instance = cls(path)
+                    except Exception as e:
+                        logging.getLogger(__name__).error(f"Could not open query log: {e}")
+                        return None
+        return cls._instance
+
+    def record(self, entry: Dict[str, Any]):
+        if not self._closed:
+            self._queue.put(logging.makeLogRecord({"msg": entry}))
+
+    def close(self):
+        """Write the queued entries and stop the writer thread"""
+        if not self._closed:
+            self._closed = True
+            self._listener.stop()
+            self._handler.close()
+
+
+def read_entries(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Entries of every log file starting with one of the paths, skipping damaged lines"""
+    files = sorted({name for path in paths for name in glob.glob(glob.escape(path) + "*")})
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue    # a line cut short by a crash
+                if isinstance(entry, dict) and entry.get("query"):
+                    yield entry
+
+
+def summarize(entries: Iterable[Dict[str, Any]], top: int = 20) -> Dict[str, Any]:
+    """
+    One pass over the log.
+    Returns: {'entries', 'errors', 'cache_hit_rate', 'top_queries': [(query, count)],
+              'zero_result_words': [(word, count)],
+              'slowest_paths': [{'intent', 'worker', 'path', 'count', 'p50_ms', 'p95_ms', 'max_ms'}]}
+    """
+    queries, zero_words = Counter(), Counter()
+    latencies = defaultdict(list)
+    total = errors = cached = 0
+    for entry in entries:
+        total += 1
+        queries[entry["query"]] += 1
+        if entry.get("error"):
+            errors += 1
+            continue
+        cached += entry.get("path") == "cache"
+        if not entry.get("results"):
+            zero_words.update({
+                word for word in WORD_PATTERN.findall(entry["query"])
+                if len(word) > 2 and word not in STOP_WORDS and not word.isdigit()
+            })
+        latencies[(entry.get("intent"), entry.get("worker"), entry.get("path"))].append(
+            entry.get("ms", {}).get("total", 0.0)
+        )
+
+    slowest = []
+    for (intent, worker, path), values in latencies.items():
+        values.sort()
+        slowest.append({
+            "intent": intent, "worker": worker, "path": path, "count": len(values),
+            "p50_ms": round(statistics.median(values), 1),
+            "p95_ms": round(values[min(len(values) - 1, int(0.95 * len(values)))], 1),
+            "max_ms": round(values[-1], 1),
+        })
+    slowest.sort(key=lambda item: -item["p95_ms"])
+    return {
+        "entries": total,
+        "errors": errors,
+        "cache_hit_rate": round(cached / (total - errors), 3) if total > errors else 0.0,
+        "top_queries": queries.most_common(top),
+        "zero_result_words": zero_words.most_common(top),
+        "slowest_paths": slowest[:top],
+    }
+
+
+def prefill_questions(entries: Iterable[Dict[str, Any]], min_count: int = 3, top: int = 50) -> List[str]:
+    """The most asked questions answered by a worker or the response cache, most asked first"""
+    counts = Counter(
+        entry["query"] for entry in entries
+        if entry.get("path") in PREFILL_PATHS and not entry.get("error")
+    )
+    return [query for query, count in counts.most_common(top) if count >= min_count]
+
+
+def read_prefill(path: str) -> List[str]:
+    """Questions of a prefill file; none when the file is not set or missing"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze the query log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="top queries, zero-result words and slowest paths")
+    report.add_argument("--top", type=int, default=20, help="entries per section (default: %(default)s)")
+    prefill = commands.add_parser("prefill", help="most asked routed questions, one per line")
+    prefill.add_argument("--min-count", type=int, default=3, help="times a question was asked (default: %(default)s)")
+    prefill.add_argument("--top", type=int, default=50, help="questions to export (default: %(default)s)")
+    prefill.add_argument("--out", help="file to write (default: standard output)")
+    for command in (report, prefill):
+        command.add_argument("--log", action="append", help=f"log path, repeatable (default: {Settings.QUERY_LOG_PATH})")
+    args = parser.parse_args(argv)
+    paths = args.log or [Settings.QUERY_LOG_PATH]
+
+    if args.command == "prefill":
+        questions = prefill_questions(read_entries(paths), args.min_count, args.top)
+        text = "".join(f"{question}\n" for question in questions)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                f.write(text)
+            print(f"Wrote {len(questions)} questions to {args.out}")
+        else:
+            sys.stdout.write(text)
+        return 0
+
+    summary = summarize(read_entries(paths), args.top)
+    print(f"{summary['entries']} queries ({summary['errors']} failed), "
+          f"{summary['cache_hit_rate']:.1%} answered from the response cache\n")
+    print("Top queries:")
+    for query, count in summary["top_queries"]:
+        print(f"{count:>7}  {query}")
+    print("\nWords of queries without database results:")
+    for word, count in summary["zero_result_words"]:
+        print(f"{count:>7}  {word}")
+    print(f"\nSlowest paths:\n{'p95 ms':>9} {'p50 ms':>9} {'max ms':>9} {'count':>7}  intent / worker / path")
+    for item in summary["slowest_paths"]:
+        print(f"{item['p95_ms']:>9.1f} {item['p50_ms']:>9.1f} {item['max_ms']:>9.1f} {item['count']:>7}  "
+              f"{item['intent']} / {item['worker']} / {item['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import re
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import FrozenSet, Iterable, Mapping, Optional, Tuple, Union
+from config.settings import Settings
+from utils.language_detector import LanguageDetector
+from utils.reference_parser import ReferenceParser
+from utils.text_normalizer import is_arabic_script
+from utils.validators import InputValidator
+
+
+@dataclass(frozen=True)
+class PreparedQuery:
+    """A user query after the one-time preprocessing pass.
+
+    Workers read keyword hits, tokens and the detected language from here
+    instead of lowercasing, splitting and scanning the raw text themselves.
+    """
+
+    original: str
+    sanitized: str
+    normalized: str                      # lowercased, ASCII digits
+    tokens: Tuple[str, ...]
+    script: str                          # "arabic", "latin", "mixed" or "other"
+    language: str
+    keyword_hits: FrozenSet[str]         # registered keywords found in the normalized text
+    timings: Mapping[str, float] = field(default_factory=dict)    # stage -> milliseconds
+    is_valid: bool = True
+    validation_message: str = "Valid"
+    registered: FrozenSet[str] = field(default=frozenset(), repr=False)
+
+    def has_any(self, keywords: Iterable[str]) -> bool:
+        """True when any keyword occurs in the query (substring match, like `keyword in query.lower()`)"""
+        return _contains_any(keywords, self.keyword_hits, self.registered, self.normalized)
+
+    def __str__(self) -> str:
+        return self.sanitized
+
+
+class QueryPipeline:
+    """Runs validation, sanitization, normalization, tokenization, script and
+    language detection and keyword matching once per request.
+
+    Keyword matching is a single regex pass over the union of every registered
+    keyword group: at each position the longest keyword is found, and the
+    shorter keywords that are its prefixes are added from a precomputed table,
+    which gives the same hits as testing every keyword with `in`.
+    """
+
+    def __init__(self, keyword_groups: Iterable[Iterable[str]] = ()):
+        keywords = {keyword.lower() for group in keyword_groups for keyword in group if keyword}
+        self.keywords = frozenset(keywords)
+        ordered = sorted(keywords, key=len, reverse=True)
+        self._keyword_pattern = re.compile(
+            "(?=(" + "|".join(re.escape(keyword) for keyword in ordered) + "))"
+        ) if ordered else None
+        # keyword -> registered keywords that are prefixes of it, itself included
+        self._prefixes = {
+            keyword: frozenset(other for other in keywords if keyword.startswith(other))
+            for keyword in keywords
+        }
+
+    def prepare(self, query: str, detect_language: bool = True) -> PreparedQuery:
+        timings = {}
+        started = time.perf_counter()
+
+        def lap(stage: str):
+            nonlocal started
+            now = time.perf_counter()
+            timings[stage] = round((now - started) * 1000, 3)
+            started = now
+
+        is_valid, message = InputValidator.validate_length(query)
+        lap("validate")
+        if not is_valid:
+            return PreparedQuery(
+                original=query or "", sanitized="", normalized="", tokens=(), script="other",
+                language=Settings.DEFAULT_LANGUAGE, keyword_hits=frozenset(),
+                timings=MappingProxyType(timings), is_valid=False, validation_message=message,
+                registered=self.keywords
+            )
+
+        sanitized = InputValidator.sanitize_input(query)
+        lap("sanitize")
+        normalized = ReferenceParser.normalize_digits(sanitized.lower())
+        lap("normalize")
+        tokens = tuple(normalized.split())
+        lap("tokenize")
+        script = self.detect_script(sanitized)
+        lap("script")
+        keyword_hits = self.match_keywords(normalized)
+        lap("keywords")
+
+        if _contains_any(InputValidator.RESTRICTED_WORDS, keyword_hits, self.keywords, normalized):
+            is_valid, message = False, InputValidator.RESTRICTED_MESSAGE
+        lap("restricted")
+
+        language = Settings.DEFAULT_LANGUAGE
+        if detect_language and is_valid:
+            language = LanguageDetector.detect_language(sanitized)
+            lap("language")
+
+        return PreparedQuery(
+            original=query, sanitized=sanitized, normalized=normalized, tokens=tokens, script=script,
+            language=language, keyword_hits=keyword_hits, timings=MappingProxyType(timings),
+            is_valid=is_valid, validation_message=message, registered=self.keywords
+        )
+
+    def match_keywords(self, text: str) -> FrozenSet[str]:
+        if not self._keyword_pattern:
+            return frozenset()
+        hits = set()
+        for match in self._keyword_pattern.finditer(text):
+            hits |= self._prefixes[match.group(1)]
+        return frozenset(hits)
+
+    @staticmethod
+    def detect_script(text: str) -> str:
+        has_arabic = is_arabic_script(text)
+        has_latin = any("a" <= ch.lower() <= "z" for ch in text)
+        if has_arabic and has_latin:
+            return "mixed"
+        if has_arabic:
+            return "arabic"
+        return "latin" if has_latin else "other"
+
+
+def _contains_any(keywords: Iterable[str], hits: FrozenSet[str], registered: FrozenSet[str], text: str) -> bool:
+    """Keyword test against precomputed hits, with a substring scan for unregistered keywords"""
+    for keyword in keywords:
+        if keyword in hits or (keyword not in registered and keyword in text):
+            return True
+    return False
+
+
+# What workers accept: raw text from direct callers or the orchestrator's prepared query
+QueryInput = Union[str, PreparedQuery]
+
+_default_pipeline: Optional[QueryPipeline] = None
+
+
+def prepare_query(query: QueryInput) -> PreparedQuery:
+    """Pass a PreparedQuery through, or prepare a plain string (without language detection)"""
+    global _default_pipeline
+    if isinstance(query, PreparedQuery):
+        return query
+    if _default_pipeline is None:
+        _default_pipeline = QueryPipeline()
+    return _default_pipeline.prepare(query, detect_language=False)
@@ -0,0 +1,226 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+
+class VerseReference:
+    """A surah with an optional inclusive verse range"""
+
+    __slots__ = ("surah_id", "start", "end")
+
+    def __init__(self, surah_id: int, start: int = None, end: int = None):
+        self.surah_id = surah_id
+        self.start = start
+        self.end = end if end is not None else start
+
+    @property
+    def whole_surah(self) -> bool:
+        return self.start is None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VerseReference) and \
+            (self.surah_id, self.start, self.end) == (other.surah_id, other.start, other.end)
+
+    def __hash__(self) -> int:
+        return hash((self.surah_id, self.start, self.end))
+
+    def __str__(self) -> str:
+        if self.whole_surah:
+            return str(self.surah_id)
+        if self.end == self.start:
+            return f"{self.surah_id}:{self.start}"
+        return f"{self.surah_id}:{self.start}-{self.end}"
+
+    def __repr__(self) -> str:
+        return f"VerseReference({self})"
+
+
+class ReferenceParser:
+    """Parse explicit verse references such as "2:255", "Surah Al-Baqarah verse 255",
+    "سورة البقرة آية ٢٥٥" or "Surah 36" out of a user query."""
+
+    MAX_SURAH = 114
+
+    # Arabic-Indic and Extended (Persian/Urdu) digits
+    DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+    SURAH_WORDS = r"(?:surah|surat|sura|soorah|chapter|سورة|سوره|سورۃ|سورہ)"
+    VERSE_WORDS = r"(?:verses|verse|ayahs|ayah|ayat|aya|ayaat|آیات|آیت|آية|آيه|الآية|آيات|ایت)"
+    RANGE = r"(?P<start>\d{1,3})(?:\s*(?:-|–|to|تا|إلى|الى)\s*(?P<end>\d{1,3}))?"
+
+    NUMERIC_PATTERN = re.compile(
+        r"(?<![\d:])(?P<surah>\d{1,3})\s*[:：]\s*" + RANGE + r"(?![\d:])"
+    )
+    # One item of a reference list; the surah may be omitted to continue the previous item's surah
+    LIST_ITEM_PATTERN = re.compile(r"(?<![\d:])(?:(?P<surah>\d{1,3})\s*[:：]\s*)?" + RANGE + r"(?![\d:])")
+    LIST_SEPARATOR = re.compile(r"^\s*(?:[,،;؛&]\s*)?(?:(?:and|و)\s+)?$", re.IGNORECASE)
+    # "Surah Al-Baqarah (2), Verse 255", the form answers and LLM context use
+    LABELLED_PATTERN = re.compile(
+        SURAH_WORDS + r"\s+[^()\n\d]+?\s*\((?P<surah>\d{1,3})\)\s*[,،]?\s*" + VERSE_WORDS + r"\s*" + RANGE + r"(?!\d)",
+        re.IGNORECASE
+    )
+    SURAH_NUMBER_PATTERN = re.compile(
+        SURAH_WORDS + r"\s+(?P<surah>\d{1,3})(?:\s*[,،:]?\s*(?:" + VERSE_WORDS + r"\s*)?" + RANGE + r")?(?!\d)",
+        re.IGNORECASE
+    )
+    SURAH_NAME_PATTERN = re.compile(
+        SURAH_WORDS + r"\s+(?P<name>[^\d:,.?!؟،]+?)"
+        r"(?:\s*[,،]?\s*(?:" + VERSE_WORDS + r"\s*)?" + RANGE + r"(?!\d)|\s*(?=[,.?!؟،]|$))",
+        re.IGNORECASE
+    )
+
+    # Words that may surround a reference without asking for anything beyond the text itself
+    FILLER_WORDS = {
+        "show", "me", "read", "recite", "display", "give", "get", "quote", "the", "a", "please",
+        "of", "from", "in", "text", "arabic", "translation", "with", "and", "what", "does", "say",
+        "says", "is", "number", "no", "full", "complete", "entire", "whole",
+        "دکھائیں", "دکھاؤ", "پڑھیں", "کی", "کا", "کے", "نمبر", "اور", "ترجمہ",
+        "اقرأ", "اعرض", "أرني", "رقم", "من", "في", "و",
+    }
+    FILLER_PATTERN = re.compile(SURAH_WORDS + "|" + VERSE_WORDS, re.IGNORECASE)
+
+    def __init__(self, surah_lookup: Callable[[str], Optional[int]] = None):
+        """surah_lookup maps a surah name or transliteration to its number"""
+        self.surah_lookup = surah_lookup
+
+    @classmethod
+    def normalize_digits(cls, text: str) -> str:
+        return text.translate(cls.DIGITS)
+
+    def parse(self, query: str) -> Optional[VerseReference]:
+        """Return the first verse reference in the query, if any"""
+        reference, _ = self.parse_query(query)
+        return reference
+
+    def parse_query(self, query: str) -> Tuple[Optional[VerseReference], bool]:
+        """
+        Parse a query for a verse reference.
+        Returns: (reference, reference_only) where reference_only is True when
+        the query asks for nothing beyond the referenced text.
+        """
+        text = self.normalize_digits(query).strip()
+
+        match = self.NUMERIC_PATTERN.search(text)
+        if match:
+            reference = self._build(int(match.group("surah")), match.group("start"), match.group("end"))
+            if reference:
+                return reference, self._is_reference_only(text, match.span())
+
+        match = self.SURAH_NUMBER_PATTERN.search(text)
+        if match:
+            reference = self._build(int(match.group("surah")), match.group("start"), match.group("end"))
+            if reference:
+                return reference, self._is_reference_only(text, match.span())
+
+        for match in self.SURAH_NAME_PATTERN.finditer(text):
+            surah_id, unused_words = self._lookup_surah(match.group("name"))
+            if surah_id:
+                reference = self._build(surah_id, match.group("start"), match.group("end"))
+                if reference:
+                    # Words captured after the resolved name are not part of the reference
+                    rest = f"{text[:match.start()]} {unused_words} {text[match.end():]}"
+                    return reference, self._is_filler(rest)
+
+        return None, False
+
+    def find_references(self, text: str) -> List[Tuple[VerseReference, Tuple[int, int]]]:
+        """
+        Every reference cited anywhere in a text, e.g. a generated answer, as
+        (reference, span) pairs in order of appearance. Numeric forms win over
+        overlapping surah-word forms.
+        """
+        text = self.normalize_digits(text)
+        found, taken = [], []
+        patterns = (self.LABELLED_PATTERN, self.NUMERIC_PATTERN, self.SURAH_NUMBER_PATTERN, self.SURAH_NAME_PATTERN)
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if any(start < taken_end and taken_start < end for taken_start, taken_end in taken):
+                    continue
+                if pattern is self.SURAH_NAME_PATTERN:
+                    surah_id, _ = self._lookup_surah(match.group("name"))
+                    if not surah_id:
+                        continue
+                else:
+                    surah_id = int(match.group("surah"))
+                reference = self._build(surah_id, match.group("start"), match.group("end"))
+                if reference:
+                    found.append((reference, (start, end)))
+                    taken.append((start, end))
+        return sorted(found, key=lambda item: item[1])
+
+    def parse_reference_list(self, text: str) -> List[VerseReference]:
+        """
+        Parse a list such as "2:153, 2:155-157, 39:10" or "2:153, 155-157" into
+        references, in the order given. Items without a surah continue the previous one.
+        """
+        references, _ = self.parse_references(text)
+        return references
+
+    def parse_references(self, query: str) -> Tuple[List[VerseReference], bool]:
+        """
+        Parse every numeric reference in a query.
+        Returns: (references in query order, reference_only) where reference_only is
+        True when nothing but filler surrounds the references.
+        """
+        text = self.normalize_digits(query).strip()
+        references, spans = [], []
+        surah_id, previous_end = None, None
+
+        for match in self.LIST_ITEM_PATTERN.finditer(text):
+            if match.group("surah"):
+                surah_id = int(match.group("surah"))
+            else:
+                # A bare number only continues a list right after a separator
+                gap = text[previous_end:match.start()] if previous_end is not None else ""
+                if surah_id is None or not gap.strip() or not self.LIST_SEPARATOR.match(gap):
+                    continue
+
+            reference = self._build(surah_id, match.group("start"), match.group("end"))
+            if reference:
+                references.append(reference)
+                spans.append(match.span())
+                previous_end = match.end()
+
+        rest, last = "", 0
+        for start, end in spans:
+            rest += text[last:start] + " "
+            last = end
+        rest += text[last:]
+        return references, bool(references) and self._is_filler(rest)
+
+    def _build(self, surah_id: int, start: Optional[str], end: Optional[str]) -> Optional[VerseReference]:
+        """Validate numbers and build a reference"""
+        if not 1 <= surah_id <= self.MAX_SURAH:
+            return None
+        if start is None:
+            return VerseReference(surah_id)
+
+        start = int(start)
+        end = int(end) if end else start
+        if start < 1 or end < start:
+            return None
+        return VerseReference(surah_id, start, end)
+
+    def _lookup_surah(self, name: str) -> Tuple[Optional[int], str]:
+        """
+        Resolve a captured surah name, trying the longest leading word run first.
+        Returns: (surah_id, words left over after the resolved name)
+        """
+        if not self.surah_lookup:
+            return None, ""
+
+        words = name.split()
+        for size in range(min(3, len(words)), 0, -1):
+            surah_id = self.surah_lookup(" ".join(words[:size]))
+            if surah_id:
+                return surah_id, " ".join(words[size:])
+        return None, ""
+
+    def _is_reference_only(self, text: str, span: Tuple[int, int]) -> bool:
+        """Check whether everything outside the reference is filler"""
+        return self._is_filler(text[:span[0]] + " " + text[span[1]:])
+
+    def _is_filler(self, text: str) -> bool:
+        rest = self.FILLER_PATTERN.sub(" ", text)
+        words = re.findall(r"\w+", rest.lower())
+        return all(word in self.FILLER_WORDS for word in words)
@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+from config.settings import Settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, FileSessionStore is meant for the prefork server
+    fcntl = None
+
+REFERENCE_PATTERN = re.compile(r"\b(\d{1,3}):(\d{1,3})\b")
+SENTENCE_END = re.compile(r"(?<=[.!?۔؟])\s")
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class Turn:
+    """One question and answer, clipped to bounded size when recorded"""
+
+    __slots__ = ("query", "answer", "references")
+
+    def __init__(self, query: str, answer: str, references: List[str]):
+        self.query = query
+        self.answer = answer
+        self.references = references
+
+    def summary(self) -> str:
+        """One line standing in for the turn once it leaves the window"""
+        line = f"Asked: {_clip(self.query, 80)}"
+        if self.references:
+            return line + f" (verses {', '.join(self.references[:4])})"
+        first_sentence = SENTENCE_END.split(self.answer, 1)[0]
+        return line + f" -> {_clip(first_sentence, 80)}"
+
+
+class SessionMemory:
+    """Recent turns of one conversation, older turns compressed into summary lines.
+
+    Holds at most `window` full turns; a turn pushed out of the window becomes one
+    summary line, and the summary keeps only its newest lines within `summary_chars`.
+    """
+
+    def __init__(self, window: int, summary_chars: int, turn_chars: int):
+        self.turns = deque()
+        self.summaries = deque()
+        self.window = window
+        self.summary_chars = summary_chars
+        self.turn_chars = turn_chars
+        self._summary_length = 0
+
+    def add(self, query: str, answer: str, references: List[str] = None):
+        self.turns.append(Turn(_clip(query, self.turn_chars), _clip(answer, self.turn_chars), references or []))
+        while len(self.turns) > self.window:
+            self._summarize(self.turns.popleft())
+
+    def _summarize(self, turn: Turn):
+        line = turn.summary()
+        self.summaries.append(line)
+        self._summary_length += len(line) + 1
+        while self._summary_length > self.summary_chars and len(self.summaries) > 1:
+            self._summary_length -= len(self.summaries.popleft()) + 1
+
+    def context(self) -> str:
+        """Bounded conversation text for LLM prompts; empty for a new session"""
+        parts = []
+        if self.summaries:
+            parts.append("Earlier in this conversation:\n" + "\n".join(f"- {line}" for line in self.summaries))
+        if self.turns:
+            parts.append("\n".join(f"User: {turn.query}\nAssistant: {turn.answer}" for turn in self.turns))
+        return "\n\n".join(parts)
+
+    def __len__(self) -> int:
+        return len(self.turns) + len(self.summaries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "turns": [[turn.query, turn.answer, turn.references] for turn in self.turns],
+            "summaries": list(self.summaries),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], window: int, summary_chars: int, turn_chars: int) -> "SessionMemory":
+        memory = cls(window, summary_chars, turn_chars)
+        memory.turns.extend(Turn(query, answer, references) for query, answer, references in data.get("turns", []))
+        memory.summaries.extend(data.get("summaries", []))
+        memory._summary_length = sum(len(line) + 1 for line in memory.summaries)
+        return memory
+
+
+class SessionStore:
+    """Per-session conversation memory, least recently used sessions evicted past `max_sessions`"""
+
+    def __init__(self, max_sessions: int = None, window: int = None, summary_chars: int = None,
+                 turn_chars: int = None):
+        self.max_sessions = max_sessions or Settings.SESSION_MAX_SESSIONS
+        self.window = window or Settings.SESSION_WINDOW_TURNS
+        self.summary_chars = summary_chars or Settings.SESSION_SUMMARY_CHARS
+        self.turn_chars = turn_chars or Settings.SESSION_TURN_CHARS
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[SessionMemory]:
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is not None:
+                self._sessions.move_to_end(session_id)
+            return memory
+
+    def context(self, session_id: Optional[str]) -> str:
+        if not session_id:
+            return ""
+        memory = self.get(session_id)
+        return memory.context() if memory else ""
+
+    def record(self, session_id: Optional[str], query: str, response: Dict[str, Any]):
+        """Remember a turn; the cited verses come from the response sources"""
+        if not session_id:
+            return
+        references = [
+            f"{source['surah_id']}:{source['verse_number']}"
+            for source in response.get('sources', []) if source.get('surah_id') and source.get('verse_number')
+        ] or [":".join(match) for match in REFERENCE_PATTERN.findall(response.get('content', ''))]
+        self._remember(session_id, query, response.get('content', ''), list(dict.fromkeys(references)))
+
+    def _new_memory(self) -> SessionMemory:
+        return SessionMemory(self.window, self.summary_chars, self.turn_chars)
+
+    def _remember(self, session_id: str, query: str, answer: str, references: List[str]):
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = self._sessions[session_id] = self._new_memory()
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            memory.add(query, answer, references)
+
+    def clear(self, session_id: Optional[str]):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class FileSessionStore(SessionStore):
+    """Session memory kept as one JSON file per session, shared by every process using the directory.
+
+    The prefork server sends consecutive requests of one session to whichever
+    worker accepts them, so no worker can keep the conversation in its own
+    memory. A turn is recorded under an exclusive lock on the session's file;
+    past `max_sessions` files the least recently used sessions are removed.
+    """
+
+    def __init__(self, directory: str = None, **limits):
+        super().__init__(**limits)
+        self.directory = directory or Settings.SESSION_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(session_id.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, session_id: str) -> Optional[SessionMemory]:
+        path = self._path(session_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_SH)
+                data = json.load(f)
+            os.utime(path)  # Most recently used
+        except (OSError, ValueError):
+            return None
+        return SessionMemory.from_dict(data, self.window, self.summary_chars, self.turn_chars)
+
+    def _remember(self, session_id: str, query: str, answer: str, references: List[str]):
+        path = self._path(session_id)
+        created = not os.path.exists(path)
+        with open(path, "a+", encoding="utf-8") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                memory = SessionMemory.from_dict(json.loads(f.read()), self.window, self.summary_chars,
+                                                 self.turn_chars)
+            except ValueError:
+                memory = self._new_memory()
+            memory.add(query, answer, references)
+            f.seek(0)
+            f.truncate()
+            json.dump(memory.to_dict(), f, ensure_ascii=False)
+        if created:
+            self._evict()
+
+    def _evict(self):
+        files = self._files()
+        if len(files) <= self.max_sessions:
+            return
+        # Another worker may remove a file between listing and ranking it
+        ranked = []
+        for path in files:
+            try:
+                ranked.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        ranked.sort()
+        for _, path in ranked[:len(ranked) - self.max_sessions]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _files(self) -> List[str]:
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+
+    def clear(self, session_id: Optional[str]):
+        if not session_id:
+            return
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._files())
@@ -0,0 +1,59 @@
+import time
+import logging
+from config.settings import Settings
+
+
+class SharedInstance:
+    """Process-wide instance of an in-memory index, built on first use.
+
+    Subclasses define `_instance = None`, their own `_lock`, and implement
+    `_build` (raising when the data cannot be loaded) and `_empty`. A failed
+    build is logged and its empty stand-in is served until
+    INDEX_RETRY_SECONDS have passed; the next call after that builds again.
+    Callers get the index through get_instance() each time they use it, so a
+    successful retry reaches everyone holding the owner object.
+    """
+
+    _fallback = None
+    _retry_at = 0.0
+
+    @classmethod
+    def get_instance(cls, db_queries=None, **options):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    if cls._fallback is not None and time.monotonic() < cls._retry_at:
+                        return cls._fallback
+                    try:
+                        cls._instance = cls._build(cls._queries(db_queries), **options)
+                        cls._fallback = None
+                    except Exception as e:
+                        logging.getLogger(cls.__module__).error(
+                            f"Could not build {cls.__name__}: {e} (retrying in {Settings.INDEX_RETRY_SECONDS:g}s)"
+                        )
+                        cls._fallback = cls._empty(**options)
+                        cls._retry_at = time.monotonic() + Settings.INDEX_RETRY_SECONDS
+                        return cls._fallback
+        return cls._instance
+
+    @classmethod
+    def reset(cls):
+        """Forget the instance and any failure, so the next call builds again"""
+        with cls._lock:
+            cls._instance = cls._fallback = None
+            cls._retry_at = 0.0
+
+    @staticmethod
+    def _queries(db_queries):
+        if db_queries is None:
+            from database.queries import QuranQueries
+            db_queries = QuranQueries()
+        return db_queries
+
+    @classmethod
+    def _build(cls, db_queries, **options):
+        raise NotImplementedError
+
+    @classmethod
+    def _empty(cls, **options):
+        raise NotImplementedError
@@ -0,0 +1,139 @@
+"""Start-up profiler and cold-start benchmark.
+
+Usage:
+    python -m utils.startup_profile imports [--module main] [--top 15]
+    python -m utils.startup_profile coldstart [--target orchestrator] [--runs 5] [--budget-ms 2000]
+
+`imports` runs `python -X importtime -c "import <module>"` in a fresh
+interpreter and reports the slowest imports and the cost per top-level
+package. `coldstart` times fresh processes that build the target and fails
+(exit 1) when the median exceeds the budget or the target loads one of
+HEAVY_MODULES.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import time
+from typing import Dict, List, NamedTuple, Optional
+from config.settings import Settings
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must only be imported when actually used
+HEAVY_MODULES = ("gradio", "google.generativeai", "langdetect")
+
+# Statements run in a fresh interpreter, none of which may load HEAVY_MODULES.
+# Building the Gradio UI is left out: it imports gradio by design and takes seconds.
+COLD_START_TARGETS = {
+    "orchestrator": "from agents.orchestrator import QuranChatbotOrchestrator; QuranChatbotOrchestrator()",
+    "server": "import server",
+    "headless": "import main; main.QuranChatbot()",
+}
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Entries of `-X importtime` output, in the order Python printed them"""
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue    # the header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(ImportTiming(stripped, int(fields[0]), int(fields[1]), (len(name) - len(stripped) - 1) // 2))
+    return timings
+
+
+def package_breakdown(timings: List[ImportTiming]) -> Dict[str, int]:
+    """Self time per top-level package, largest first (microseconds)"""
+    totals: Dict[str, int] = {}
+    for timing in timings:
+        package = timing.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + timing.self_us
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def profile_imports(module: str) -> List[ImportTiming]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env=_environment()
+    )
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_cold_start(target: str, runs: int = 5) -> Dict:
+    """
+    Wall time of fresh processes running a COLD_START_TARGETS statement.
+    Returns: {'target', 'runs_ms', 'median_ms', 'heavy_modules'} with the heavy modules the target loaded.
+    """
+    probe = f"{COLD_START_TARGETS[target]}\nimport sys, json\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    runs_ms, heavy = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", probe], cwd=PROJECT_ROOT, capture_output=True, text=True,
+                                env=_environment())
+        runs_ms.append(round(1000 * (time.perf_counter() - started), 1))
+        if result.returncode:
+            raise RuntimeError(f"Cold start of {target} failed:\n{result.stderr[-2000:]}")
+        heavy = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"target": target, "runs_ms": runs_ms, "median_ms": statistics.median(runs_ms), "heavy_modules": heavy}
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile imports and measure cold start")
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports = commands.add_parser("imports", help="slowest imports of a module")
+    imports.add_argument("--module", default="main", help="module to import (default: %(default)s)")
+    imports.add_argument("--top", type=int, default=15, help="entries to show (default: %(default)s)")
+    cold = commands.add_parser("coldstart", help="time fresh processes against a budget")
+    cold.add_argument("--target", choices=sorted(COLD_START_TARGETS), default="orchestrator")
+    cold.add_argument("--runs", type=int, default=5, help="processes to time (default: %(default)s)")
+    cold.add_argument("--budget-ms", type=float, default=Settings.COLD_START_BUDGET_MS,
+                      help="fail when the median is slower (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.command == "imports":
+        timings = profile_imports(args.module)
+        total = sum(timing.self_us for timing in timings)
+        print(f"import {args.module}: {total / 1000:.1f} ms over {len(timings)} modules\n")
+        print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+        for timing in sorted(timings, key=lambda t: -t.cumulative_us)[:args.top]:
+            print(f"{timing.cumulative_us / 1000:>14.1f} {timing.self_us / 1000:>9.1f}  {'  ' * timing.depth}{timing.module}")
+        print(f"\n{'self ms':>9}  package")
+        for package, self_us in list(package_breakdown(timings).items())[:args.top]:
+            print(f"{self_us / 1000:>9.1f}  {package}")
+        return 0
+
+    result = measure_cold_start(args.target, args.runs)
+    print(f"{args.target}: median {result['median_ms']:.0f} ms over {args.runs} runs {result['runs_ms']} "
+          f"(budget {args.budget_ms:.0f} ms)")
+    failed = result["median_ms"] > args.budget_ms or bool(result["heavy_modules"])
+    if result["heavy_modules"]:
+        print(f"Loaded at start-up: {', '.join(result['heavy_modules'])}")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from utils.shared_instance import SharedInstance
+from utils.text_normalizer import (
+    arabic_key, transliteration_key, is_arabic_script, trigrams, similarity
+)
+
+
+class SurahResolver(SharedInstance):
+    """In-memory surah name index with typo-tolerant lookup.
+
+    Built once from the surah table. Names are reduced to normalized keys
+    (transliteration rules for Latin script, diacritic and article stripping
+    for Arabic script); exact keys are a dict hit and anything else is ranked
+    through a trigram index and edit distance.
+    """
+
+    # Minimum similarity for resolve_id to accept the best candidate
+    MIN_SCORE = 0.75
+    CONTAINED_SCORE = 0.85
+
+    SURAH_PREFIX = re.compile(r"^\s*(?:surah|surat|sura|سورة|سوره|سورۃ|سورہ)\s+", re.IGNORECASE)
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, surahs: List[Dict]):
+        self.surahs = {surah['id']: surah for surah in surahs}
+        self._exact = {}
+        self._keys = defaultdict(set)        # key -> surah ids
+        self._trigrams = defaultdict(set)    # trigram -> keys
+
+        for surah in surahs:
+            keys = {
+                transliteration_key(surah.get('name_en') or ""),
+                transliteration_key(surah.get('name_en') or "", strip_article=False),
+                arabic_key(surah.get('name_ar') or ""),
+            }
+            for key in keys - {""}:
+                self._exact.setdefault(key, surah['id'])
+                self._keys[key].add(surah['id'])
+                for gram in trigrams(key):
+                    self._trigrams[gram].add(key)
+
+    @classmethod
+    def _build(cls, db_queries) -> "SurahResolver":
+        """Shared resolver, built from the surah table on first use"""
+        surahs = db_queries.get_all_surahs()
+        if not surahs:
+            raise ValueError("surah table is empty")
+        return cls(surahs)
+
+    @classmethod
+    def _empty(cls) -> "SurahResolver":
+        return cls([])
+
+    def resolve(self, name: str, limit: int = 5) -> List[Tuple[Dict, float]]:
+        """Rank surahs matching a name, best first, as (surah, score) pairs"""
+        name = self.SURAH_PREFIX.sub("", name).strip()
+        if not name:
+            return []
+
+        if name.isdigit():
+            surah = self.surahs.get(int(name))
+            return [(surah, 1.0)] if surah else []
+
+        if is_arabic_script(name):
+            query_keys = {arabic_key(name)}
+        else:
+            query_keys = {transliteration_key(name), transliteration_key(name, strip_article=False)}
+        query_keys.discard("")
+
+        for key in query_keys:
+            if key in self._exact:
+                return [(self.surahs[self._exact[key]], 1.0)]
+
+        # Candidate keys share at least one trigram with the query
+        scores = {}
+        for query_key in query_keys:
+            candidates = set()
+            for gram in trigrams(query_key):
+                candidates |= self._trigrams.get(gram, set())
+            for key in candidates:
+                score = similarity(query_key, key)
+                if len(query_key) >= 4 and query_key in key:
+                    # Partial names such as "Imran" for "Aal-i-Imraan"
+                    score = max(score, self.CONTAINED_SCORE)
+                for surah_id in self._keys[key]:
+                    scores[surah_id] = max(scores.get(surah_id, 0.0), score)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.surahs[surah_id], round(score, 3)) for surah_id, score in ranked]
+
+    def resolve_id(self, name: str) -> Optional[int]:
+        """Best matching surah number, or None when nothing is close enough"""
+        ranked = self.resolve(name, limit=1)
+        if ranked and ranked[0][1] >= self.MIN_SCORE:
+            return ranked[0][0]['id']
+        return None
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from typing import Set
+
+# Harakat, Quranic annotation marks, superscript alef and tatweel
+ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+
+ARABIC_LETTER_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ة": "ه", "ۃ": "ه", "ہ": "ه", "ھ": "ه",
+    "ى": "ي", "ی": "ي", "ې": "ي",
+    "ؤ": "و", "ئ": "ي", "ک": "ك",
+})
+
+# Leading "al-" style articles in transliterations, with sun-letter assimilation
+TRANSLITERATED_ARTICLE = re.compile(r"^(?:al|el|an|ar|as|ash|at|az|ad|adh|ath|ad-dh)[\s\-']+")
+
+TRANSLITERATION_RULES = [
+    (re.compile(r"ee"), "i"),
+    (re.compile(r"oo|ou"), "u"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+    (re.compile(r"([aeiou])h$"), r"\1"),
+]
+
+
+def normalize_arabic(text: str) -> str:
+    """Strip diacritics and unify letter variants so spellings compare equal"""
+    text = ARABIC_DIACRITICS.sub("", text)
+    return text.translate(ARABIC_LETTER_MAP).strip()
+
+
+def strip_arabic_article(word: str) -> str:
+    """Remove a leading definite article (ال) from a word"""
+    if word.startswith("ال") and len(word) > 3:
+        return word[2:]
+    return word
+
+
+def arabic_key(text: str) -> str:
+    """Comparison key for an Arabic name: normalized, article-free, no spaces"""
+    words = [strip_arabic_article(word) for word in normalize_arabic(text).split()]
+    return "".join(words)
+
+
+def transliteration_key(text: str, strip_article: bool = True) -> str:
+    """Comparison key for a Latin transliteration such as "Al-Faatihah" -> "fatiha" """
+    text = unicodedata.normalize("NFKD", text.lower().strip())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    if strip_article:
+        text = TRANSLITERATED_ARTICLE.sub("", text)
+    text = re.sub(r"[^a-z]", "", text)
+    for pattern, replacement in TRANSLITERATION_RULES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def is_arabic_script(text: str) -> bool:
+    return any("\u0600" <= ch <= "\u06FF" for ch in text)
+
+
+def trigrams(key: str) -> Set[str]:
+    """Character trigrams of a key, padded so short keys still produce some"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ch_a in enumerate(a, 1):
+        current = [i]
+        for j, ch_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ch_a != ch_b)))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    """Edit-distance similarity in [0, 1]"""
+    if not a or not b:
+        return 0.0
+    return 1 - edit_distance(a, b) / max(len(a), len(b))
@@ -2,26 +2,43 @@ from config.settings import Settings
 import re
 
 class InputValidator:
+    # Words of the restricted topics, split once
+    RESTRICTED_WORDS = tuple(dict.fromkeys(
+        word for restricted in Settings.RESTRICTED_TOPICS for word in restricted.split()
+    ))
+    RESTRICTED_MESSAGE = "Please focus on spiritual guidance and Quranic teachings"
+    
+    # Potentially harmful characters
+    UNSAFE_CHARACTERS = re.compile(r'[<>\"\'%;()&+]')
+    
     @staticmethod
     def validate_query(query: str) -> tuple[bool, str]:
         """Validate user input query"""
+        is_valid, message = InputValidator.validate_length(query)
+        if not is_valid:
+            return is_valid, message
+        
+        # Check for restricted content (basic check)
+        query_lower = query.lower()
+        if any(word in query_lower for word in InputValidator.RESTRICTED_WORDS):
+            return False, InputValidator.RESTRICTED_MESSAGE
+        
+        return True, "Valid"
+    
+    @staticmethod
+    def validate_length(query: str) -> tuple[bool, str]:
+        """Check that a query is neither empty nor too long"""
         if not query or not query.strip():
             return False, "Query cannot be empty"
         
         if len(query) > Settings.MAX_QUERY_LENGTH:
             return False, f"Query too long. Maximum {Settings.MAX_QUERY_LENGTH} characters allowed"
         
-        # Check for restricted content (basic check)
-        query_lower = query.lower()
-        for restricted in Settings.RESTRICTED_TOPICS:
-            if any(word in query_lower for word in restricted.split()):
-                return False, "Please focus on spiritual guidance and Quranic teachings"
-        
         return True, "Valid"
     
     @staticmethod
     def sanitize_input(text: str) -> str:
         """Basic input sanitization"""
         # Remove potentially harmful characters
-        cleaned = re.sub(r'[<>\"\'%;()&+]', '', text)
+        cleaned = InputValidator.UNSAFE_CHARACTERS.sub('', text)
         return cleaned.strip()
\ No newline at end of file
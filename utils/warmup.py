@@ -0,0 +1,152 @@
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List
+from config.settings import Settings
+from database.concordance import Concordance
+from database.corpus import QuranCorpus
+from database.positional_index import PositionalIndex
+from database.queries import QuranQueries
+from database.related_verses import RelatedVerses
+from database.search_index import VerseSearchIndex
+from llm.citation_verifier import CitationVerifier
+from llm.prompt_templates import PromptTemplates
+from utils.language_detector import LanguageDetector
+from utils.lexicon import LEXICON
+from utils.names_index import AllahNamesIndex
+from utils.query_log import read_prefill
+from utils.surah_resolver import SurahResolver
+
+# One sample per supported language, so every langdetect profile is loaded
+LANGUAGE_SAMPLES = {
+    "en": "What does the Quran say about patience?",
+    "ur": "قرآن صبر کے بارے میں کیا کہتا ہے؟",
+    "ar": "ماذا يقول القرآن عن الصبر؟",
+}
+TEMPLATE_TYPES = ("verse_search", "dua_request", "guidance_request", "names_request", "learning_request", "fallback")
+# Read-only shared indexes that need no per-worker options, in build order
+SHARED_INDEXES = (QuranCorpus, VerseSearchIndex, PositionalIndex, SurahResolver, AllahNamesIndex,
+                  Concordance, RelatedVerses, CitationVerifier)
+
+
+def preload_shared_indexes(db_queries=None) -> Dict[str, float]:
+    """Build SHARED_INDEXES in this process; returns milliseconds per index.
+
+    The prefork server calls this in the parent before forking, so every
+    worker inherits the built indexes through copy-on-write instead of
+    loading its own copy of the corpus and the search index.
+    """
+    db_queries = db_queries or QuranQueries()
+    timings = {}
+    for index in SHARED_INDEXES:
+        started = time.perf_counter()
+        index.get_instance(db_queries)
+        timings[index.__name__] = round(1000 * (time.perf_counter() - started), 1)
+    return timings
+
+
+class Warmup:
+    """Boot-time warm-up of one orchestrator, run before the app reports ready.
+
+    Each step takes what the first requests would otherwise pay for: the
+    SQLite file pages, the in-memory and memory-mapped indexes, langdetect's
+    profiles, routing and lexicon structures, prompt templates and the LLM
+    client. With FRAGMENT_PRERENDER on, the names and duas context fragments
+    are rendered too. With pre-answering on, the example questions and those
+    of WARMUP_QUESTIONS_FILE (exported from the query log) are answered once
+    so their responses are already in the response cache; the query log
+    leaves these pre-answers out.
+    """
+
+    def __init__(self, orchestrator, questions: List[str] = None):
+        self.orchestrator = orchestrator
+        self.questions = questions if questions is not None else list(dict.fromkeys(
+            Settings.EXAMPLE_QUESTIONS + read_prefill(Settings.WARMUP_QUESTIONS_FILE)
+        ))
+        self.ready = False
+        self.report: Dict[str, Any] = {}
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, preanswer: bool = None) -> Dict[str, Any]:
+        """
+        Run every step, then set ready; a failing step is logged and skipped.
+        With WARMUP_ENABLED off nothing is run and the app is ready at once.
+        Returns: {'ready', 'total_ms', 'steps': {name: ms}, 'errors': {name: message}, 'preanswered'}
+        """
+        preanswer = Settings.WARMUP_PREANSWER if preanswer is None else preanswer
+        started = time.perf_counter()
+        report = {"ready": False, "total_ms": 0.0, "steps": {}, "errors": {}, "preanswered": 0}
+        steps = [] if not Settings.WARMUP_ENABLED else [
+            ("database", self._warm_database),
+            ("indexes", self._warm_indexes),
+            ("language_detection", self._warm_language_detection),
+            ("routing", self._warm_routing),
+            ("templates", self._warm_templates),
+            ("llm_client", self._warm_llm_client),
+        ]
+        if steps and Settings.FRAGMENT_PRERENDER:
+            steps.append(("fragments", self._warm_fragments))
+        for name, step in steps:
+            await self._timed(report, name, step)
+
+        if steps and preanswer and self.questions:
+            step_started = time.perf_counter()
+            for question in self.questions:
+                try:
+                    response = await self.orchestrator.process_query(question, {"source": "warmup"})
+                    report["preanswered"] += not response.get("error")
+                except Exception as e:
+                    report["errors"]["preanswer"] = str(e)
+                # Let other tasks run between answers, whose database work blocks the loop
+                await asyncio.sleep(0)
+            report["steps"]["preanswer"] = round(1000 * (time.perf_counter() - step_started), 1)
+
+        report["total_ms"] = round(1000 * (time.perf_counter() - started), 1)
+        report["ready"] = self.ready = True
+        self.report = report
+        self.logger.info(f"Warm-up finished in {report['total_ms']:.0f} ms: {report['steps']}"
+                         + (f", errors: {report['errors']}" if report["errors"] else ""))
+        return report
+
+    async def _timed(self, report: Dict[str, Any], name: str, step: Callable[[], Any]):
+        step_started = time.perf_counter()
+        try:
+            # Off the event loop, so the server's heartbeat keeps going through slow steps
+            await asyncio.get_running_loop().run_in_executor(None, step)
+        except Exception as e:
+            self.logger.warning(f"Warm-up step {name} failed: {e}")
+            report["errors"][name] = str(e)
+        report["steps"][name] = round(1000 * (time.perf_counter() - step_started), 1)
+
+    def _warm_database(self):
+        self.orchestrator.verse_worker.db_queries.warm_cache()
+
+    def _warm_indexes(self):
+        db_queries = self.orchestrator.verse_worker.db_queries
+        db_queries.warm_indexes()
+        Concordance.get_instance(db_queries).preload()
+        RelatedVerses.get_instance(db_queries).preload()
+
+    def _warm_language_detection(self):
+        for sample in LANGUAGE_SAMPLES.values():
+            LanguageDetector.detect_language(sample)
+
+    def _warm_routing(self):
+        for question in [*self.questions, *LANGUAGE_SAMPLES.values()]:
+            prepared = self.orchestrator.pipeline.prepare(question, detect_language=False)
+            LEXICON.concepts(prepared.normalized)
+
+    def _warm_templates(self):
+        for template_type in TEMPLATE_TYPES:
+            for language in Settings.SUPPORTED_LANGUAGES:
+                template = PromptTemplates.get_template(template_type, language)
+                if template:
+                    template.format(context="", query="")
+
+    def _warm_llm_client(self):
+        self.orchestrator.fallback_llm.ensure_backend()
+
+    def _warm_fragments(self):
+        for worker in self.orchestrator.workers:
+            worker.prerender_fragments()
+